@@ -9,15 +9,37 @@ Built by a CSE Engineering Student
 """
 
 import streamlit as st
-from pathlib import Path
-import json, uuid, datetime, random
-from typing import List, Dict, Any
-import time
+import pandas as pd
+import uuid, datetime, json, random, itertools, heapq
+from typing import List, Dict, Any, Iterable, Callable, Union
 import csv
 from io import StringIO
 
+from skillswap.store import empty_data, open_store, rebuild_positions, record_position, find_record
+from skillswap.writer import WriteBehind, Job, Mutation
+from skillswap.models import make_user, make_request
+from skillswap.score_cache import ScoreCache
+from skillswap.columns import ColumnSnapshot
+from skillswap.endorsements import add_endorsement, has_endorsed
+from skillswap.swaps import (add_request, set_status, requested, rebuild_request_indexes, mailbox_count,
+                             mailbox_page)
+from skillswap.pairing import run_pairing_round
+from skillswap.lsh import LSHIndex, BANDS
+from skillswap.cycles import compute_cycles, cycles_for_user
+from skillswap.purge import delete_user, rebuild_owned
+from skillswap.snapshots import create_snapshot
+from skillswap.filters import AVAILABILITY, ACTIVITY_DAYS, RATING_FLOORS, FilterIndex, mark_active, run_pipeline
+from skillswap.locations import rebuild_locations, users_near, location_counts, location_label, user_location
+from skillswap.market import add_user, update_user, rebuild_market, skill_gaps, most_offered, total_offered, market_locations, demand_weight
+from skillswap.rollups import HOURLY_DAYS, LATENCY_EVENTS, bin_labels, latency_histogram, percentile_hours, rebuild_rollups, series
+from skillswap.archive import ARCHIVE_AFTER_DAYS, archivable, archived_page, iter_archived, register_segments, status_count, write_segments
+from skillswap.achievements import (SWAP_COMPLETED, ENDORSEMENT_RECEIVED, REQUEST_ACCEPTED, XP_PER_LEVEL,
+                                    make_event, process_events, backfill)
+
 # ---------------- Config ----------------
-DATA_FILE = Path("data.json")
+ARCHIVE_PAGE_SIZE = 20  # archived swaps per page in the Completed tab
+TREND_DAYS = 365        # history shown by the daily trend charts
+
 st.set_page_config(
     page_title="SkillSwap", 
     page_icon="🎯", 
@@ -34,145 +56,12 @@ if "current_user" not in st.session_state:
     st.session_state.current_user = None
 if "show_confetti" not in st.session_state:
     st.session_state.show_confetti = False
-
-# ---------------- Data Management ----------------
-def read_data() -> Dict[str, Any]:
-    if not DATA_FILE.exists():
-        default = {
-            "users": [], 
-            "requests": [], 
-            "messages": [],
-            "endorsements": [],
-            "achievements": []
-        }
-        write_data(default)
-        return default
-    try:
-        return json.loads(DATA_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        default = {
-            "users": [], 
-            "requests": [], 
-            "messages": [],
-            "endorsements": [],
-            "achievements": []
-        }
-        write_data(default)
-        return default
-
-def write_data(data: Dict[str, Any]):
-    DATA_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
-
-def make_user(name: str, email: str, bio: str, offered: List[str], wanted: List[str], 
-              proficiency: Dict[str, str], location: str = "", interests: List[str] = []) -> Dict[str, Any]:
-    return {
-        "id": str(uuid.uuid4()),
-        "name": name,
-        "email": email,
-        "bio": bio,
-        "location": location,
-        "interests": interests,
-        "skills_offered": [s.strip().lower() for s in offered if s.strip()],
-        "skills_wanted": [s.strip().lower() for s in wanted if s.strip()],
-        "proficiency": proficiency,
-        "rating": 5.0,
-        "swaps_completed": 0,
-        "endorsements_received": 0,
-        "badges": [],
-        "level": 1,
-        "experience_points": 0,
-        "availability": "Available",
-        "response_rate": 100,
-        "created_at": datetime.datetime.utcnow().isoformat(),
-        "last_active": datetime.datetime.utcnow().isoformat()
-    }
-
-def make_request(sender_id: str, receiver_id: str, skill_offered: str, skill_wanted: str, 
-                message: str = "", priority: str = "Medium") -> Dict[str, Any]:
-    return {
-        "id": str(uuid.uuid4()),
-        "sender_id": sender_id,
-        "receiver_id": receiver_id,
-        "skill_offered": skill_offered,
-        "skill_wanted": skill_wanted,
-        "message": message,
-        "priority": priority,
-        "status": "Pending",
-        "created_at": datetime.datetime.utcnow().isoformat(),
-        "updated_at": datetime.datetime.utcnow().isoformat(),
-        "viewed": False
-    }
-
-def add_achievement(user_id: str, achievement_type: str, data: Dict):
-    achievements = data.get("achievements", [])
-    achievements.append({
-        "id": str(uuid.uuid4()),
-        "user_id": user_id,
-        "type": achievement_type,
-        "timestamp": datetime.datetime.utcnow().isoformat()
-    })
-    data["achievements"] = achievements
-    
-    user = next((u for u in data["users"] if u["id"] == user_id), None)
-    if user:
-        badges = user.get("badges", [])
-        if achievement_type == "first_swap" and "🎉 First Swap" not in badges:
-            badges.append("🎉 First Swap")
-        elif achievement_type == "5_swaps" and "⭐ Active Learner" not in badges:
-            badges.append("⭐ Active Learner")
-        elif achievement_type == "10_swaps" and "🏆 Expert Swapper" not in badges:
-            badges.append("🏆 Expert Swapper")
-        user["badges"] = badges
-
-# ---------------- Enhanced Algorithm ----------------
-def compatibility_score(a: Dict[str, Any], b: Dict[str, Any]) -> tuple[float, Dict[str, Any]]:
-    offers_a = set(a["skills_offered"])
-    wants_a = set(a["skills_wanted"])
-    offers_b = set(b["skills_offered"])
-    wants_b = set(b["skills_wanted"])
-    
-    a_to_b = offers_a.intersection(wants_b)
-    b_to_a = offers_b.intersection(wants_a)
-    
-    reciprocity = 0
-    if wants_b and a_to_b:
-        reciprocity += (len(a_to_b) / len(wants_b)) * 40
-    if wants_a and b_to_a:
-        reciprocity += (len(b_to_a) / len(wants_a)) * 40
-    
-    proficiency = 0
-    prof_a = a.get("proficiency", {})
-    for skill in a_to_b:
-        if skill in prof_a:
-            if prof_a[skill] == "Expert":
-                proficiency += 6
-            elif prof_a[skill] == "Intermediate":
-                proficiency += 3
-    
-    engagement = min(a.get("swaps_completed", 0) + b.get("swaps_completed", 0), 10)
-    rating = ((a.get("rating", 0) + b.get("rating", 0)) / 2) * 0.5
-    response = ((a.get("response_rate", 100) + b.get("response_rate", 100)) / 2) * 0.1
-    
-    location_bonus = 5 if a.get("location", "") == b.get("location", "") and a.get("location") else 0
-    
-    interests_a = set(a.get("interests", []))
-    interests_b = set(b.get("interests", []))
-    interest_overlap = len(interests_a.intersection(interests_b)) * 2
-    
-    total = min(reciprocity + proficiency + engagement + rating + response + location_bonus + interest_overlap, 100)
-    
-    details = {
-        "reciprocity": round(reciprocity, 1),
-        "proficiency": round(proficiency, 1),
-        "engagement": round(engagement, 1),
-        "rating": round(rating, 1),
-        "response_rate": round(response, 1),
-        "location_match": location_bonus > 0,
-        "mutual_skills": list(a_to_b.union(b_to_a)),
-        "common_interests": list(interests_a.intersection(interests_b))
-    }
-    
-    return round(total, 1), details
+if "archive_page" not in st.session_state:
+    st.session_state.archive_page = 0
+if "cursors" not in st.session_state:
+    st.session_state.cursors = {}
+if "jobs" not in st.session_state:
+    st.session_state.jobs = {}
 
 # ---------------- ENHANCED CSS with Scrollable Quick Actions ----------------
 ENHANCED_CSS = """
@@ -731,7 +620,7 @@ def status_badge_html(status: str) -> str:
 def level_progress_html(user: Dict) -> str:
     xp = user.get("experience_points", 0)
     level = user.get("level", 1)
-    next_level_xp = level * 100
+    next_level_xp = XP_PER_LEVEL
     progress = (xp % next_level_xp) / next_level_xp * 100
     
     return f"""
@@ -770,31 +659,123 @@ def export_users_csv(users: List[Dict]) -> str:
         writer.writerows(users)
     return output.getvalue()
 
-def export_requests_csv(requests: List[Dict], users: List[Dict]) -> str:
+def export_requests_csv(requests: Iterable[Dict], users: List[Dict]) -> str:
+    # Takes any iterable, so archived requests can be streamed in after the hot ones
     output = StringIO()
-    if requests:
-        rows = []
-        for req in requests:
-            sender = next((u for u in users if u["id"] == req["sender_id"]), {})
-            receiver = next((u for u in users if u["id"] == req["receiver_id"]), {})
-            rows.append({
-                "sender": sender.get("name", "Unknown"),
-                "receiver": receiver.get("name", "Unknown"),
-                "skill_offered": req.get("skill_offered", ""),
-                "skill_wanted": req.get("skill_wanted", ""),
-                "status": req.get("status", ""),
-                "priority": req.get("priority", ""),
-                "created_at": req.get("created_at", "")
-            })
+    by_id = {u["id"]: u for u in users}
+    rows = []
+    for req in requests:
+        sender = by_id.get(req["sender_id"], {})
+        receiver = by_id.get(req["receiver_id"], {})
+        rows.append({
+            "sender": sender.get("name", "Unknown"),
+            "receiver": receiver.get("name", "Unknown"),
+            "skill_offered": req.get("skill_offered", ""),
+            "skill_wanted": req.get("skill_wanted", ""),
+            "status": req.get("status", ""),
+            "priority": req.get("priority", ""),
+            "created_at": req.get("created_at", "")
+        })
+    if rows:
         writer = csv.DictWriter(output, fieldnames=rows[0].keys())
         writer.writeheader()
         writer.writerows(rows)
     return output.getvalue()
 
+@st.cache_resource
+def match_index() -> LSHIndex:
+    # Shared by every session; sync() re-signs only profiles that changed and holds the
+    # index lock, as candidates() does
+    return LSHIndex()
+
+@st.cache_resource
+def filter_index() -> FilterIndex:
+    # Shared by every session; the bitmaps are rebuilt only when the user list changes
+    return FilterIndex()
+
+@st.cache_resource
+def store_writer() -> WriteBehind:
+    return WriteBehind()
+
+@st.cache_resource
+def score_cache() -> ScoreCache:
+    # Shared by every session; entries are keyed on profile versions, so edits never need evicting
+    return ScoreCache()
+
+def stats_columns() -> ColumnSnapshot:
+    # Memory-mapped numbers, names and categories, including edits still being flushed
+    return store_writer().read_columns()
+
+def commit(mutation: Mutation, message: Union[str, Callable[[Any], str]] = ""):
+    # Applied to the shared copy right away and flushed by the writer thread,
+    # so the page reruns immediately instead of waiting on the disk. A message
+    # built from the mutation's result waits for the commit to report it
+    future = store_writer().submit(mutation)
+    if future.done() and future.exception():
+        raise future.exception()
+    if callable(message):
+        message = message(future.result())
+    if message:
+        st.session_state.notifications.append(message)
+    st.rerun()
+
+def run_job(name: str, job: Job, message: Callable[[Any], str]):
+    # Slow batch work runs on the writer's job thread instead of this rerun; its
+    # message shows on the first rerun after the result is committed
+    st.session_state.jobs[name] = (store_writer().submit_job(job), message)
+    st.rerun()
+
+def find_request(d: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+    # Through the positions index, so only the request itself is copied for the mutation
+    pos = record_position(d, "requests", request_id)
+    if pos is None:
+        raise KeyError(f"request {request_id} not found")
+    return d["requests"][pos]
+
+def page_requests(request_ids: List[str]) -> List[Dict[str, Any]]:
+    # One page of mailbox ids resolved by position; ids no longer in the hot data are skipped
+    found = (find_record(data, "requests", request_id) for request_id in request_ids)
+    return [req for req in found if req is not None]
+
+def current_cursor(name: str):
+    return st.session_state.cursors.setdefault(name, [None])[-1]
+
+def page_controls(name: str, next_cursor):
+    # A stack of cursors per list, so Newer steps back exactly one page
+    stack = st.session_state.cursors.setdefault(name, [None])
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("⬅️ Newer", disabled=len(stack) == 1, key=f"{name}_newer"):
+            stack.pop()
+            st.rerun()
+    with col2:
+        if st.button("Older ➡️", disabled=next_cursor is None, key=f"{name}_older"):
+            stack.append(next_cursor)
+            st.rerun()
+
 # ---------------- Load Data ----------------
-data = read_data()
-users = data.get("users", [])
-requests = data.get("requests", [])
+# Sections are shared with the writer until used; the page only reads them through
+# peek(), and helpers that modify data get their own copy of what they touch
+data, settled = store_writer().read_settled()
+score_cache().invalidate_on(store_writer().conflicts)
+users = data.peek("users", [])
+
+indexes = data.peek("indexes", {})
+if ((data.peek("requests") and ("mailboxes" not in indexes or "statuses" not in data.peek("rollups", {})))
+        or ((data.peek("endorsements") or data.peek("achievements")) and "owned" not in indexes)
+        or (users and ("skills" not in indexes or "locations" not in indexes))
+        or ((users or data.peek("requests")) and "positions" not in indexes)):
+    # Data written before the per-user indexes, rollups and their status counts, skill
+    # market, location index and record positions existed
+    def migrate(d):
+        rebuild_request_indexes(d)
+        rebuild_owned(d)
+        rebuild_rollups(d)
+        rebuild_market(d)
+        rebuild_locations(d)
+        rebuild_positions(d)
+    
+    commit(migrate)
 
 # ---------------- Sidebar with SCROLLABLE Quick Actions ----------------
 with st.sidebar:
@@ -881,27 +862,34 @@ with st.sidebar:
             }
         ]
         
-        added = 0
-        for d in demo_users:
-            if not any(u["name"] == d["name"] for u in users):
-                new_user = {
-                    "id": str(uuid.uuid4()),
-                    **d,
-                    "endorsements_received": random.randint(5, 20),
-                    "badges": random.sample(["🎉 First Swap", "⭐ Active Learner", "🏆 Expert Swapper"], k=random.randint(1, 3)),
-                    "availability": random.choice(["Available", "Busy", "Away"]),
-                    "response_rate": random.randint(85, 100),
-                    "created_at": datetime.datetime.utcnow().isoformat(),
-                    "last_active": datetime.datetime.utcnow().isoformat()
-                }
-                users.append(new_user)
-                added += 1
+        def load_demo(d):
+            added = 0
+            for demo in demo_users:
+                if not any(u["name"] == demo["name"] for u in d["users"]):
+                    add_user(d, {
+                        "id": str(uuid.uuid4()),
+                        **demo,
+                        "endorsements_received": 0,
+                        "endorsements_by_skill": {},
+                        "badges": [],
+                        "availability": random.choice(["Available", "Busy", "Away"]),
+                        "response_rate": random.randint(85, 100),
+                        "created_at": datetime.datetime.utcnow().isoformat(),
+                        "last_active": datetime.datetime.utcnow().isoformat()
+                    })
+                    added += 1
+            
+            # Demo users endorse a few of each other's skills
+            for endorsee in d["users"]:
+                for endorser in random.sample(d["users"], k=min(len(d["users"]), 3)):
+                    if endorsee["skills_offered"]:
+                        add_endorsement(d, endorser, endorsee, random.choice(endorsee["skills_offered"]))
+            
+            backfill(d)
+            return added
         
-        data["users"] = users
-        write_data(data)
-        st.success(f"✅ Added {added} demo profiles!")
-        time.sleep(1)
-        st.rerun()
+        added = len([demo for demo in demo_users if not any(u["name"] == demo["name"] for u in users)])
+        commit(load_demo, f"✅ Added {added} demo profiles!")
     
     # Export Users CSV
     if st.button("📊 Export Users CSV", use_container_width=True, key="export_users"):
@@ -919,8 +907,8 @@ with st.sidebar:
     
     # Export Requests CSV
     if st.button("📬 Export Requests CSV", use_container_width=True, key="export_requests"):
-        if requests:
-            csv_data = export_requests_csv(requests, users)
+        if data.peek("requests") or data.peek("archive", {}).get("segments"):
+            csv_data = export_requests_csv(itertools.chain(data.peek("requests", []), iter_archived(data)), users)
             st.download_button(
                 "⬇️ Download Requests.csv",
                 csv_data,
@@ -933,6 +921,7 @@ with st.sidebar:
     
     # Generate Platform Report
     if st.button("📄 Generate Report", use_container_width=True, key="report"):
+        requests = data.peek("requests", [])
         report = f"""
 SkillSwap Platform Report
 Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -941,9 +930,9 @@ Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Platform Statistics:
 - Total Users: {len(users)}
 - Total Skills Offered: {sum(len(u.get('skills_offered', [])) for u in users)}
-- Total Requests: {len(requests)}
+- Total Requests: {len(requests) + sum(data.peek('archive', {}).get('counts', {}).values())}
 - Pending Requests: {len([r for r in requests if r['status'] == 'Pending'])}
-- Completed Swaps: {len([r for r in requests if r['status'] == 'Completed'])}
+- Completed Swaps: {status_count(data, 'Completed')}
 - Average Rating: {sum(u.get('rating', 0) for u in users) / len(users) if users else 0:.2f}
 
 Top Skills:
@@ -962,82 +951,109 @@ Top Users (by swaps):
     
     # Batch Accept Requests
     if st.button("✅ Accept All Pending", use_container_width=True, key="accept_all"):
-        count = 0
-        for req in requests:
-            if req["status"] == "Pending":
-                req["status"] = "Accepted"
-                req["updated_at"] = datetime.datetime.utcnow().isoformat()
-                count += 1
+        def accept_all(d):
+            events = []
+            for req in d["requests"]:
+                if req["status"] == "Pending":
+                    set_status(d, req, "Accepted")
+                    mark_active(d, req["receiver_id"], req["updated_at"])
+                    events.append(make_event(REQUEST_ACCEPTED, req["receiver_id"], req["id"], req["updated_at"]))
+            process_events(d, events)
+            return len(events)
+        
+        count = sum(1 for r in data.peek("requests", []) if r["status"] == "Pending")
         if count > 0:
-            data["requests"] = requests
-            write_data(data)
-            st.success(f"✅ Accepted {count} requests!")
-            time.sleep(1)
-            st.rerun()
+            commit(accept_all, f"✅ Accepted {count} requests!")
         else:
             st.info("No pending requests")
     
     # Batch Complete Requests
     if st.button("🎉 Complete All Accepted", use_container_width=True, key="complete_all"):
-        count = 0
-        for req in requests:
-            if req["status"] == "Accepted":
-                req["status"] = "Completed"
-                req["updated_at"] = datetime.datetime.utcnow().isoformat()
-                # Award XP
-                sender = next((u for u in users if u["id"] == req["sender_id"]), None)
-                receiver = next((u for u in users if u["id"] == req["receiver_id"]), None)
-                if sender:
-                    sender["swaps_completed"] = sender.get("swaps_completed", 0) + 1
-                    sender["experience_points"] = sender.get("experience_points", 0) + 50
-                if receiver:
-                    receiver["swaps_completed"] = receiver.get("swaps_completed", 0) + 1
-                    receiver["experience_points"] = receiver.get("experience_points", 0) + 50
-                count += 1
+        def complete_all(d):
+            events = []
+            for req in d["requests"]:
+                if req["status"] == "Accepted":
+                    set_status(d, req, "Completed")
+                    mark_active(d, req["sender_id"], req["updated_at"])
+                    mark_active(d, req["receiver_id"], req["updated_at"])
+                    # Award XP, badges and levels to both sides
+                    events.append(make_event(SWAP_COMPLETED, req["sender_id"], req["id"], req["updated_at"]))
+                    events.append(make_event(SWAP_COMPLETED, req["receiver_id"], req["id"], req["updated_at"]))
+            process_events(d, events)
+            return len(events) // 2
+        
+        count = sum(1 for r in data.peek("requests", []) if r["status"] == "Accepted")
         if count > 0:
-            data["requests"] = requests
-            data["users"] = users
-            write_data(data)
-            st.success(f"🎉 Completed {count} swaps!")
-            time.sleep(1)
-            st.rerun()
+            commit(complete_all, f"🎉 Completed {count} swaps!")
         else:
             st.info("No accepted requests")
     
     # Calculate All Matches
-    if st.button("🔍 Calculate Matches", use_container_width=True, key="calc_matches"):
+    if st.button("🔍 Calculate Matches", use_container_width=True, key="calc_matches",
+                 disabled="matches" in st.session_state.jobs):
         if len(users) >= 2:
-            st.info(f"Analyzing {len(users)} users...")
-            # This would trigger match calculation in Discover mode
-            st.success("✅ Ready to discover!")
+            def find_circles(view):
+                result = compute_cycles(view.peek("users", []))
+                def save(d):
+                    d["swap_cycles"] = result
+                    return len(result["cycles"])
+                return save
+            run_job("matches", find_circles, lambda n: f"✅ Found {n} swap circles. Ready to discover!")
         else:
             st.warning("Need at least 2 users")
     
+    # Pairing Round
+    if st.button("🎯 Run Pairing Round", use_container_width=True, key="pairing_round",
+                 disabled="pairing" in st.session_state.jobs):
+        def pair_users(view):
+            created = run_pairing_round(view)
+            return lambda d: [req for req in created if add_request(d, req)]
+        run_job("pairing", pair_users, lambda created: (
+            f"🎯 Paired {len(created) * 2} users into {len(created)} swap requests!" if created
+            else "No compatible pairs among available users"))
+    
     # Export Full JSON
     if st.button("💾 Export Full Data", use_container_width=True, key="export_json"):
+        # Read back through the store, so binary and partitioned data export as one JSON document
+        store_writer().sync()
         st.download_button(
             "⬇️ Download data.json",
-            DATA_FILE.read_bytes() if DATA_FILE.exists() else b"{}",
+            json.dumps(open_store().load(), indent=2),
             file_name=f"skillswap_{datetime.datetime.now().strftime('%Y%m%d')}.json",
             use_container_width=True
         )
     
-    # Clear Completed
-    if st.button("🧹 Clear Completed", use_container_width=True, key="clear_completed"):
-        count = len([r for r in requests if r["status"] == "Completed"])
-        data["requests"] = [r for r in requests if r["status"] != "Completed"]
-        write_data(data)
-        st.success(f"🧹 Cleared {count} completed requests")
-        time.sleep(1)
-        st.rerun()
+    # Incremental Snapshot
+    if st.button("📸 Snapshot Data", use_container_width=True, key="snapshot"):
+        store_writer().sync()
+        snapshot = create_snapshot(store_writer().read())
+        st.success(
+            f"Snapshot {snapshot['id']}: {snapshot['chunks_new']} new chunks, "
+            f"{snapshot['chunks_reused']} unchanged ({snapshot['bytes_written'] / 1024:.0f} KB written)"
+        )
+    
+    # Backfill Achievements
+    if st.button("🏅 Backfill Achievements", use_container_width=True, key="backfill"):
+        commit(backfill, lambda awarded: f"🏅 Awarded {len(awarded)} achievements")
+    
+    # Archive History
+    if st.button("📦 Archive History", use_container_width=True, key="archive_history"):
+        # Segments are on disk before the commit that drops the requests from the hot file
+        old = archivable(data)
+        if old:
+            segments = write_segments(old)
+            commit(lambda d: register_segments(d, segments), f"📦 Archived {len(old)} finished requests")
+        else:
+            st.info(f"Nothing finished more than {ARCHIVE_AFTER_DAYS} days ago")
     
     # Reset All Data
     if st.button("🗑️ Reset All Data", use_container_width=True, key="reset"):
-        write_data({"users": [], "requests": [], "messages": [], "endorsements": [], "achievements": []})
+        def reset(d):
+            d.clear()
+            d.update(empty_data())
+        
         st.session_state.current_user = None
-        st.success("✅ Reset complete!")
-        time.sleep(1)
-        st.rerun()
+        commit(reset, "✅ Reset complete!")
     
     st.markdown("</div>", unsafe_allow_html=True)  # Close scrollable container
     
@@ -1045,12 +1061,26 @@ Top Users (by swaps):
     st.markdown(f"""
         <div class='muted' style='text-align:center'>
             <div>👥 {len(users)} Users</div>
-            <div>📬 {len(requests)} Requests</div>
-            <div>✅ {len([r for r in requests if r['status'] == 'Completed'])} Completed</div>
+            <div>📬 {len(data.peek("requests", []))} Requests</div>
+            <div>✅ {status_count(data, 'Completed')} Completed</div>
             <div style='margin-top:12px;font-size:11px'>v2.0 Engineering Edition</div>
         </div>
     """, unsafe_allow_html=True)
 
+# ---------------- Notifications ----------------
+for name, (future, message) in list(st.session_state.jobs.items()):
+    if not future.done():
+        st.info(f"⏳ {name.capitalize()} is running in the background; results appear on your next action.")
+        continue
+    del st.session_state.jobs[name]
+    if future.exception() is not None:
+        st.error(f"{name.capitalize()} failed: {future.exception()}")
+    else:
+        st.session_state.notifications.append(message(future.result()))
+for message in st.session_state.notifications:
+    st.toast(message)
+st.session_state.notifications = []
+
 # ---------------- Header ----------------
 st.markdown("""
     <div class='ultra-header'>
@@ -1075,7 +1105,7 @@ if mode == "🏠 Dashboard":
         """, unsafe_allow_html=True)
     
     with col2:
-        total_skills = sum(len(u["skills_offered"]) for u in users)
+        total_skills = total_offered(data)
         st.markdown(f"""
             <div class='stat-card'>
                 <div class='stat-number'>{total_skills}</div>
@@ -1084,7 +1114,7 @@ if mode == "🏠 Dashboard":
         """, unsafe_allow_html=True)
     
     with col3:
-        pending = len([r for r in requests if r["status"] == "Pending"])
+        pending = stats_columns().counts("requests.status").get("Pending", 0)
         st.markdown(f"""
             <div class='stat-card'>
                 <div class='stat-number'>{pending}</div>
@@ -1093,7 +1123,7 @@ if mode == "🏠 Dashboard":
         """, unsafe_allow_html=True)
     
     with col4:
-        completed = len([r for r in requests if r["status"] == "Completed"])
+        completed = status_count(data, "Completed")
         st.markdown(f"""
             <div class='stat-card'>
                 <div class='stat-number'>{completed}</div>
@@ -1107,26 +1137,27 @@ if mode == "🏠 Dashboard":
     
     with col1:
         st.markdown("### 🌟 Top Contributors")
-        top = sorted(users, key=lambda u: u.get("swaps_completed", 0), reverse=True)[:5]
-        for idx, user in enumerate(top, 1):
+        stats = stats_columns()
+        for idx, row in enumerate(stats.top_rows(["swaps_completed"], 5), 1):
+            name = stats.text("name", row)
             st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
             cols = st.columns([1, 5, 2])
             with cols[0]:
                 st.markdown(f"<div style='font-size:32px;font-weight:900;color:var(--primary)'>#{idx}</div>", unsafe_allow_html=True)
             with cols[1]:
-                st.markdown(f"### {user['name']}")
-                st.markdown(f"<div class='muted'>{user.get('swaps_completed', 0)} swaps • ⭐ {user.get('rating', 0):.1f} • Level {user.get('level', 1)}</div>", unsafe_allow_html=True)
+                st.markdown(f"### {name}")
+                st.markdown(f"<div class='muted'>{stats.column('swaps_completed')[row]} swaps • ⭐ {stats.column('rating')[row]:.1f} • Level {stats.column('level')[row]}</div>", unsafe_allow_html=True)
             with cols[2]:
-                st.markdown(avatar_html(user['name']), unsafe_allow_html=True)
+                st.markdown(avatar_html(name), unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
         st.markdown("### 📈 Recent Activity")
-        recent = sorted(requests, key=lambda r: r["created_at"], reverse=True)[:5]
+        recent = heapq.nlargest(5, data.peek("requests", []), key=lambda r: r["created_at"])
         if recent:
             for req in recent:
-                sender = next((u for u in users if u["id"] == req["sender_id"]), None)
-                receiver = next((u for u in users if u["id"] == req["receiver_id"]), None)
+                sender = find_record(data, "users", req["sender_id"])
+                receiver = find_record(data, "users", req["receiver_id"])
                 if sender and receiver:
                     st.markdown(f"""
                         <div class='glass-card'>
@@ -1185,13 +1216,7 @@ elif mode == "✨ Create Profile":
                 
                 new_user = make_user(name, email, bio, offered_list, wanted_list, proficiency, location, interest_list)
                 new_user["availability"] = availability
-                users.append(new_user)
-                data["users"] = users
-                write_data(data)
-                
-                st.success("🎉 Profile created successfully!")
-                time.sleep(2)
-                st.rerun()
+                commit(lambda d: add_user(d, new_user), "🎉 Profile created successfully!")
 
 elif mode == "👤 My Profile":
     st.markdown("## 👤 Your Profile")
@@ -1239,19 +1264,57 @@ elif mode == "👤 My Profile":
                 skills_html = " ".join([skill_badge_html(s, prof.get(s, ""), False) for s in user["skills_offered"]])
                 st.markdown(skills_html or "<span class='muted'>None</span>", unsafe_allow_html=True)
                 
+                endorsed = user.get("endorsements_by_skill", {})
+                if endorsed:
+                    st.markdown("<div class='muted'>" + " • ".join([f"👍 {s} ×{n}" for s, n in sorted(endorsed.items(), key=lambda x: x[1], reverse=True)]) + "</div>", unsafe_allow_html=True)
+                
                 st.markdown("### 🎯 Skills Wanted")
                 wants_html = " ".join([skill_badge_html(s, "", True) for s in user["skills_wanted"]])
                 st.markdown(wants_html or "<span class='muted'>None</span>", unsafe_allow_html=True)
+                
+                endorser = st.session_state.current_user
+                if endorser and endorser["id"] != user["id"] and user["skills_offered"]:
+                    st.markdown("### 👍 Endorse a Skill")
+                    ecol1, ecol2 = st.columns([3, 1])
+                    with ecol1:
+                        endorse_skill = st.selectbox("Skill", user["skills_offered"], key="endorse_skill", label_visibility="collapsed")
+                    with ecol2:
+                        already = has_endorsed(data, endorser["id"], user["id"], endorse_skill)
+                        if st.button("✅ Endorsed" if already else "👍 Endorse", key="endorse", disabled=already):
+                            def endorse(d, endorser_id=endorser["id"], endorsee_id=user["id"], skill=endorse_skill):
+                                mark_active(d, endorser_id)
+                                by_id = {u["id"]: u for u in d["users"]}
+                                endorsement = add_endorsement(d, by_id[endorser_id], by_id[endorsee_id], skill)
+                                if endorsement:
+                                    process_events(d, [make_event(ENDORSEMENT_RECEIVED, endorsee_id, endorsement["id"])], by_id)
+                                return endorsement
+                            
+                            commit(endorse, f"👍 Endorsed {user['name']} for {endorse_skill}!")
             
             st.markdown("<br>", unsafe_allow_html=True)
             
+            with st.expander("✏️ Edit Skills & Location"):
+                with st.form("edit_profile"):
+                    edit_location = st.text_input("📍 Location", value=user.get("location", ""))
+                    edit_offered = st.text_input("🎓 Skills Offered", value=", ".join(user["skills_offered"]))
+                    edit_wanted = st.text_input("🎯 Skills Wanted", value=", ".join(user["skills_wanted"]))
+                    if st.form_submit_button("💾 Save Changes", use_container_width=True):
+                        offered_list = [s.strip().lower() for s in edit_offered.split(",") if s.strip()]
+                        if not offered_list:
+                            st.error("❌ Add at least one skill!")
+                        else:
+                            changes = {
+                                "location": edit_location.strip(),
+                                "skills_offered": offered_list,
+                                "skills_wanted": [s.strip().lower() for s in edit_wanted.split(",") if s.strip()],
+                                "proficiency": {s: user.get("proficiency", {}).get(s, "Beginner") for s in offered_list},
+                                "last_active": datetime.datetime.utcnow().isoformat(),
+                            }
+                            commit(lambda d, user_id=user["id"], changes=changes: update_user(d, user_id, changes), "✅ Profile updated!")
+            
             if st.button("🗑️ Delete Profile", key="del_profile"):
-                data["users"] = [u for u in users if u["id"] != user["id"]]
-                data["requests"] = [r for r in requests if r["sender_id"] != user["id"] and r["receiver_id"] != user["id"]]
-                write_data(data)
-                st.success("✅ Deleted!")
-                time.sleep(1)
-                st.rerun()
+                # Requests, endorsements, achievements and swap circles go with the profile
+                commit(lambda d, user_id=user["id"]: delete_user(d, user_id), f"✅ Deleted {user['name']} and their activity")
 
 elif mode == "🔍 Discover":
     st.markdown("## 🔍 Discover Perfect Matches")
@@ -1268,30 +1331,94 @@ elif mode == "🔍 Discover":
         with col3:
             min_score = st.slider("Min Score", 0, 100, 40)
         
+        approximate = st.toggle("⚡ Approximate matching", value=False,
+                                help="Score only LSH bucket neighbours instead of every user")
+        near_me = st.toggle("📍 Near me", value=False,
+                            help="Only consider users in the same city as your profile")
+        demand_ranked = st.toggle("📈 Favour scarce skills", value=False,
+                                  help="Rank partners higher when they teach skills that are wanted more than offered")
+        if approximate:
+            st.warning("Approximate matching misses some of the best partners: on 5,000 synthetic users it "
+                       "finds about 95% of the exact top 10 with every band probed, about 90% with 20, "
+                       "and fewer on larger platforms.")
+            probes = st.slider("Recall ↔ Speed (bands probed)", 1, BANDS, BANDS)
+        
+        fcol1, fcol2, fcol3 = st.columns([2, 1, 2])
+        with fcol1:
+            availability = st.multiselect("⏰ Availability", AVAILABILITY, default=AVAILABILITY)
+        with fcol2:
+            active_days = st.selectbox("🕒 Active within", [None] + ACTIVITY_DAYS,
+                                       format_func=lambda d: "Any time" if d is None else f"{d} days")
+        with fcol3:
+            rating_floor = st.select_slider("⭐ Min rating", RATING_FLOORS, value=0.0)
+        
         if my_profile != "Select...":
             me = next(u for u in users if u["name"] == my_profile)
             candidates = []
             
-            for other in users:
-                if other["id"] == me["id"]:
-                    continue
-                
-                if search:
-                    combined = " ".join(other["skills_offered"] + other["skills_wanted"])
-                    if search.lower() not in combined:
-                        continue
-                
-                score, details = compatibility_score(me, other)
+            # Pre-filters run on bitmaps, most selective first; only survivors are scored
+            bitmaps = filter_index().sync(users)
+            stages = []
+            if approximate:
+                index = match_index()
+                index.sync(users)
+                stages.append(("LSH neighbours", bitmaps.of_ids(index.candidates(me, probes))))
+            if near_me:
+                if not user_location(me):
+                    st.warning("Add a location to your profile to use Near me")
+                stages.append((f"Near {location_label(user_location(me))}", bitmaps.of_ids(users_near(data, me))))
+            if set(availability) != set(AVAILABILITY):
+                stages.append(("Availability: " + ", ".join(availability or ["none"]), bitmaps.availability(availability)))
+            if active_days:
+                stages.append((f"Active within {active_days} days", bitmaps.active_within(active_days)))
+            terms = [t.strip().lower() for t in search.split(",") if t.strip()]
+            if terms:
+                stages.append(("Skills: " + ", ".join(terms), bitmaps.skill_terms(terms)))
+            if rating_floor:
+                stages.append((f"Rating ≥ {rating_floor:g}", bitmaps.rating_at_least(rating_floor)))
+            pool, stage_counts = run_pipeline(bitmaps, stages, exclude=me["id"])
+            
+            for other in pool:
+                score, details = score_cache().score(me, other, settled)
                 if score >= min_score:
                     candidates.append((other, score, details))
             
-            candidates.sort(key=lambda x: x[1], reverse=True)
+            st.caption(" → ".join(f"{label}: {n:,}" for label, n in stage_counts) + f" → Score ≥ {min_score}: {len(candidates):,}")
+            
+            if demand_ranked:
+                wants = set(me["skills_wanted"])
+                candidates.sort(key=lambda x: x[1] * demand_weight(data, wants.intersection(x[0]["skills_offered"])), reverse=True)
+            else:
+                candidates.sort(key=lambda x: x[1], reverse=True)
+            cache_stats = score_cache().stats()
+            st.caption(f"Score cache: {cache_stats['hit_rate']:.0%} hits · {cache_stats['entries']:,} pairs (~{cache_stats['approx_mb']} MB) · {cache_stats['evictions']:,} evicted")
+            
+            circles = cycles_for_user(data, me["id"])
+            if circles:
+                st.markdown("### 🔄 Swap Circles")
+                st.markdown("<div class='muted'>Multi-party swaps where everyone teaches the next person, scored by the average match score of each teacher and learner</div>", unsafe_allow_html=True)
+                for circle in circles:
+                    steps = []
+                    for i, user_id in enumerate(circle["users"]):
+                        teacher = (find_record(data, "users", user_id) or {}).get("name", "Unknown")
+                        learner = (find_record(data, "users", circle["users"][(i + 1) % len(circle["users"])]) or {}).get("name", "Unknown")
+                        steps.append(f"<strong>{teacher}</strong> teaches {learner} <em>{circle['skills'][i]}</em>")
+                    st.markdown(f"""
+                        <div class='glass-card'>
+                            <div style='display:flex;justify-content:space-between;align-items:center'>
+                                <div>{' → '.join(steps)}</div>
+                                <div class='compat-score' style='font-size:32px'>{circle['score']}</div>
+                            </div>
+                        </div>
+                    """, unsafe_allow_html=True)
+                st.markdown("<br>", unsafe_allow_html=True)
             
             if not candidates:
                 st.info("🔍 No matches found. Try adjusting filters!")
             else:
                 st.markdown(f"<div class='muted'>Found {len(candidates)} matches</div>", unsafe_allow_html=True)
                 st.markdown("<br>", unsafe_allow_html=True)
+                already = requested(data, me["id"], [other["id"] for other, _, _ in candidates])
                 
                 for other, score, details in candidates:
                     st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
@@ -1310,32 +1437,43 @@ elif mode == "🔍 Discover":
                     
                     with col3:
                         st.markdown(compat_display_html(score, details), unsafe_allow_html=True)
-                        if st.button("🤝 Request Swap", key=f"req_{other['id']}"):
+                        if other["id"] in already:
+                            st.markdown("<span class='skill-badge'>📨 Already requested</span>", unsafe_allow_html=True)
+                        elif st.button("🤝 Request Swap", key=f"req_{other['id']}"):
                             skill_offered = (me.get("skills_offered") or [""])[0]
                             skill_wanted = (other.get("skills_offered") or [""])[0]
                             new_req = make_request(me["id"], other["id"], skill_offered, skill_wanted, f"Hi, let's swap!", "High")
-                            requests.append(new_req)
-                            data["requests"] = requests
-                            write_data(data)
-                            st.success("✅ Request sent!")
-                            time.sleep(1)
-                            st.rerun()
+                            # A double click finds the first request in the index and adds nothing
+                            def send(d, req=new_req):
+                                mark_active(d, req["sender_id"], req["created_at"])
+                                return add_request(d, req)
+                            
+                            commit(send, "✅ Request sent!")
                     
                     st.markdown("</div>", unsafe_allow_html=True)
 
 elif mode == "📬 Requests":
     st.markdown("## 📬 Swap Requests")
     
-    if not requests:
-        st.info("No requests yet!")
+    me = st.session_state.current_user
+    if not me:
+        st.info("Select your profile in the sidebar to see your requests")
     else:
-        tabs = st.tabs(["📥 Received", "📤 Sent", "✅ Completed"])
+        # Each tab reads one page of this user's mailbox index; counts are list lengths
+        open_or_rejected = ["Pending", "Accepted", "Rejected"]
+        completed_lanes = [("in", "Completed"), ("out", "Completed")]
+        tabs = st.tabs([
+            f"📥 Received ({mailbox_count(data, me['id'], 'in', open_or_rejected)})",
+            f"📤 Sent ({mailbox_count(data, me['id'], 'out', open_or_rejected)})",
+            f"✅ Completed ({mailbox_count(data, me['id'], 'in', ['Completed']) + mailbox_count(data, me['id'], 'out', ['Completed'])})",
+        ])
         
         with tabs[0]:
-            received = [r for r in requests if st.session_state.current_user and r["receiver_id"] == st.session_state.current_user["id"]]
-            if received:
-                for req in received:
-                    sender = next((u for u in users if u["id"] == req["sender_id"]), None)
+            name = f"in_{me['id']}"
+            page, next_cursor = mailbox_page(data, me["id"], [("in", s) for s in open_or_rejected], current_cursor(name))
+            if page:
+                for req in page_requests(page):
+                    sender = find_record(data, "users", req["sender_id"])
                     if sender:
                         st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
                         col1, col2 = st.columns([3, 1])
@@ -1346,66 +1484,125 @@ elif mode == "📬 Requests":
                         with col2:
                             if req["status"] == "Pending":
                                 if st.button("✅ Accept", key=f"acc_{req['id']}"):
-                                    req["status"] = "Accepted"
-                                    data["requests"] = requests
-                                    write_data(data)
-                                    st.rerun()
+                                    def accept(d, request_id=req["id"]):
+                                        r = find_request(d, request_id)
+                                        if r["status"] != "Pending":
+                                            return
+                                        set_status(d, r, "Accepted")
+                                        mark_active(d, r["receiver_id"], r["updated_at"])
+                                        process_events(d, [make_event(REQUEST_ACCEPTED, r["receiver_id"], r["id"], r["updated_at"])])
+                                    
+                                    commit(accept, f"✅ Accepted {sender['name']}'s request")
                                 if st.button("❌ Reject", key=f"rej_{req['id']}"):
-                                    req["status"] = "Rejected"
-                                    data["requests"] = requests
-                                    write_data(data)
-                                    st.rerun()
+                                    def reject(d, request_id=req["id"]):
+                                        r = find_request(d, request_id)
+                                        if r["status"] != "Pending":
+                                            return
+                                        set_status(d, r, "Rejected")
+                                        mark_active(d, r["receiver_id"], r["updated_at"])
+                                    
+                                    commit(reject, f"❌ Rejected {sender['name']}'s request")
                         st.markdown("</div>", unsafe_allow_html=True)
+                page_controls(name, next_cursor)
             else:
                 st.info("No received requests")
         
         with tabs[1]:
-            sent = [r for r in requests if st.session_state.current_user and r["sender_id"] == st.session_state.current_user["id"]]
-            if sent:
-                for req in sent:
-                    receiver = next((u for u in users if u["id"] == req["receiver_id"]), None)
+            name = f"out_{me['id']}"
+            page, next_cursor = mailbox_page(data, me["id"], [("out", s) for s in open_or_rejected], current_cursor(name))
+            if page:
+                for req in page_requests(page):
+                    receiver = find_record(data, "users", req["receiver_id"])
                     if receiver:
                         st.markdown(f"**To:** {receiver['name']} | {status_badge_html(req['status'])}", unsafe_allow_html=True)
+                page_controls(name, next_cursor)
             else:
                 st.info("No sent requests")
         
         with tabs[2]:
-            completed = [r for r in requests if r["status"] == "Completed"]
-            if completed:
-                for req in completed:
-                    sender = next((u for u in users if u["id"] == req["sender_id"]), None)
-                    receiver = next((u for u in users if u["id"] == req["receiver_id"]), None)
+            name = f"done_{me['id']}"
+            page, next_cursor = mailbox_page(data, me["id"], completed_lanes, current_cursor(name))
+            for req in page_requests(page):
+                sender = find_record(data, "users", req["sender_id"])
+                receiver = find_record(data, "users", req["receiver_id"])
+                if sender and receiver:
+                    st.markdown(f"**{sender['name']}** ↔️ **{receiver['name']}** | {req.get('skill_offered', '')} ↔️ {req.get('skill_wanted', '')}", unsafe_allow_html=True)
+            if page:
+                page_controls(name, next_cursor)
+            elif not data.peek("archive", {}).get("segments"):
+                st.info("No completed swaps")
+            
+            # Older swaps are read from the archive one page at a time
+            if data.peek("archive", {}).get("segments") and st.toggle("📦 Show archived swaps", key="show_archive"):
+                archived = archived_page(data, "Completed", me["id"], page=st.session_state.archive_page, per_page=ARCHIVE_PAGE_SIZE)
+                for req in archived:
+                    sender = find_record(data, "users", req["sender_id"])
+                    receiver = find_record(data, "users", req["receiver_id"])
                     if sender and receiver:
                         st.markdown(f"**{sender['name']}** ↔️ **{receiver['name']}** | {req.get('skill_offered', '')} ↔️ {req.get('skill_wanted', '')}", unsafe_allow_html=True)
-            else:
-                st.info("No completed swaps")
+                if not archived:
+                    st.caption("No archived swaps")
+                st.caption(f"📦 Archived swaps, page {st.session_state.archive_page + 1}")
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("⬅️ Newer", disabled=st.session_state.archive_page == 0, key="archive_newer"):
+                        st.session_state.archive_page -= 1
+                        st.rerun()
+                with col2:
+                    if st.button("Older ➡️", disabled=len(archived) < ARCHIVE_PAGE_SIZE, key="archive_older"):
+                        st.session_state.archive_page += 1
+                        st.rerun()
 
 elif mode == "📊 Analytics":
     st.markdown("## 📊 Platform Analytics")
     
     if users:
-        # Skills distribution
-        all_skills = {}
-        for u in users:
-            for s in u.get("skills_offered", []):
-                all_skills[s] = all_skills.get(s, 0) + 1
-        
-        if all_skills:
+        # Skills distribution, read from the skill market index
+        top_skills = most_offered(data, 10)
+        if top_skills:
             st.markdown("### 🎓 Most Offered Skills")
-            top_skills = sorted(all_skills.items(), key=lambda x: x[1], reverse=True)[:10]
             for skill, count in top_skills:
                 st.markdown(f"**{skill.capitalize()}**: {count} users")
         
-        # Location distribution
-        locations = {}
-        for u in users:
-            loc = u.get("location", "Unknown")
-            locations[loc] = locations.get(loc, 0) + 1
+        st.markdown("### 🕳️ Skill Gaps")
+        st.markdown("<div class='muted'>Skills wanted by more users than offer them</div>", unsafe_allow_html=True)
+        gap_location = st.selectbox("Location", [None] + market_locations(data), key="gap_location",
+                                    format_func=lambda loc: "All locations" if loc is None else location_label(loc))
+        gaps = skill_gaps(data, 15, gap_location)
+        if gaps:
+            st.dataframe(pd.DataFrame(gaps).rename(columns=str.capitalize), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No undersupplied skills")
+        
+        # Location distribution, by canonical location
+        locations = location_counts(data)
         
         if locations:
             st.markdown("### 📍 User Locations")
-            for loc, count in sorted(locations.items(), key=lambda x: x[1], reverse=True):
+            for loc, count in locations.items():
                 st.markdown(f"**{loc}**: {count} users")
+        
+        # Request trends, read from the rollups rather than the requests
+        st.markdown("### 📈 Request Trends")
+        grain = st.radio("Granularity", ["daily", "hourly"], horizontal=True, format_func=str.capitalize)
+        end = datetime.datetime.utcnow()
+        start = end - datetime.timedelta(days=TREND_DAYS if grain == "daily" else HOURLY_DAYS)
+        st.line_chart(pd.DataFrame(series(data, grain, start, end)).set_index("bucket"))
+        
+        st.markdown(f"### ⏱️ Time to Accept & Complete (last {TREND_DAYS} days)")
+        labels = bin_labels()
+        cols = st.columns(len(LATENCY_EVENTS))
+        for col, event in zip(cols, LATENCY_EVENTS):
+            hist = latency_histogram(data, event, end - datetime.timedelta(days=TREND_DAYS), end)
+            with col:
+                if not sum(hist):
+                    st.markdown(f"**{event.capitalize()}**: no data yet")
+                    continue
+                median, p90 = [percentile_hours(hist, q) for q in (0.5, 0.9)]
+                shown = [labels[-1] if h == float("inf") else f"≤ {h:g}h" for h in (median, p90)]
+                st.markdown(f"**{event.capitalize()}** · median {shown[0]} · p90 {shown[1]}")
+                for label, n in zip(labels, hist):
+                    st.progress(n / max(hist), text=f"{label}: {n}")
     else:
         st.info("No data yet!")
 
@@ -1413,18 +1610,18 @@ elif mode == "🎖️ Leaderboard":
     st.markdown("## 🎖️ Top Performers")
     
     if users:
-        sorted_users = sorted(users, key=lambda u: (u.get("swaps_completed", 0), u.get("rating", 0)), reverse=True)
+        stats = stats_columns()
         
-        for idx, user in enumerate(sorted_users[:10], 1):
+        for idx, row in enumerate(stats.top_rows(["swaps_completed", "rating"], 10), 1):
             medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"#{idx}"
             st.markdown(f"""
                 <div class='glass-card'>
-                    <h2>{medal} {user['name']}</h2>
+                    <h2>{medal} {stats.text('name', row)}</h2>
                     <div class='muted'>
-                        ⭐ {user.get('rating', 0):.1f} | 
-                        {user.get('swaps_completed', 0)} swaps | 
-                        Level {user.get('level', 1)} | 
-                        {user.get('experience_points', 0)} XP
+                        ⭐ {stats.column('rating')[row]:.1f} | 
+                        {stats.column('swaps_completed')[row]} swaps | 
+                        Level {stats.column('level')[row]} | 
+                        {stats.column('experience_points')[row]} XP
                     </div>
                 </div>
             """, unsafe_allow_html=True)
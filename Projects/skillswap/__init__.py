@@ -0,0 +1,4 @@
+"""
+SkillSwap core — storage, models and matching shared by the Streamlit app
+and the offline batch jobs.
+"""
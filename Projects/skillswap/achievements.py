@@ -0,0 +1,155 @@
+"""
+Achievement & level engine — consumes domain events in batches and awards
+badges and level-ups to the users those events touched.
+"""
+
+import uuid, datetime, itertools
+from typing import List, Dict, Any, Optional
+
+from .archive import iter_archived
+from .store import add_record, own_record
+
+# ---------------- Events ----------------
+SWAP_COMPLETED = "swap_completed"
+ENDORSEMENT_RECEIVED = "endorsement_received"
+REQUEST_ACCEPTED = "request_accepted"
+
+# Counter increments each event applies to its user
+EVENT_EFFECTS = {
+    SWAP_COMPLETED: {"swaps_completed": 1, "experience_points": 50},
+    ENDORSEMENT_RECEIVED: {"experience_points": 10},
+    REQUEST_ACCEPTED: {"requests_accepted": 1},
+}
+
+# ---------------- Rules ----------------
+RULES = [
+    {"type": "first_swap", "badge": "🎉 First Swap", "stat": "swaps_completed", "threshold": 1},
+    {"type": "5_swaps", "badge": "⭐ Active Learner", "stat": "swaps_completed", "threshold": 5},
+    {"type": "10_swaps", "badge": "🏆 Expert Swapper", "stat": "swaps_completed", "threshold": 10},
+    {"type": "first_endorsement", "badge": "👍 Endorsed", "stat": "endorsements_received", "threshold": 1},
+    {"type": "10_endorsements", "badge": "🌟 Trusted Mentor", "stat": "endorsements_received", "threshold": 10},
+    {"type": "first_accept", "badge": "🤝 Open Door", "stat": "requests_accepted", "threshold": 1},
+]
+RULES_BY_STAT: Dict[str, List[Dict[str, Any]]] = {}
+for _rule in RULES:
+    RULES_BY_STAT.setdefault(_rule["stat"], []).append(_rule)
+
+EVENT_STATS = {
+    SWAP_COMPLETED: ["swaps_completed"],
+    ENDORSEMENT_RECEIVED: ["endorsements_received"],
+    REQUEST_ACCEPTED: ["requests_accepted"],
+}
+
+XP_PER_LEVEL = 100
+
+def level_for_xp(xp: int) -> int:
+    return xp // XP_PER_LEVEL + 1
+
+def make_event(event_type: str, user_id: str, ref_id: str = "", timestamp: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "type": event_type,
+        "user_id": user_id,
+        "ref_id": ref_id,
+        "timestamp": timestamp or datetime.datetime.utcnow().isoformat()
+    }
+
+# ---------------- Engine ----------------
+def _award(data: Dict[str, Any], user: Dict[str, Any], achievement_type: str, timestamp: str) -> Dict[str, Any]:
+    achievement = {
+        "id": str(uuid.uuid4()),
+        "user_id": user["id"],
+        "type": achievement_type,
+        "timestamp": timestamp
+    }
+    add_record(data, "achievements", achievement)
+    own_record(data, user["id"], "achievements", achievement["id"])
+    return achievement
+
+def _evaluate(data: Dict[str, Any], user: Dict[str, Any], stats: set, timestamp: str) -> List[Dict[str, Any]]:
+    awarded = []
+    badges = user.setdefault("badges", [])
+    for stat in stats:
+        value = user.get(stat, 0)
+        for rule in RULES_BY_STAT.get(stat, []):
+            if value >= rule["threshold"] and rule["badge"] not in badges:
+                badges.append(rule["badge"])
+                awarded.append(_award(data, user, rule["type"], timestamp))
+    
+    # Every level passed gets its achievement, however many levels one batch jumps
+    level = level_for_xp(user.get("experience_points", 0))
+    for reached in range(user.get("level", 1) + 1, level + 1):
+        user["level"] = reached
+        awarded.append(_award(data, user, f"level_{reached}", timestamp))
+    return awarded
+
+def process_events(data: Dict[str, Any], events: List[Dict[str, Any]], 
+                   users_by_id: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    if not events:
+        return []
+    if users_by_id is None:
+        users_by_id = {u["id"]: u for u in data.get("users", [])}
+    
+    # Apply every event's effects first, then evaluate each touched user once
+    touched: Dict[str, set] = {}
+    last_seen: Dict[str, str] = {}
+    for event in events:
+        user = users_by_id.get(event["user_id"])
+        if not user:
+            continue
+        for stat, inc in EVENT_EFFECTS.get(event["type"], {}).items():
+            user[stat] = user.get(stat, 0) + inc
+        touched.setdefault(user["id"], set()).update(EVENT_STATS.get(event["type"], []))
+        last_seen[user["id"]] = event["timestamp"]
+    
+    awarded = []
+    for user_id, stats in touched.items():
+        awarded.extend(_evaluate(data, users_by_id[user_id], stats, last_seen[user_id]))
+    return awarded
+
+# ---------------- Backfill ----------------
+def history_events(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    events = []
+    for req in itertools.chain(data.get("requests", []), iter_archived(data)):
+        if req["status"] in ("Accepted", "Completed"):
+            events.append(make_event(REQUEST_ACCEPTED, req["receiver_id"], req["id"], req.get("updated_at")))
+        if req["status"] == "Completed":
+            events.append(make_event(SWAP_COMPLETED, req["sender_id"], req["id"], req.get("updated_at")))
+            events.append(make_event(SWAP_COMPLETED, req["receiver_id"], req["id"], req.get("updated_at")))
+    for e in data.get("endorsements", []):
+        events.append(make_event(ENDORSEMENT_RECEIVED, e["endorsee_id"], e["id"], e.get("created_at")))
+    events.sort(key=lambda e: e["timestamp"] or "")
+    return events
+
+def backfill(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Replays history into counters without double counting what is already recorded,
+    # then evaluates every rule for every user
+    users_by_id = {u["id"]: u for u in data.get("users", [])}
+    replayed: Dict[str, Dict[str, int]] = {}
+    for event in history_events(data):
+        stats = replayed.setdefault(event["user_id"], {})
+        for stat, inc in EVENT_EFFECTS.get(event["type"], {}).items():
+            stats[stat] = stats.get(stat, 0) + inc
+    for user_id, stats in replayed.items():
+        user = users_by_id.get(user_id)
+        if user:
+            for stat, value in stats.items():
+                user[stat] = max(user.get(stat, 0), value)
+    
+    now = datetime.datetime.utcnow().isoformat()
+    awarded = []
+    for user in users_by_id.values():
+        awarded.extend(_evaluate(data, user, set(RULES_BY_STAT), now))
+    return awarded
+
+if __name__ == "__main__":
+    import argparse
+    from .store import update_data
+    
+    parser = argparse.ArgumentParser(description="Award SkillSwap badges and levels")
+    parser.add_argument("--backfill", action="store_true", help="replay request and endorsement history")
+    args = parser.parse_args()
+    if args.backfill:
+        awarded = update_data(backfill)
+        print(f"Awarded {len(awarded)} achievements")
+    else:
+        parser.print_help()
@@ -0,0 +1,229 @@
+"""
+Request archive — completed and rejected requests older than a threshold
+move out of the hot data file into compressed segments, one per month and
+archival run, so the document every rerun loads stays small.
+
+Segments are written before the commit that drops the requests from the hot
+file, so a crash in between loses nothing. The data file keeps a small
+manifest of the segments with their per-status counts; platform totals come
+from the rollups, and history stays readable page by page, newest first.
+
+Each segment is a run of gzip blocks of BLOCK_RECORDS requests. The manifest
+records where every block starts and what it holds, so a page seeks straight
+to its block instead of decompressing everything before it, and keeps the
+segments each user appears in, so one user's history opens only those.
+
+Usage, from the Projects directory:
+    python -m skillswap.archive --days 30
+"""
+
+from pathlib import Path
+import datetime, gzip, io, itertools, json, os
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from .store import find_record, read_section, remove_records, temp_path
+from .swaps import unindex_request
+from .rollups import count_status
+
+# ---------------- Config ----------------
+ARCHIVE_DIR = Path("archive")
+ARCHIVE_AFTER_DAYS = 30
+TERMINAL = ["Completed", "Rejected"]
+BLOCK_RECORDS = 256     # requests per gzip block, the unit a page read starts from
+
+# ---------------- Manifest ----------------
+def archive_manifest(data: Dict[str, Any]) -> Dict[str, Any]:
+    return data.setdefault("archive", {"segments": [], "counts": {}, "users": {}})
+
+def archived_count(data: Dict[str, Any], status: str) -> int:
+    return read_section(data, "archive", {}).get("counts", {}).get(status, 0)
+
+def status_count(data: Dict[str, Any], status: str) -> int:
+    # Hot and archived together, kept in the rollups by every request change
+    return read_section(data, "rollups", {}).get("statuses", {}).get(status, 0)
+
+def _shown(counts: Dict[str, int], status: Optional[str]) -> int:
+    return counts.get(status, 0) if status else sum(counts.values())
+
+# ---------------- Writing ----------------
+def archivable(data: Dict[str, Any], days: int = ARCHIVE_AFTER_DAYS) -> List[Dict[str, Any]]:
+    cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat()
+    return [r for r in read_section(data, "requests", [])
+            if r["status"] in TERMINAL and (r.get("updated_at") or r.get("created_at", "")) <= cutoff]
+
+def write_segments(requests: List[Dict[str, Any]], root: Path = ARCHIVE_DIR) -> List[Dict[str, Any]]:
+    # One file per month of last update, newest record first, as gzip blocks
+    run = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    by_month: Dict[str, List[Dict[str, Any]]] = {}
+    for req in requests:
+        by_month.setdefault((req.get("updated_at") or req.get("created_at", ""))[:7] or "undated", []).append(req)
+
+    segments = []
+    for month, reqs in by_month.items():
+        reqs.sort(key=lambda r: r.get("updated_at") or r.get("created_at", ""), reverse=True)
+        path = root / month / f"{run}.jsonl.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = temp_path(path)
+        blocks = []
+        ids = {}
+        with open(tmp, "wb") as f:
+            for start in range(0, len(reqs), BLOCK_RECORDS):
+                block = reqs[start:start + BLOCK_RECORDS]
+                counts: Dict[str, int] = {}
+                for req in block:
+                    counts[req["status"]] = counts.get(req["status"], 0) + 1
+                    ids[req["id"]] = [req.get("version", 0), req["status"], len(blocks)]
+                blocks.append([f.tell(), len(block), counts])
+                with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+                    gz.write("".join(json.dumps(req) + "\n" for req in block).encode("utf-8"))
+        os.replace(tmp, path)
+        counts = {}
+        for req in reqs:
+            counts[req["status"]] = counts.get(req["status"], 0) + 1
+        segments.append({
+            "path": path.relative_to(root).as_posix(),
+            "month": month,
+            "newest": reqs[0].get("updated_at") or reqs[0].get("created_at", ""),
+            "ids": ids,
+            "counts": counts,
+            "blocks": blocks,
+        })
+    return segments
+
+def register_segments(data: Dict[str, Any], segments: List[Dict[str, Any]]) -> int:
+    # The mutation half: drops archived requests from the hot file. A request
+    # edited since it was written out stays hot, and its archived copy is skipped
+    manifest = archive_manifest(data)
+    users = manifest.setdefault("users", {})
+    moved = []
+    for seg in segments:
+        entry = {k: v for k, v in seg.items() if k != "ids"}
+        entry["counts"] = dict(seg["counts"])
+        entry["blocks"] = [[offset, lines, dict(counts)] for offset, lines, counts in seg["blocks"]]
+        entry["skip"] = []
+        parties = set()
+        for rec_id, (version, status, block) in seg["ids"].items():
+            req = find_record(data, "requests", rec_id)
+            if req is not None and req.get("version", 0) == version and req["status"] == status:
+                moved.append(rec_id)
+                parties.update((req["sender_id"], req["receiver_id"]))
+            else:
+                entry["skip"].append(rec_id)
+                entry["counts"][status] -= 1
+                entry["blocks"][block][2][status] -= 1
+        manifest["segments"].append(entry)
+        for status, n in entry["counts"].items():
+            manifest["counts"][status] = manifest["counts"].get(status, 0) + n
+        for user_id in parties:
+            users.setdefault(user_id, []).append(entry["path"])
+    manifest["segments"].sort(key=lambda s: s["newest"], reverse=True)
+    for req in remove_records(data, "requests", moved):
+        unindex_request(data, req)
+    return len(moved)
+
+def uncount_users(data: Dict[str, Any], user_ids: Iterable[str], root: Path = ARCHIVE_DIR) -> int:
+    # For purged users: their archived requests stay in the segments but leave the
+    # counts, and readers skip them. Only the segments they appear in are read.
+    # Returns how many requests were uncounted
+    manifest = archive_manifest(data)
+    already = set(manifest.get("purged_users", []))
+    purged = set(user_ids) - already
+    if not purged:
+        return 0
+    users = manifest.setdefault("users", {})
+    paths = set()
+    for user_id in purged:
+        paths.update(users.pop(user_id, []))
+    seen = set()
+    for seg in manifest["segments"]:
+        # Segments written before the per-user lists are read in full
+        if seg["path"] not in paths and "blocks" in seg:
+            continue
+        for block, req in _read_segment(seg, root):
+            parties = {req["sender_id"], req["receiver_id"]}
+            if req["id"] in seen or not parties & purged or parties & already:
+                continue
+            seen.add(req["id"])
+            seg["counts"][req["status"]] -= 1
+            manifest["counts"][req["status"]] -= 1
+            if "blocks" in seg:
+                seg["blocks"][block][2][req["status"]] -= 1
+            count_status(data, req["status"], -1)
+    manifest["purged_users"] = sorted(already | purged)
+    return len(seen)
+
+# ---------------- Reading ----------------
+def _read_segment(seg: Dict[str, Any], root: Path, start: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    # (block, request) from the start of the given block on; blocks follow each
+    # other as gzip members, so one stream reads on from wherever it starts
+    skip = set(seg.get("skip", []))
+    blocks = seg.get("blocks") or [[0, None, {}]]
+    with open(root / seg["path"], "rb") as raw:
+        raw.seek(blocks[start][0])
+        with io.TextIOWrapper(gzip.GzipFile(fileobj=raw, mode="rb"), encoding="utf-8") as f:
+            block, left = start, blocks[start][1]
+            for line in f:
+                while left == 0 and block + 1 < len(blocks):
+                    block += 1
+                    left = blocks[block][1]
+                if left is not None:
+                    left -= 1
+                req = json.loads(line)
+                if req["id"] not in skip:
+                    yield block, req
+
+def iter_archived(data: Dict[str, Any], status: Optional[str] = None, user_id: Optional[str] = None,
+                  root: Path = ARCHIVE_DIR, offset: int = 0) -> Iterator[Dict[str, Any]]:
+    # Newest segment first; segments are opened only as far as the caller reads.
+    # Without a user filter the first offset matches are skipped by their counts,
+    # starting at the block that holds the next one
+    archive = read_section(data, "archive", {})
+    purged = set(archive.get("purged_users", []))
+    mine = set(archive.get("users", {}).get(user_id, [])) if user_id else None
+    for seg in archive.get("segments", []):
+        if status and not seg["counts"].get(status):
+            continue
+        if mine is not None and seg["path"] not in mine and "blocks" in seg:
+            continue
+        start = 0
+        if offset and not user_id:
+            n = _shown(seg["counts"], status)
+            if offset >= n:
+                offset -= n
+                continue
+            for start, (_, _, counts) in enumerate(seg.get("blocks", [])):
+                n = _shown(counts, status)
+                if offset < n:
+                    break
+                offset -= n
+        for _, req in _read_segment(seg, root, start):
+            if status and req["status"] != status:
+                continue
+            if user_id and user_id not in (req["sender_id"], req["receiver_id"]):
+                continue
+            if purged and (req["sender_id"] in purged or req["receiver_id"] in purged):
+                continue
+            if offset:
+                offset -= 1
+                continue
+            yield req
+
+def archived_page(data: Dict[str, Any], status: Optional[str] = None, user_id: Optional[str] = None,
+                  page: int = 0, per_page: int = 20, root: Path = ARCHIVE_DIR) -> List[Dict[str, Any]]:
+    return list(itertools.islice(iter_archived(data, status, user_id, root, page * per_page), per_page))
+
+if __name__ == "__main__":
+    import argparse
+    from .store import read_data, update_data
+
+    parser = argparse.ArgumentParser(description="Move old completed and rejected requests into the archive")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive requests finished this many days ago")
+    args = parser.parse_args()
+
+    candidates = archivable(read_data(), args.days)
+    if not candidates:
+        print("Nothing to archive")
+    else:
+        segments = write_segments(candidates)
+        moved = update_data(lambda d: register_segments(d, segments))
+        print(f"Archived {moved} requests into {len(segments)} segments under {ARCHIVE_DIR}/")
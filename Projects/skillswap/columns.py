@@ -0,0 +1,207 @@
+"""
+Columnar stats snapshot — the numeric and categorical fields read by the
+Dashboard, Leaderboard and Analytics pages, laid out as packed arrays in one
+file that readers memory-map instead of loading the data document.
+
+The store rewrites the file after every commit. Readers map it read-only and
+cast each column straight onto the mapping, so nothing is parsed or copied
+and every process reading it shares the same page-cache pages. A replaced
+file stays valid for readers that still have the old one mapped. Edits the
+write-behind store has not flushed yet are read from columns it encodes in
+memory instead, so pages never show counts behind their own changes.
+
+Usage, from the Projects directory:
+    python -m skillswap.columns            # summary of the current snapshot
+    python -m skillswap.columns --rebuild  # regenerate it from the data file
+"""
+
+from pathlib import Path
+import collections, heapq, json, mmap, os, struct, sys, threading
+from typing import List, Dict, Any, Optional, Tuple
+
+# ---------------- Config ----------------
+COLUMNS_FILE = Path("columns.bin")
+MAGIC = b"SSCL"
+LAYOUT = 2      # 1 stored ids at a fixed width and no names
+ALIGN = 8
+
+# Packed numbers per user, with the default pages assume for a missing field
+USER_NUMBERS = {
+    "rating": ("d", 0.0),
+    "swaps_completed": ("q", 0),
+    "level": ("q", 1),
+    "experience_points": ("q", 0),
+    "response_rate": ("q", 100),
+}
+# Stored as UTF-8 bytes back to back plus an offsets column
+USER_STRINGS = ["id", "name"]
+# Stored as a code per row plus the list of distinct values
+USER_CATEGORIES = {"location": "Unknown", "availability": "Available"}
+REQUEST_CATEGORIES = {"status": "Pending", "priority": "Medium"}
+
+# ---------------- Encoding ----------------
+def _categorical(values: List[str]) -> Tuple[List[str], bytes]:
+    codes: Dict[str, int] = {}
+    packed = struct.pack(f"{len(values)}I", *[codes.setdefault(v, len(codes)) for v in values])
+    return list(codes), packed
+
+def _strings(values: List[str]) -> Tuple[bytes, bytes]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = [0]
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+    return b"".join(encoded), struct.pack(f"{len(offsets)}Q", *offsets)
+
+Encoded = Tuple[List[Tuple[str, str, bytes]], Dict[str, List[str]]]
+
+def _collection_columns(coll: str, records: List[Dict[str, Any]]) -> Encoded:
+    # (name, typecode, packed values) per column, and the labels of categorical ones
+    cols: List[Tuple[str, str, bytes]] = []
+    categories: Dict[str, List[str]] = {}
+    if coll == "users":
+        for name in USER_STRINGS:
+            text, offsets = _strings([u.get(name) or "" for u in records])
+            cols += [(name, "B", text), (f"{name}.offsets", "Q", offsets)]
+        for name, (typecode, default) in USER_NUMBERS.items():
+            cast = float if typecode == "d" else int
+            cols.append((name, typecode, struct.pack(f"{len(records)}{typecode}", *[cast(u.get(name) or default) for u in records])))
+    for name, default in (USER_CATEGORIES if coll == "users" else REQUEST_CATEGORIES).items():
+        labels, packed = _categorical([r.get(name) or default for r in records])
+        categories[f"{coll}.{name}"] = labels
+        cols.append((f"{coll}.{name}", "I", packed))
+    return cols, categories
+
+def encode_columns(data: Dict[str, Any], generation: int = 0,
+                   memo: Optional[Dict[str, Tuple[List[Dict[str, Any]], Encoded]]] = None) -> bytes:
+    # memo keeps each collection's columns keyed on its list object, for callers whose
+    # data is never changed in place, so only collections that were replaced are encoded
+    users = data.get("users", [])
+    requests = data.get("requests", [])
+    header: Dict[str, Any] = {"layout": LAYOUT, "generation": generation, "byteorder": sys.byteorder,
+                              "users": len(users), "requests": len(requests),
+                              "columns": {}, "categories": {}}
+    blobs = []
+    offset = 0
+    for coll, records in (("users", users), ("requests", requests)):
+        cached = memo.get(coll) if memo is not None else None
+        if cached is None or cached[0] is not records:
+            cached = (records, _collection_columns(coll, records))
+            if memo is not None:
+                memo[coll] = cached
+        cols, categories = cached[1]
+        header["categories"].update(categories)
+        for name, typecode, raw in cols:
+            header["columns"][name] = [offset, len(raw), typecode]
+            pad = -len(raw) % ALIGN
+            blobs.append(raw + b"\0" * pad)
+            offset += len(raw) + pad
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    encoded += b" " * (-(len(MAGIC) + 4 + len(encoded)) % ALIGN)
+    return MAGIC + struct.pack("<I", len(encoded)) + encoded + b"".join(blobs)
+
+def install_columns(payload: bytes, path: Path = COLUMNS_FILE):
+    # Replaced atomically, so readers map either the old file or the new one
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+
+def write_columns(data: Dict[str, Any], generation: int = 0, path: Path = COLUMNS_FILE):
+    install_columns(encode_columns(data, generation), path)
+
+# ---------------- Reading ----------------
+class ColumnSnapshot:
+    def __init__(self, path: Path = COLUMNS_FILE, payload: Optional[bytes] = None):
+        # Maps the file, or reads encode_columns output held in memory
+        if payload is None:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            payload = self._map
+        else:
+            path = Path("<memory>")
+        view = memoryview(payload)
+        if bytes(view[:4]) != MAGIC:
+            raise ValueError(f"{path} is not a column snapshot")
+        (size,) = struct.unpack_from("<I", view, 4)
+        header = json.loads(bytes(view[8:8 + size]))
+        if header.get("layout") != LAYOUT:
+            raise ValueError(f"{path} uses column layout {header.get('layout', 1)}, not {LAYOUT}")
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+        self.generation = header["generation"]
+        self.users = header["users"]
+        self.requests = header["requests"]
+        self._categories = header["categories"]
+        self._columns = {name: view[8 + size + off:8 + size + off + length].cast(typecode)
+                         for name, (off, length, typecode) in header["columns"].items()}
+
+    def column(self, name: str) -> memoryview:
+        # Zero-copy view onto the mapping; indexes like a list of numbers
+        return self._columns[name]
+
+    def text(self, name: str, row: int) -> str:
+        # One user's value of a string column such as "name"
+        offsets = self._columns[f"{name}.offsets"]
+        return bytes(self._columns[name][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def user_id(self, row: int) -> str:
+        return self.text("id", row)
+
+    def counts(self, name: str) -> Dict[str, int]:
+        # Occurrences of each value of a categorical column such as "requests.status"
+        labels = self._categories[name]
+        return {labels[code]: n for code, n in collections.Counter(self._columns[name]).most_common()}
+
+    def parts(self, collection: str) -> Encoded:
+        # One collection's columns as encode_columns builds them, copied off the mapping
+        prefix = f"{collection}."
+        cols = [(name, col.format, col.tobytes()) for name, col in self._columns.items()
+                if name.startswith(prefix) or (collection == "users" and not name.startswith("requests."))]
+        return cols, {name: labels for name, labels in self._categories.items() if name.startswith(prefix)}
+
+    def top_rows(self, keys: List[str], k: int) -> List[int]:
+        # Rows of the k users ranking highest on the given columns, compared in order
+        cols = [self._columns[name] for name in keys]
+        return heapq.nlargest(k, range(self.users), key=lambda i: tuple(col[i] for col in cols))
+
+    def top_users(self, keys: List[str], k: int) -> List[str]:
+        return [self.user_id(i) for i in self.top_rows(keys, k)]
+
+_open: Dict[Path, Tuple[Tuple[int, int], ColumnSnapshot]] = {}
+
+def load_columns(path: Path = COLUMNS_FILE) -> Optional[ColumnSnapshot]:
+    # The mapping is reused until the file is replaced; None if there is no snapshot
+    # yet, or only one this version cannot read
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns)
+    cached = _open.get(path)
+    if cached is None or cached[0] != stamp:
+        try:
+            cached = _open[path] = (stamp, ColumnSnapshot(path))
+        except ValueError:
+            return None
+    return cached[1]
+
+if __name__ == "__main__":
+    import argparse, time
+    from .store import open_store
+
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the SkillSwap column snapshot")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate it from the data file")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        store = open_store()
+        data = store.load()
+        write_columns(data, store.generation)
+    started = time.perf_counter()
+    snapshot = load_columns()
+    if snapshot is None:
+        parser.error(f"no {COLUMNS_FILE} yet; commit once or pass --rebuild")
+    print(f"Generation {snapshot.generation}: {snapshot.users} users, {snapshot.requests} requests "
+          f"(mapped in {(time.perf_counter() - started) * 1000:.1f} ms)")
+    print("Requests by status:", snapshot.counts("requests.status"))
+    print("Users by location:", snapshot.counts("users.location"))
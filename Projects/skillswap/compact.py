@@ -0,0 +1,407 @@
+"""
+Compact binary data format — an alternative to the indented JSON document.
+
+Users and requests are stored column by column against a fixed schema: every
+string goes once into a shared string table and is referenced by number,
+numbers are packed machine words, and lists and maps are flattened with a
+length per row. Decoding rebuilds each record directly from its typed
+columns instead of parsing text, and equal strings come back as one shared
+object. Everything else in the document is kept as compact JSON.
+
+Values that do not fit their schema type (and fields the schema does not
+know) are kept per record as JSON overrides, and every record remembers its
+key order, so converting JSON to binary and back gives the same document.
+Each JSON section is a frame of its own, so the store can fingerprint it by
+its text without dumping it again.
+
+The store recognises the format by its header, whatever the file is called,
+and keeps writing with the compression it finds there. Once data.ssb exists
+it is used instead of data.json; convert back with to-json and remove
+data.ssb to return to JSON.
+
+Usage, from the Projects directory:
+    python -m skillswap.compact to-binary data.json data.ssb [--compress zlib]
+    python -m skillswap.compact to-json data.ssb data.json
+    python -m skillswap.compact --bench 100000
+"""
+
+from array import array
+from pathlib import Path
+import gc, itertools, json, lzma, operator, os, struct, sys, zlib
+from typing import List, Dict, Any, Tuple, Optional
+
+# ---------------- Config ----------------
+MAGIC = b"SSWB"
+FORMAT_VERSION = 2                  # 1 kept every JSON section inside the header
+BINARY_FILE = Path("data.ssb")
+COMPRESSION: Optional[str] = None   # what new binary files are written with: None, "zlib" or "lzma"
+
+COMPRESSORS = {
+    "zlib": (1, lambda b: zlib.compress(b, 6), zlib.decompress),
+    "lzma": (2, lambda b: lzma.compress(b, preset=1), lzma.decompress),
+}
+CODECS = {code: decompress for code, _, decompress in COMPRESSORS.values()}
+CODEC_NAMES = {code: name for name, (code, _, _) in COMPRESSORS.items()}
+
+STR, INT, FLOAT, BOOL, STR_LIST, STR_MAP, INT_MAP = "str", "int", "float", "bool", "str_list", "str_map", "int_map"
+
+SCHEMAS = {
+    "users": {
+        "id": STR, "name": STR, "email": STR, "bio": STR, "location": STR, "interests": STR_LIST,
+        "skills_offered": STR_LIST, "skills_wanted": STR_LIST, "proficiency": STR_MAP,
+        "rating": FLOAT, "swaps_completed": INT, "endorsements_received": INT,
+        "endorsements_by_skill": INT_MAP, "badges": STR_LIST, "level": INT, "experience_points": INT,
+        "requests_accepted": INT, "availability": STR, "response_rate": INT,
+        "created_at": STR, "last_active": STR, "version": INT,
+    },
+    "requests": {
+        "id": STR, "sender_id": STR, "receiver_id": STR, "skill_offered": STR, "skill_wanted": STR,
+        "message": STR, "priority": STR, "status": STR, "created_at": STR, "updated_at": STR,
+        "viewed": BOOL, "version": INT,
+    },
+}
+
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+# ---------------- Encoding ----------------
+def _plain(s: Any) -> bool:
+    return type(s) is str and "\0" not in s
+
+def _fits(kind: str, value: Any) -> bool:
+    if kind == STR:
+        return _plain(value)
+    if kind == INT:
+        return type(value) is int and INT_MIN <= value <= INT_MAX
+    if kind == FLOAT:
+        return type(value) is float
+    if kind == BOOL:
+        return type(value) is bool
+    if kind == STR_LIST:
+        return type(value) is list and all(_plain(s) for s in value)
+    if kind == STR_MAP:
+        return type(value) is dict and all(_plain(k) and _plain(v) for k, v in value.items())
+    return type(value) is dict and all(_plain(k) and type(v) is int and INT_MIN <= v <= INT_MAX
+                                       for k, v in value.items())
+
+def _column_fits(kind: str, values: List[Any]) -> bool:
+    # The whole column at once, without a call per value; _fits decides row by row when this fails
+    types = set(map(type, values))
+    if kind == STR:
+        return types <= {str} and "\0" not in "".join(values)
+    if kind == INT:
+        return types <= {int} and (not values or INT_MIN <= min(values) and max(values) <= INT_MAX)
+    if kind == FLOAT:
+        return types <= {float}
+    if kind == BOOL:
+        return types <= {bool}
+    if not types <= {list if kind == STR_LIST else dict}:
+        return False
+    if kind == STR_LIST:
+        return _column_fits(STR, list(itertools.chain.from_iterable(values)))
+    return (_column_fits(STR, list(itertools.chain.from_iterable(values))) and
+            _column_fits(STR if kind == STR_MAP else INT, list(itertools.chain.from_iterable(map(dict.values, values)))))
+
+def _packed(values: array) -> bytes:
+    # Always little-endian on disk
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _unpacked(typecode: str, raw: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(raw)
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+class _Strings:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def refs(self, values: List[str]) -> array:
+        # New strings are numbered in first-seen order, without a call per value
+        ids = self.ids
+        new = [s for s in dict.fromkeys(values) if s not in ids]
+        ids.update(zip(new, range(len(ids), len(ids) + len(new))))
+        return array("I", map(ids.__getitem__, values))
+
+    def table(self) -> bytes:
+        return "\0".join(self.ids).encode("utf-8")
+
+def _encode_column(kind: str, values: List[Any], strings: _Strings) -> List[bytes]:
+    refs = strings.refs
+    flat = itertools.chain.from_iterable
+    if kind == STR:
+        return [_packed(refs(values))]
+    if kind == INT:
+        return [_packed(array("q", values))]
+    if kind == FLOAT:
+        return [_packed(array("d", values))]
+    if kind == BOOL:
+        return [bytes(values)]
+    lengths = array("I", map(len, values))
+    if kind == STR_LIST:
+        return [_packed(lengths), _packed(refs(list(flat(values))))]
+    keys = refs(list(flat(values)))
+    if kind == STR_MAP:
+        return [_packed(lengths), _packed(keys), _packed(refs(list(flat(map(dict.values, values)))))]
+    return [_packed(lengths), _packed(keys), _packed(array("q", flat(map(dict.values, values))))]
+
+DEFAULTS = {STR: "", INT: 0, FLOAT: 0.0, BOOL: False, STR_LIST: [], STR_MAP: {}, INT_MAP: {}}
+
+def _encode_collection(records: List[Dict[str, Any]], schema: Dict[str, str],
+                       strings: _Strings) -> Tuple[Dict[str, Any], List[bytes]]:
+    # Built a column at a time; only columns holding a misfit are walked row by row
+    row_keys = list(map(tuple, records))
+    layouts = {keys: i for i, keys in enumerate(dict.fromkeys(row_keys))}
+    overrides: Dict[int, Dict[str, Any]] = {}
+    frames = [_packed(array("I", map(layouts.__getitem__, row_keys)))]
+    transposed: Dict[str, Any] = {}
+    if len(layouts) == 1:
+        # Every record has the same fields: transposed in one pass
+        present = [name for name in schema if name in row_keys[0]]
+        transposed = {name: [DEFAULTS[kind]] * len(records) for name, kind in schema.items() if name not in present}
+        if len(present) > 1:
+            transposed.update(zip(present, zip(*map(operator.itemgetter(*present), records))))
+    for name, kind in schema.items():
+        default = DEFAULTS[kind]
+        column = transposed[name] if name in transposed else [rec.get(name, default) for rec in records]
+        if not _column_fits(kind, column):
+            column = list(column)
+            for row, value in enumerate(column):
+                if not _fits(kind, value):
+                    overrides.setdefault(row, {})[name] = value
+                    column[row] = default
+        frames.extend(_encode_column(kind, column, strings))
+    extra = {keys: [name for name in keys if name not in schema] for keys in layouts}
+    if any(extra.values()):
+        for row, (rec, keys) in enumerate(zip(records, row_keys)):
+            for name in extra[keys]:
+                overrides.setdefault(row, {})[name] = rec[name]
+    header = {"rows": len(records), "layouts": [list(k) for k in layouts], "overrides": overrides}
+    return header, frames
+
+def _frame(raw: bytes) -> bytes:
+    return struct.pack("<Q", len(raw)) + raw
+
+def encode(data: Dict[str, Any], compression: Optional[str] = COMPRESSION,
+           texts: Optional[Dict[str, str]] = None) -> bytes:
+    # texts: JSON text of sections outside the schemas that the caller has already dumped
+    texts = texts or {}
+    strings = _Strings()
+    header: Dict[str, Any] = {"order": list(data), "schemas": {}, "sections": []}
+    frames: List[bytes] = []
+    sections: List[bytes] = []
+    for key, value in data.items():
+        if key in SCHEMAS and isinstance(value, list) and all(type(r) is dict for r in value):
+            coll_header, coll_frames = _encode_collection(value, SCHEMAS[key], strings)
+            header["schemas"][key] = coll_header
+            frames.extend(coll_frames)
+        else:
+            header["sections"].append(key)
+            text = texts[key] if key in texts else json.dumps(value)
+            sections.append(text.encode("utf-8"))
+    header["strings"] = len(strings.ids)
+    body = b"".join([_frame(json.dumps(header, separators=(",", ":")).encode("utf-8")),
+                     _frame(strings.table())] + [_frame(f) for f in frames + sections])
+    code = 0
+    if compression:
+        code, compress, _ = COMPRESSORS[compression]
+        body = compress(body)
+    return MAGIC + bytes([FORMAT_VERSION, code]) + body
+
+# ---------------- Decoding ----------------
+def _frames(body: bytes):
+    view = memoryview(body)
+    pos = 0
+    while pos < len(body):
+        (size,) = struct.unpack_from("<Q", body, pos)
+        pos += 8
+        if pos + size > len(body):
+            raise ValueError("truncated binary data file")
+        yield view[pos:pos + size]
+        pos += size
+
+def _slices(lengths: array) -> List[slice]:
+    bounds = list(itertools.accumulate(lengths, initial=0))
+    return list(map(slice, bounds, bounds[1:]))
+
+def _decode_column(kind: str, frames, table: List[str]) -> List[Any]:
+    # Built with map() throughout, so the per-row work stays out of the interpreter loop
+    lookup = table.__getitem__
+    if kind == STR:
+        return list(map(lookup, _unpacked("I", next(frames))))
+    if kind == INT:
+        return _unpacked("q", next(frames)).tolist()
+    if kind == FLOAT:
+        return _unpacked("d", next(frames)).tolist()
+    if kind == BOOL:
+        return list(map(bool, bytes(next(frames))))
+    slices = _slices(_unpacked("I", next(frames)))
+    if kind == STR_LIST:
+        return list(map(list(map(lookup, _unpacked("I", next(frames)))).__getitem__, slices))
+    keys = list(map(lookup, _unpacked("I", next(frames))))
+    if kind == STR_MAP:
+        values = list(map(lookup, _unpacked("I", next(frames))))
+    else:
+        values = _unpacked("q", next(frames)).tolist()
+    return list(map(dict, map(zip, map(keys.__getitem__, slices), map(values.__getitem__, slices))))
+
+def _decode_collection(header: Dict[str, Any], schema: Dict[str, str], frames, table: List[str]) -> List[Dict[str, Any]]:
+    row_layouts = _unpacked("I", next(frames))
+    columns = {name: _decode_column(kind, frames, table) for name, kind in schema.items()}
+    rows = header["rows"]
+    layouts = header["layouts"]
+    if len(layouts) <= 1:
+        groups: Dict[int, Any] = {0: range(rows)} if rows else {}
+    else:
+        groups = {}
+        for row, layout in enumerate(row_layouts):
+            groups.setdefault(layout, []).append(row)
+
+    records: List[Any] = [None] * rows
+    for layout, members in groups.items():
+        keys = layouts[layout]
+        if isinstance(members, range):
+            picked = [columns.get(k) for k in keys]
+        else:
+            picked = [[columns[k][i] for i in members] if k in columns else None for k in keys]
+        # Fields outside the schema are filled in from the overrides below
+        picked = [itertools.repeat(None) if col is None else col for col in picked]
+        if any(k in columns for k in keys):
+            values = zip(*picked)
+        else:
+            values = itertools.repeat((None,) * len(keys), len(members))
+        built = map(dict, map(zip, itertools.repeat(keys), values))
+        if isinstance(members, range):
+            records = list(built)
+        else:
+            for row, rec in zip(members, built):
+                records[row] = rec
+    for row, fields in header["overrides"].items():
+        records[int(row)].update(fields)
+    return records
+
+def decode(raw: bytes, texts: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    # Fills texts, if given, with the JSON text of each section outside the schemas
+    if raw[:4] != MAGIC:
+        raise ValueError("not a SkillSwap binary data file")
+    if raw[4] not in (1, FORMAT_VERSION):
+        raise ValueError(f"unsupported binary format version {raw[4]}")
+    body = memoryview(raw)[6:]
+    if raw[5]:
+        if raw[5] not in CODECS:
+            raise ValueError(f"unknown compression {raw[5]}")
+        try:
+            body = CODECS[raw[5]](body)
+        except (zlib.error, lzma.LZMAError) as exc:
+            raise ValueError(f"corrupt binary data file: {exc}")
+    # Nothing built here can form a reference cycle, so collection is paused
+    # rather than repeatedly scanning the records as they are created
+    paused = gc.isenabled()
+    gc.disable()
+    try:
+        frames = _frames(body)
+        header = json.loads(bytes(next(frames)))
+        table = bytes(next(frames)).decode("utf-8").split("\0") if header["strings"] else []
+        decoded = {key: _decode_collection(coll, SCHEMAS[key], frames, table)
+                   for key, coll in header["schemas"].items()}
+        for key in header.get("sections", []):
+            text = bytes(next(frames)).decode("utf-8")
+            if texts is not None:
+                texts[key] = text
+            decoded[key] = json.loads(text)
+    except (StopIteration, IndexError, KeyError, struct.error) as exc:
+        raise ValueError(f"corrupt binary data file: {exc!r}")
+    finally:
+        if paused:
+            gc.enable()
+    return {key: decoded[key] if key in decoded else header["rest"][key] for key in header["order"]}
+
+def is_binary(raw: bytes) -> bool:
+    return raw[:4] == MAGIC
+
+def compression_of(raw: bytes) -> Optional[str]:
+    # What a binary file was written with, read off its header
+    return CODEC_NAMES.get(raw[5]) if is_binary(raw) and len(raw) > 5 else None
+
+# ---------------- Conversion ----------------
+def _install(target: Path, raw: bytes, generation: int):
+    # The converted file starts a fresh claim history at the document's own generation
+    from .store import generation_path, temp_path
+    for old in target.parent.glob(f"{target.name}.*"):
+        if old.suffix[1:].isdigit():
+            old.unlink()
+    tmp = temp_path(target)
+    tmp.write_bytes(raw)
+    os.link(tmp, generation_path(target, generation))
+    os.replace(tmp, target)
+
+def to_binary(source: Path, target: Path, compression: Optional[str] = COMPRESSION) -> int:
+    data = json.loads(source.read_text(encoding="utf-8"))
+    raw = encode(data, compression)
+    _install(target, raw, data.get("generation", 0))
+    return len(raw)
+
+def to_json(source: Path, target: Path) -> int:
+    data = decode(source.read_bytes())
+    raw = json.dumps(data, indent=2).encode("utf-8")
+    _install(target, raw, data.get("generation", 0))
+    return len(raw)
+
+def benchmark(n_users: int, n_requests: int, repeat: int = 3) -> List[Dict[str, Any]]:
+    # Best-of-n save and load times and file sizes for each format
+    import time
+    from .synthetic import generate_data
+
+    data = generate_data(n_users, n_requests)
+    formats = {
+        "json (indent=2)": (lambda d: json.dumps(d, indent=2).encode("utf-8"), json.loads),
+        "json (compact)": (lambda d: json.dumps(d, separators=(",", ":")).encode("utf-8"), json.loads),
+        "binary": (lambda d: encode(d), decode),
+    }
+    for name in COMPRESSORS:
+        formats[f"binary + {name}"] = (lambda d, name=name: encode(d, name), decode)
+
+    results = []
+    for name, (save, load) in formats.items():
+        save_times, load_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            raw = save(data)
+            save_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            loaded = load(raw)
+            load_times.append(time.perf_counter() - started)
+        if loaded != data:
+            raise AssertionError(f"{name} did not round-trip")
+        results.append({"format": name, "mb": round(len(raw) / 2**20, 1),
+                        "save_s": round(min(save_times), 2), "load_s": round(min(load_times), 2)})
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert SkillSwap data between JSON and the compact binary format")
+    parser.add_argument("command", nargs="?", choices=["to-binary", "to-json"])
+    parser.add_argument("source", nargs="?", type=Path)
+    parser.add_argument("target", nargs="?", type=Path)
+    parser.add_argument("--compress", choices=sorted(COMPRESSORS), help="compress the binary file")
+    parser.add_argument("--bench", type=int, metavar="USERS", help="compare formats on synthetic data")
+    parser.add_argument("--requests", type=int, default=0, help="synthetic requests for --bench (default: 2 per user)")
+    args = parser.parse_args()
+
+    if args.bench:
+        rows = benchmark(args.bench, args.requests or 2 * args.bench)
+        print(f"{'format':<18} {'size MB':>8} {'save s':>8} {'load s':>8}")
+        for r in rows:
+            print(f"{r['format']:<18} {r['mb']:>8} {r['save_s']:>8} {r['load_s']:>8}")
+    elif args.command and args.source and args.target:
+        if args.command == "to-binary":
+            size = to_binary(args.source, args.target, args.compress)
+        else:
+            size = to_json(args.source, args.target)
+        print(f"Wrote {size / 2**20:.1f} MB to {args.target}")
+    else:
+        parser.print_help()
@@ -0,0 +1,190 @@
+"""
+Swap circles — multi-party chains like A teaches B, B teaches C, C teaches A.
+
+Builds a directed "can teach what the other wants" graph from skills offered
+and wanted, keeps only each user's strongest edges, prunes users that cannot
+sit on a cycle, and enumerates 3- and 4-person cycles ranked by edge score.
+
+Candidate edges are picked with a cheap proxy (how much of the learner's
+wants the skill covers, plus the teacher's proficiency in it); the edges kept
+are then scored with compatibility_score, so a circle's score is the average
+match score of its pairs, on the same scale as Discover.
+"""
+
+import datetime, heapq, time
+from typing import List, Dict, Any, Tuple
+
+from .matching import batch_scores, score_profile
+from .store import read_section
+
+# ---------------- Config ----------------
+MAX_DEGREE = 8          # strongest outgoing edges kept per user
+POSTING_WINDOW = 16     # learners scanned per (teacher, offered skill)
+MAX_CYCLES = 5000       # best cycles kept overall
+MAX_PER_USER = 5        # circles surfaced per user in Discover
+TIME_BUDGET = 30.0      # seconds before enumeration stops early
+
+Edges = Dict[str, Dict[str, Tuple[float, str]]]
+
+# ---------------- Graph ----------------
+PROFICIENCY_BONUS = {"Expert": 6, "Intermediate": 3}
+
+def build_edges(users: List[Dict[str, Any]], max_degree: int = MAX_DEGREE, 
+                window: int = POSTING_WINDOW) -> Edges:
+    offered_by: Dict[str, List[Dict[str, Any]]] = {}
+    wanted_by: Dict[str, List[Dict[str, Any]]] = {}
+    for u in users:
+        for s in set(u["skills_offered"]):
+            offered_by.setdefault(s, []).append(u)
+        for s in set(u["skills_wanted"]):
+            wanted_by.setdefault(s, []).append(u)
+    
+    # Teachers of a skill take turns over its learners (strongest first), so popular
+    # skills cost a fixed window per teacher and no learner soaks up every edge
+    best: Dict[str, Dict[str, Tuple[float, str]]] = {}
+    for skill, teachers in offered_by.items():
+        learners = wanted_by.get(skill)
+        if not learners:
+            continue
+        learners.sort(key=lambda u: len(u["skills_wanted"]))
+        size = min(window, len(learners))
+        scored = [(u["id"], 80 / len(u["skills_wanted"])) for u in learners]
+        for i, teacher in enumerate(teachers):
+            start = (i * size) % len(learners)
+            bonus = PROFICIENCY_BONUS.get(teacher.get("proficiency", {}).get(skill), 0)
+            mine = best.setdefault(teacher["id"], {})
+            for j in range(start, start + size):
+                learner_id, base = scored[j % len(scored)]
+                if learner_id == teacher["id"]:
+                    continue
+                score = min(base + bonus, 100)
+                if learner_id not in mine or score > mine[learner_id][0]:
+                    mine[learner_id] = (score, skill)
+    
+    # Only the kept edges get the full score, so its cost is max_degree pairs per user
+    by_id = {u["id"]: u for u in users}
+    profiles: Dict[str, Any] = {}
+    def profile(user_id: str):
+        if user_id not in profiles:
+            profiles[user_id] = score_profile(by_id[user_id])
+        return profiles[user_id]
+    
+    edges: Edges = {}
+    for u, out in best.items():
+        kept = heapq.nlargest(max_degree, out.items(), key=lambda kv: kv[1][0])
+        if kept:
+            scores = batch_scores(profile(u), [profile(v) for v, _ in kept])
+            edges[u] = {v: (score, skill) for (v, (_, skill)), score in zip(kept, scores)}
+    return edges
+
+def prune(edges: Edges) -> Edges:
+    # Users without both an incoming and an outgoing edge can never close a cycle
+    edges = {u: dict(out) for u, out in edges.items()}
+    changed = True
+    while changed:
+        targets = {v for out in edges.values() for v in out}
+        changed = False
+        for u in list(edges):
+            out = {v: e for v, e in edges[u].items() if v in edges}
+            if not out or u not in targets:
+                del edges[u]
+                changed = True
+            else:
+                edges[u] = out
+    return edges
+
+# ---------------- Enumeration ----------------
+def find_cycles(users: List[Dict[str, Any]], max_length: int = 4, max_degree: int = MAX_DEGREE, 
+                max_cycles: int = MAX_CYCLES, time_budget: float = TIME_BUDGET) -> List[Dict[str, Any]]:
+    edges = prune(build_edges(users, max_degree))
+    rank = {u: i for i, u in enumerate(sorted(edges))}
+    incoming: Dict[str, Dict[str, Tuple[float, str]]] = {u: {} for u in edges}
+    for u, out in edges.items():
+        for v, e in out.items():
+            incoming[v][u] = e
+    
+    deadline = time.monotonic() + time_budget
+    heap: List[Tuple[float, float, Tuple[str, ...]]] = []
+    
+    def record(path: Tuple[str, ...]):
+        scores = [edges[path[i]][path[(i + 1) % len(path)]][0] for i in range(len(path))]
+        item = (sum(scores) / len(scores), min(scores), path)
+        if len(heap) < max_cycles:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    
+    # Each cycle is enumerated once, starting from its lowest-ranked member
+    for a in edges:
+        if time.monotonic() > deadline:
+            break
+        ra = rank[a]
+        closers = {d for d in incoming[a] if rank[d] > ra}
+        if not closers:
+            continue
+        for b in edges[a]:
+            if rank[b] <= ra:
+                continue
+            for c in edges[b]:
+                if rank[c] <= ra or c == b:
+                    continue
+                if c in closers:
+                    record((a, b, c))
+                if max_length >= 4:
+                    for d in closers.intersection(edges[c]):
+                        if d != b:
+                            record((a, b, c, d))
+    
+    cycles = []
+    for avg, bottleneck, path in sorted(heap, reverse=True):
+        cycles.append({
+            "users": list(path),
+            "skills": [edges[path[i]][path[(i + 1) % len(path)]][1] for i in range(len(path))],
+            "score": round(avg, 1),
+            "bottleneck": round(bottleneck, 1)
+        })
+    return cycles
+
+# ---------------- Batch Job ----------------
+def compute_cycles(users: List[Dict[str, Any]], **options) -> Dict[str, Any]:
+    # The swap_cycles section for these users; reads them only
+    cycles = find_cycles(users, **options)
+    by_user: Dict[str, List[int]] = {}
+    for i, cycle in enumerate(cycles):
+        for user_id in cycle["users"]:
+            if len(by_user.setdefault(user_id, [])) < MAX_PER_USER:
+                by_user[user_id].append(i)
+    return {
+        "generated_at": datetime.datetime.utcnow().isoformat(),
+        "cycles": cycles,
+        "by_user": by_user
+    }
+
+def precompute_cycles(data: Dict[str, Any], **options) -> Dict[str, Any]:
+    data["swap_cycles"] = compute_cycles(data.get("users", []), **options)
+    return data["swap_cycles"]
+
+def cycles_for_user(data: Dict[str, Any], user_id: str) -> List[Dict[str, Any]]:
+    precomputed = read_section(data, "swap_cycles", {})
+    removed = set(precomputed.get("removed_users", []))
+    circles = [precomputed["cycles"][i] for i in precomputed.get("by_user", {}).get(user_id, [])]
+    # Deleted users are tombstoned rather than rewritten out of the precomputed circles
+    return [c for c in circles if not removed.intersection(c["users"])]
+
+if __name__ == "__main__":
+    import argparse
+    from .store import read_data, update_data
+    
+    parser = argparse.ArgumentParser(description="Precompute SkillSwap swap circles")
+    parser.add_argument("--max-length", type=int, default=4, choices=[3, 4])
+    parser.add_argument("--max-degree", type=int, default=MAX_DEGREE)
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET)
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    data = read_data()
+    result = precompute_cycles(data, max_length=args.max_length, max_degree=args.max_degree, 
+                               time_budget=args.time_budget)
+    update_data(lambda d: d.update(swap_cycles=result))
+    print(f"Found {len(result['cycles'])} circles for {len(result['by_user'])} users "
+          f"in {time.perf_counter() - started:.1f}s")
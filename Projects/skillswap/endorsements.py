@@ -0,0 +1,55 @@
+"""
+Skill endorsements — one per (endorser, endorsee, skill), with the endorsee's
+total and per-skill counters kept up to date in the same write.
+"""
+
+import uuid, datetime
+from typing import Dict, Any, Optional
+
+from .store import add_record, get_index, own_record, read_index
+
+def endorsement_key(endorser_id: str, endorsee_id: str, skill: str) -> str:
+    return f"{endorser_id}:{endorsee_id}:{skill}"
+
+def has_endorsed(data: Dict[str, Any], endorser_id: str, endorsee_id: str, skill: str) -> bool:
+    return endorsement_key(endorser_id, endorsee_id, skill.strip().lower()) in read_index(data, "endorsements")
+
+def add_endorsement(data: Dict[str, Any], endorser: Dict[str, Any], endorsee: Dict[str, Any], 
+                    skill: str) -> Optional[Dict[str, Any]]:
+    skill = skill.strip().lower()
+    if endorser["id"] == endorsee["id"] or skill not in endorsee.get("skills_offered", []):
+        return None
+    
+    index = get_index(data, "endorsements")
+    key = endorsement_key(endorser["id"], endorsee["id"], skill)
+    if key in index:
+        return None
+    
+    endorsement = {
+        "id": str(uuid.uuid4()),
+        "endorser_id": endorser["id"],
+        "endorsee_id": endorsee["id"],
+        "skill": skill,
+        "created_at": datetime.datetime.utcnow().isoformat()
+    }
+    add_record(data, "endorsements", endorsement)
+    index[key] = endorsement["id"]
+    own_record(data, endorser["id"], "endorsements", endorsement["id"])
+    own_record(data, endorsee["id"], "endorsements", endorsement["id"])
+    
+    by_skill = endorsee.setdefault("endorsements_by_skill", {})
+    by_skill[skill] = by_skill.get(skill, 0) + 1
+    endorsee["endorsements_received"] = endorsee.get("endorsements_received", 0) + 1
+    return endorsement
+
+def rebuild_endorsements(data: Dict[str, Any]):
+    # Recovers the index and counters from the endorsements collection, e.g. after a manual edit
+    index = data.setdefault("indexes", {})["endorsements"] = {}
+    counts: Dict[str, Dict[str, int]] = {}
+    for e in data.get("endorsements", []):
+        index[endorsement_key(e["endorser_id"], e["endorsee_id"], e["skill"])] = e["id"]
+        per_skill = counts.setdefault(e["endorsee_id"], {})
+        per_skill[e["skill"]] = per_skill.get(e["skill"], 0) + 1
+    for u in data.get("users", []):
+        u["endorsements_by_skill"] = counts.get(u["id"], {})
+        u["endorsements_received"] = sum(u["endorsements_by_skill"].values())
@@ -0,0 +1,168 @@
+"""
+Discover pre-filters — availability, activity recency, location, skill terms
+and a rating floor, applied to candidates before anything is scored.
+
+Each filter value is a bitmap over user positions (a Python int, one bit per
+user), built once per version of the user list; activity recency is cut at
+query time from users kept sorted by last activity, so a long-lived index
+never goes stale as the clock moves on. Every user action stamps the acting
+user's last_active through mark_active, in the same commit. A query ANDs the bitmaps of
+its active filters, most selective first, and records how many candidates
+are left after each stage; only the survivors are handed to scoring.
+
+Usage, from the Projects directory:
+    python -m skillswap.filters --users 50000   # build and query timings
+"""
+
+import bisect, datetime, threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from .locations import user_location
+from .store import record_position
+
+# ---------------- Config ----------------
+AVAILABILITY = ["Available", "Busy", "Away"]
+ACTIVITY_DAYS = [1, 7, 30, 90, 365]                 # "active within" choices, in days
+RATING_FLOORS = [x / 2 for x in range(0, 11)]       # 0.0, 0.5 ... 5.0
+
+# Set-bit positions of every byte value, for walking a bitmap a byte at a time
+_BYTE_BITS = [[bit for bit in range(8) if value >> bit & 1] for value in range(256)]
+
+def _bitmap(rows: Iterable[int], size: int) -> int:
+    # Built through a bytearray so each row costs one byte operation, not a big-int OR
+    raw = bytearray((size + 7) // 8)
+    for row in rows:
+        raw[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(raw, "little")
+
+# ---------------- Activity ----------------
+def mark_active(data: Dict[str, Any], user_id: str, at: Optional[str] = None):
+    # Called from the mutation of every user action, so "active within" follows what users do
+    pos = record_position(data, "users", user_id)
+    if pos is not None:
+        data["users"][pos]["last_active"] = at or datetime.datetime.utcnow().isoformat()
+
+# ---------------- Bitmaps ----------------
+class UserBitmaps:
+    # Immutable once built; queries keep using the one they started with
+    def __init__(self, users: List[Dict[str, Any]]):
+        self.users = users
+        self.size = len(users)
+        self.position = {u["id"]: i for i, u in enumerate(users)}
+        self.all = (1 << self.size) - 1
+
+        rows: Dict[Tuple[str, Any], List[int]] = {}
+        activity: List[Tuple[str, int]] = []
+        for i, u in enumerate(users):
+            rows.setdefault(("availability", u.get("availability") or "Available"), []).append(i)
+            rows.setdefault(("location", user_location(u)), []).append(i)
+            for skill in set(u.get("skills_offered", [])) | set(u.get("skills_wanted", [])):
+                rows.setdefault(("skill", skill), []).append(i)
+            rating = u.get("rating") or 0
+            for floor in RATING_FLOORS:
+                if rating >= floor:
+                    rows.setdefault(("rating", floor), []).append(i)
+            activity.append((u.get("last_active") or u.get("created_at") or "", i))
+        activity.sort()
+        # Sorted by last activity, so a recency cutoff taken at query time is one bisect
+        self._active_at = [stamp for stamp, _ in activity]
+        self._active_rows = [i for _, i in activity]
+        self._bitmaps = {key: _bitmap(r, self.size) for key, r in rows.items()}
+        self.skills = sorted(skill for kind, skill in self._bitmaps if kind == "skill")
+
+    def get(self, kind: str, value: Any) -> int:
+        return self._bitmaps.get((kind, value), 0)
+
+    def availability(self, values: Iterable[str]) -> int:
+        bitmap = 0
+        for value in values:
+            bitmap |= self.get("availability", value)
+        return bitmap
+
+    def active_within(self, days: int, now: Optional[datetime.datetime] = None) -> int:
+        # The cutoff moves with the clock, not with the last rebuild
+        cutoff = ((now or datetime.datetime.utcnow()) - datetime.timedelta(days=days)).isoformat()
+        return _bitmap(self._active_rows[bisect.bisect_left(self._active_at, cutoff):], self.size)
+
+    def rating_at_least(self, floor: float) -> int:
+        # Rounded down to the nearest prebuilt floor
+        return self.get("rating", max((f for f in RATING_FLOORS if f <= floor), default=0.0))
+
+    def skill_terms(self, terms: Iterable[str]) -> int:
+        # Every term must match, a term matching any skill that contains it
+        bitmap = self.all
+        for term in terms:
+            matched = 0
+            for skill in self.skills:
+                if term in skill:
+                    matched |= self.get("skill", skill)
+            bitmap &= matched
+        return bitmap
+
+    def of_ids(self, ids: Iterable[str]) -> int:
+        return _bitmap((self.position[i] for i in ids if i in self.position), self.size)
+
+    def rows(self, bitmap: int) -> List[int]:
+        found = []
+        for byte_no, value in enumerate(bitmap.to_bytes((self.size + 7) // 8, "little")):
+            if value:
+                base = byte_no << 3
+                found.extend(base + bit for bit in _BYTE_BITS[value])
+        return found
+
+    def select(self, bitmap: int) -> List[Dict[str, Any]]:
+        return [self.users[i] for i in self.rows(bitmap)]
+
+class FilterIndex:
+    # Rebuilt only when it is handed a different user list
+    def __init__(self):
+        self._built: Optional[UserBitmaps] = None
+        self._lock = threading.Lock()
+
+    def sync(self, users: List[Dict[str, Any]]) -> UserBitmaps:
+        with self._lock:
+            if self._built is None or self._built.users is not users:
+                self._built = UserBitmaps(users)
+            return self._built
+
+# ---------------- Pipeline ----------------
+def _count(bitmap: int) -> int:
+    # int.bit_count needs Python 3.10
+    return bin(bitmap).count("1")
+
+def run_pipeline(bitmaps: UserBitmaps, stages: List[Tuple[str, int]],
+                 exclude: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[Tuple[str, int]]]:
+    # Stages are (label, bitmap); returns the surviving users and the count left after each stage
+    survivors = bitmaps.all
+    if exclude in bitmaps.position:
+        survivors &= ~(1 << bitmaps.position[exclude])
+    counts = [("All users", _count(survivors))]
+    # Most selective first, so the candidate set shrinks fastest and empty results stop early
+    for label, bitmap in sorted(stages, key=lambda s: _count(s[1])):
+        survivors &= bitmap
+        counts.append((label, _count(survivors)))
+        if not survivors:
+            break
+    return bitmaps.select(survivors), counts
+
+if __name__ == "__main__":
+    import argparse, time
+    from .synthetic import generate_users
+
+    parser = argparse.ArgumentParser(description="Time the Discover filter bitmaps on synthetic users")
+    parser.add_argument("--users", type=int, default=50000)
+    args = parser.parse_args()
+
+    users = generate_users(args.users)
+    started = time.perf_counter()
+    bitmaps = FilterIndex().sync(users)
+    print(f"Built bitmaps over {len(users)} users in {time.perf_counter() - started:.2f}s")
+    started = time.perf_counter()
+    survivors, counts = run_pipeline(bitmaps, [
+        ("Available", bitmaps.availability(["Available"])),
+        ("Active within 365 days", bitmaps.active_within(365)),
+        ("In mumbai", bitmaps.get("location", "mumbai")),
+        ("Skills: python", bitmaps.skill_terms(["python"])),
+        ("Rating ≥ 4.5", bitmaps.rating_at_least(4.5)),
+    ], exclude=users[0]["id"])
+    print(f"Filtered in {(time.perf_counter() - started) * 1000:.1f} ms: " + " → ".join(f"{l} {n}" for l, n in counts))
@@ -0,0 +1,252 @@
+"""
+Bulk import — streams users and requests from CSV or JSONL files into the
+store, for migrating whole communities at once.
+
+Rows are read lazily and normalized in batches through make_user and
+make_request. Users are deduplicated by email (against the store and within
+the file) and requests must point at known users. Each batch is one commit
+that also updates the indexes, positions, skill and location counts and
+request rollups for its records, so the store is consistent after every
+batch. Badges and levels depend on the whole history and are backfilled
+once at the end. Rejected rows go to a CSV report.
+
+CSV list cells (skills, interests) are separated by ";" or ",", and
+proficiency is written as "python:Expert;sql:Beginner". Requests name users
+by sender_email/receiver_email or by sender_id/receiver_id.
+
+Usage, from the Projects directory:
+    python -m skillswap.importer --users members.csv --requests swaps.jsonl
+"""
+
+from pathlib import Path
+import csv, datetime, json, re, time
+from collections import Counter
+from typing import List, Dict, Any, Iterator, Tuple
+
+from .models import make_user, make_request
+from .swaps import OPEN_STATUSES, add_request, pair_key, skills_key
+from .market import add_user
+from .achievements import backfill
+from .store import read_data, update_data
+
+# ---------------- Config ----------------
+BATCH_SIZE = 20000      # rows per commit; every commit rewrites the data file
+PROFICIENCY_LEVELS = ["Beginner", "Intermediate", "Expert"]
+PRIORITIES = ["Low", "Medium", "High"]
+STATUSES = ["Pending", "Accepted", "Rejected", "Completed"]
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+NUMERIC_FIELDS = {"rating": float, "swaps_completed": int, "level": int, "experience_points": int}
+
+class RowError(ValueError):
+    pass
+
+# ---------------- Reading ----------------
+def read_rows(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    # (line number, row) pairs, one at a time
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".jsonl":
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError:
+                        yield line_no, {"__error__": "not valid JSON"}
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+def batches(rows: Iterator[Tuple[int, Dict[str, Any]]], size: int = BATCH_SIZE) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def as_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in re.split(r"[;,]", value or "") if v.strip()]
+
+def as_proficiency(value: Any) -> Dict[str, str]:
+    if isinstance(value, dict):
+        pairs = value.items()
+    else:
+        pairs = [item.split(":", 1) for item in as_list(value) if ":" in item]
+    proficiency = {}
+    for skill, level in pairs:
+        level = str(level).strip().capitalize()
+        if level not in PROFICIENCY_LEVELS:
+            raise RowError(f"unknown proficiency '{level}'")
+        proficiency[skill.strip().lower()] = level
+    return proficiency
+
+def as_timestamp(value: Any) -> str:
+    # ISO 8601 in UTC without an offset, like the timestamps the app writes
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise RowError("invalid created_at")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+# ---------------- Normalization ----------------
+def normalize_user(row: Dict[str, Any], emails: Dict[str, str]) -> Dict[str, Any]:
+    if "__error__" in row:
+        raise RowError(row["__error__"])
+    name = (row.get("name") or "").strip()
+    email = (row.get("email") or "").strip().lower()
+    if not name:
+        raise RowError("missing name")
+    if not EMAIL_PATTERN.match(email):
+        raise RowError("invalid email")
+    if email in emails:
+        raise RowError("duplicate email")
+    offered = as_list(row.get("skills_offered"))
+    if not offered:
+        raise RowError("no skills offered")
+
+    user = make_user(name, email, (row.get("bio") or "").strip(), offered, as_list(row.get("skills_wanted")),
+                     as_proficiency(row.get("proficiency")), (row.get("location") or "").strip(),
+                     as_list(row.get("interests")))
+    for field, cast in NUMERIC_FIELDS.items():
+        if row.get(field) not in (None, ""):
+            try:
+                user[field] = cast(row[field])
+            except ValueError:
+                raise RowError(f"{field} is not a number")
+    return user
+
+def normalize_request(row: Dict[str, Any], emails: Dict[str, str], user_ids: set, open_keys: set) -> Dict[str, Any]:
+    if "__error__" in row:
+        raise RowError(row["__error__"])
+    sender_id = row.get("sender_id") or emails.get((row.get("sender_email") or "").strip().lower())
+    receiver_id = row.get("receiver_id") or emails.get((row.get("receiver_email") or "").strip().lower())
+    if sender_id not in user_ids:
+        raise RowError("unknown sender")
+    if receiver_id not in user_ids:
+        raise RowError("unknown receiver")
+    if sender_id == receiver_id:
+        raise RowError("sender and receiver are the same user")
+    skill_offered = (row.get("skill_offered") or "").strip().lower()
+    skill_wanted = (row.get("skill_wanted") or "").strip().lower()
+    if not skill_offered or not skill_wanted:
+        raise RowError("missing skill")
+    priority = (row.get("priority") or "Medium").strip().capitalize()
+    status = (row.get("status") or "Pending").strip().capitalize()
+    if priority not in PRIORITIES:
+        raise RowError(f"unknown priority '{priority}'")
+    if status not in STATUSES:
+        raise RowError(f"unknown status '{status}'")
+
+    created_at = as_timestamp(row["created_at"]) if row.get("created_at") else None
+
+    if status in OPEN_STATUSES:
+        key = (pair_key(sender_id, receiver_id), skills_key(skill_offered, skill_wanted))
+        if key in open_keys:
+            raise RowError("duplicate open request")
+        open_keys.add(key)
+
+    req = make_request(sender_id, receiver_id, skill_offered, skill_wanted, (row.get("message") or "").strip(), priority)
+    req["status"] = status
+    if created_at:
+        req["created_at"] = req["updated_at"] = created_at
+    return req
+
+# ---------------- Import ----------------
+class Importer:
+    def __init__(self, batch_size: int = BATCH_SIZE, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.rejected: List[Dict[str, Any]] = []
+        self.counts = Counter()
+        # Only ids and emails are kept in memory, never the imported records themselves
+        data = read_data()
+        self.emails = {u.get("email", "").lower(): u["id"] for u in data["users"] if u.get("email")}
+        self.user_ids = {u["id"] for u in data["users"]}
+        self.open_keys = {(pair_key(r["sender_id"], r["receiver_id"]), skills_key(r["skill_offered"], r["skill_wanted"]))
+                          for r in data["requests"] if r["status"] in OPEN_STATUSES}
+
+    def _reject(self, source: Path, line_no: int, reason: str):
+        self.rejected.append({"file": source.name, "line": line_no, "reason": reason})
+        self.counts["rejected"] += 1
+
+    def _commit(self, collection: str, records: List[Dict[str, Any]]):
+        # Added the way the app adds them, so the batch's index updates land in its commit
+        add = add_user if collection == "users" else add_request
+        if records and not self.dry_run:
+            update_data(lambda d: [add(d, rec) for rec in records])
+        self.counts[collection] += len(records)
+
+    def import_users(self, path: Path):
+        for batch in batches(read_rows(path), self.batch_size):
+            records = []
+            for line_no, row in batch:
+                try:
+                    user = normalize_user(row, self.emails)
+                except RowError as exc:
+                    self._reject(path, line_no, str(exc))
+                    continue
+                self.emails[user["email"]] = user["id"]
+                self.user_ids.add(user["id"])
+                records.append(user)
+            self._commit("users", records)
+
+    def import_requests(self, path: Path):
+        for batch in batches(read_rows(path), self.batch_size):
+            records = []
+            for line_no, row in batch:
+                try:
+                    records.append(normalize_request(row, self.emails, self.user_ids, self.open_keys))
+                except RowError as exc:
+                    self._reject(path, line_no, str(exc))
+            self._commit("requests", records)
+
+    def finish(self) -> int:
+        # Badges and levels are awarded once from the whole imported history
+        if self.dry_run or not (self.counts["users"] or self.counts["requests"]):
+            return 0
+        return update_data(lambda d: len(backfill(d)))
+
+    def write_rejects(self, path: Path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["file", "line", "reason"])
+            writer.writeheader()
+            writer.writerows(self.rejected)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk import SkillSwap users and requests")
+    parser.add_argument("--users", type=Path, help="CSV or JSONL file of profiles")
+    parser.add_argument("--requests", type=Path, help="CSV or JSONL file of swap requests")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per commit")
+    parser.add_argument("--rejects", type=Path, default=Path("import_rejects.csv"), help="where to write rejected rows")
+    parser.add_argument("--dry-run", action="store_true", help="validate without saving")
+    args = parser.parse_args()
+    if not args.users and not args.requests:
+        parser.error("nothing to import; pass --users and/or --requests")
+
+    started = time.perf_counter()
+    importer = Importer(args.batch_size, args.dry_run)
+    if args.users:
+        importer.import_users(args.users)
+    if args.requests:
+        importer.import_requests(args.requests)
+    awarded = importer.finish()
+    elapsed = time.perf_counter() - started
+
+    rows = importer.counts["users"] + importer.counts["requests"] + importer.counts["rejected"]
+    print(f"{'Validated' if args.dry_run else 'Imported'} {importer.counts['users']} users and "
+          f"{importer.counts['requests']} requests in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    if awarded:
+        print(f"Awarded {awarded} achievements from imported history")
+    if importer.rejected:
+        importer.write_rejects(args.rejects)
+        print(f"Rejected {importer.counts['rejected']} rows (details in {args.rejects}):")
+        for reason, n in Counter(r["reason"] for r in importer.rejected).most_common():
+            print(f"  {n:>7}  {reason}")
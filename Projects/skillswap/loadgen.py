@@ -0,0 +1,86 @@
+"""
+Load generator for the match query service — opens a number of keep-alive
+connections, each sending queries back to back for a fixed time, and reports
+throughput and latency percentiles.
+
+User ids are taken from the service's data file, and a share of the queries
+can be pair scores instead of top matches.
+
+Usage, from the Projects directory:
+    python -m skillswap.service --workers 4 &
+    python -m skillswap.loadgen --connections 64 --seconds 20
+"""
+
+import asyncio, random, time
+from typing import List, Dict, Any, Optional
+
+from .store import read_data
+from .service import HOST, PORT
+
+# ---------------- Config ----------------
+CONNECTIONS = 32
+SECONDS = 10.0
+SCORE_SHARE = 0.2       # fraction of queries that score a pair instead of asking for matches
+K = 10
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, target: str) -> int:
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    length = 0
+    for line in head.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(head.split(" ", 2)[1])
+
+async def _connection(host: str, port: int, user_ids: List[str], deadline: float,
+                      score_share: float, seed: int, latencies: List[float], errors: List[int]):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < score_share:
+                target = f"/score?a={rng.choice(user_ids)}&b={rng.choice(user_ids)}"
+            else:
+                target = f"/matches?user={rng.choice(user_ids)}&k={K}"
+            started = time.perf_counter()
+            status = await _get(reader, writer, host, target)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def run(host: str = HOST, port: int = PORT, connections: int = CONNECTIONS, seconds: float = SECONDS,
+              score_share: float = SCORE_SHARE, user_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    user_ids = user_ids or [u["id"] for u in read_data().get("users", [])]
+    latencies: List[float] = []
+    errors: List[int] = []
+    started = time.perf_counter()
+    await asyncio.gather(*[_connection(host, port, user_ids, started + seconds, score_share, n, latencies, errors)
+                           for n in range(connections)])
+    elapsed = time.perf_counter() - started
+    return {"connections": connections, "queries": len(latencies), "errors": len(errors),
+            "qps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2)}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure match query service throughput")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--connections", type=int, default=CONNECTIONS, help="concurrent keep-alive connections")
+    parser.add_argument("--seconds", type=float, default=SECONDS)
+    parser.add_argument("--score-share", type=float, default=SCORE_SHARE, help="fraction of pair-score queries")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.connections, args.seconds, args.score_share))
+    print(f"{result['queries']} queries over {result['connections']} connections: {result['qps']} q/s, "
+          f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, {result['errors']} errors")
@@ -0,0 +1,98 @@
+"""
+Location normalization — free-text locations ("Mumbai", "mumbai, India",
+"Bombay") reduced to one canonical id per city, and a location→users index
+so local matching reads one list instead of scanning every profile.
+
+The canonical id is the city part before the first comma, lower-cased, with
+punctuation and repeated spaces removed and well-known alternate names
+mapped through ALIASES. Cities of the same name in different countries
+share an id.
+
+Usage, from the Projects directory:
+    python -m skillswap.locations            # users per canonical location
+    python -m skillswap.locations --rebuild  # re-index from the profiles first
+"""
+
+import functools, re
+from typing import List, Dict, Any
+
+from .store import get_index, read_index
+
+# ---------------- Config ----------------
+ALIASES = {
+    "bombay": "mumbai",
+    "bengaluru": "bangalore",
+    "new delhi": "delhi",
+    "ncr": "delhi",
+    "gurugram": "gurgaon",
+    "calcutta": "kolkata",
+    "madras": "chennai",
+    "poona": "pune",
+    "nyc": "new york",
+    "new york city": "new york",
+    "sf": "san francisco",
+    "la": "los angeles",
+    "wfh": "remote",
+    "anywhere": "remote",
+    "online": "remote",
+}
+
+# ---------------- Normalization ----------------
+@functools.lru_cache(maxsize=65536)
+def canonical_location(raw: str) -> str:
+    # "" for an empty or unusable location, which never matches anything
+    city = (raw or "").split(",")[0].lower()
+    city = " ".join(re.sub(r"[^\w\s]", " ", city).split())
+    return ALIASES.get(city, city)
+
+def user_location(user: Dict[str, Any]) -> str:
+    return canonical_location(user.get("location") or "")
+
+def location_label(location_id: str) -> str:
+    return location_id.title() if location_id else "Unknown"
+
+# ---------------- Index ----------------
+def index_location(data: Dict[str, Any], user: Dict[str, Any], sign: int = 1):
+    # sign=-1 takes a profile back out, e.g. before an edit or on deletion
+    location_id = user_location(user)
+    if not location_id:
+        return
+    index = get_index(data, "locations")
+    if sign > 0:
+        index.setdefault(location_id, []).append(user["id"])
+    else:
+        ids = index.get(location_id, [])
+        if user["id"] in ids:
+            ids.remove(user["id"])
+        if not ids:
+            index.pop(location_id, None)
+
+def rebuild_locations(data: Dict[str, Any]) -> Dict[str, List[str]]:
+    data.setdefault("indexes", {})["locations"] = {}
+    for user in data.get("users", []):
+        index_location(data, user)
+    return data["indexes"]["locations"]
+
+def users_near(data: Dict[str, Any], user: Dict[str, Any]) -> List[str]:
+    # Ids of everyone in the same canonical location, the user included
+    location_id = user_location(user)
+    return read_index(data, "locations").get(location_id, []) if location_id else []
+
+def location_counts(data: Dict[str, Any]) -> Dict[str, int]:
+    # Users per location label, largest first
+    counts = sorted(((location_label(loc), len(ids)) for loc, ids in read_index(data, "locations").items()),
+                    key=lambda x: x[1], reverse=True)
+    return dict(counts)
+
+if __name__ == "__main__":
+    import argparse
+    from .store import read_data, update_data
+
+    parser = argparse.ArgumentParser(description="Show or rebuild the SkillSwap location index")
+    parser.add_argument("--rebuild", action="store_true", help="re-index from the profiles first")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"Indexed {len(update_data(rebuild_locations))} locations")
+    for label, n in location_counts(read_data()).items():
+        print(f"{label:<24} {n:>8}")
@@ -0,0 +1,128 @@
+"""
+Skill market — how many users offer and want each skill, overall and per
+canonical location, kept in the "skills" index as profiles are created,
+edited and deleted so pages never count skills by scanning users.
+
+The ratio of wanted to offered shows which skills are undersupplied; the
+same numbers weight Discover towards partners who teach scarce skills.
+
+Usage, from the Projects directory:
+    python -m skillswap.market            # top skill gaps
+    python -m skillswap.market --rebuild  # recount from the profiles first
+"""
+
+from typing import List, Dict, Any, Iterable, Optional
+
+from .store import add_record, get_index, read_index, record_position
+from .locations import canonical_location, user_location, index_location
+
+# ---------------- Config ----------------
+SIDES = {"skills_offered": "offered", "skills_wanted": "wanted"}
+UNKNOWN_LOCATION = ""   # bucket for profiles without a usable location
+DEMAND_BONUS = 0.5      # ranking boost for a partner teaching a skill nobody else offers
+
+def location_key(user: Dict[str, Any]) -> str:
+    return user_location(user) or UNKNOWN_LOCATION
+
+# ---------------- Updates ----------------
+def index_user(data: Dict[str, Any], user: Dict[str, Any], sign: int = 1):
+    # sign=-1 takes a profile back out, e.g. before an edit or on deletion
+    market = get_index(data, "skills")
+    loc = location_key(user)
+    for field, side in SIDES.items():
+        for skill in set(user.get(field, [])):
+            entry = market.setdefault(skill, {"offered": 0, "wanted": 0, "locations": {}})
+            entry[side] += sign
+            local = entry["locations"].setdefault(loc, {"offered": 0, "wanted": 0})
+            local[side] += sign
+            if not local["offered"] and not local["wanted"]:
+                del entry["locations"][loc]
+            if not entry["offered"] and not entry["wanted"]:
+                del market[skill]
+
+def unindex_user(data: Dict[str, Any], user: Dict[str, Any]):
+    index_user(data, user, -1)
+
+def add_user(data: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
+    add_record(data, "users", user)
+    index_user(data, user)
+    index_location(data, user)
+    return user
+
+def update_user(data: Dict[str, Any], user_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Profile edits go through here so the skill counts and location index follow them
+    pos = record_position(data, "users", user_id)
+    if pos is None:
+        return None
+    user = data["users"][pos]
+    unindex_user(data, user)
+    index_location(data, user, -1)
+    user.update(changes)
+    index_user(data, user)
+    index_location(data, user)
+    return user
+
+def rebuild_market(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Recovers the index from the profiles, e.g. after an import
+    data.setdefault("indexes", {})["skills"] = {}
+    for user in data.get("users", []):
+        index_user(data, user)
+    return data["indexes"]["skills"]
+
+# ---------------- Queries ----------------
+def skill_counts(data: Dict[str, Any], skill: str, location: Optional[str] = None) -> Dict[str, int]:
+    entry = read_index(data, "skills").get(skill, {})
+    if location is not None:
+        entry = entry.get("locations", {}).get(location, {})
+    return {"offered": entry.get("offered", 0), "wanted": entry.get("wanted", 0)}
+
+def ratio(offered: int, wanted: int) -> float:
+    return wanted / offered if offered else float("inf") if wanted else 0.0
+
+def skill_gaps(data: Dict[str, Any], k: int = 10, location: Optional[str] = None) -> List[Dict[str, Any]]:
+    # Skills wanted more than offered, the largest shortfall first
+    rows = []
+    for skill in read_index(data, "skills"):
+        counts = skill_counts(data, skill, location)
+        if counts["wanted"] > counts["offered"]:
+            rows.append({"skill": skill, **counts, "ratio": ratio(counts["offered"], counts["wanted"]),
+                         "gap": counts["wanted"] - counts["offered"]})
+    rows.sort(key=lambda r: (r["gap"], r["ratio"]), reverse=True)
+    return rows[:k]
+
+def most_offered(data: Dict[str, Any], k: int = 10) -> List[tuple]:
+    market = read_index(data, "skills")
+    return sorted(((s, e["offered"]) for s, e in market.items() if e["offered"]), key=lambda x: x[1], reverse=True)[:k]
+
+def total_offered(data: Dict[str, Any]) -> int:
+    return sum(e["offered"] for e in read_index(data, "skills").values())
+
+def market_locations(data: Dict[str, Any]) -> List[str]:
+    return sorted({loc for e in read_index(data, "skills").values() for loc in e.get("locations", {})})
+
+def scarcity(data: Dict[str, Any], skill: str) -> float:
+    # Share of the interest in a skill that is demand: 0 when nobody wants it, 1 when nobody offers it
+    counts = skill_counts(data, skill)
+    total = counts["offered"] + counts["wanted"]
+    return counts["wanted"] / total if total else 0.0
+
+def demand_weight(data: Dict[str, Any], skills: Iterable[str], bonus: float = DEMAND_BONUS) -> float:
+    # Multiplier for a match on the scarcest of the skills it would teach
+    return 1 + bonus * max((scarcity(data, s) for s in skills), default=0.0)
+
+if __name__ == "__main__":
+    import argparse
+    from .store import read_data, update_data
+
+    parser = argparse.ArgumentParser(description="Show SkillSwap skill supply and demand")
+    parser.add_argument("--rebuild", action="store_true", help="recount from the profiles first")
+    parser.add_argument("--location", help="limit to one location")
+    parser.add_argument("-k", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"Counted {len(update_data(rebuild_market))} skills")
+    data = read_data()
+    print(f"{'skill':<24} {'offered':>8} {'wanted':>8} {'ratio':>7}")
+    for row in skill_gaps(data, args.k, None if args.location is None else canonical_location(args.location)):
+        print(f"{row['skill']:<24} {row['offered']:>8} {row['wanted']:>8} {row['ratio']:>7.2f}")
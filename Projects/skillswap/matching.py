@@ -0,0 +1,195 @@
+"""
+Compatibility scoring between two SkillSwap profiles.
+"""
+
+import functools
+from typing import List, Dict, Any, NamedTuple, Callable, Optional
+
+from .locations import user_location
+
+# Each endorsement of a taught skill adds a point of proficiency, capped per skill
+ENDORSEMENT_POINTS = 1
+ENDORSEMENT_CAP = 3
+
+class ScoreWeights(NamedTuple):
+    # Points behind each part of the score; the defaults are the production weights
+    reciprocity: float = 40         # per direction, times the share of the partner's wants covered
+    expert: float = 6               # per taught skill at each proficiency level
+    intermediate: float = 3
+    endorsement: float = ENDORSEMENT_POINTS
+    endorsement_cap: float = ENDORSEMENT_CAP
+    engagement_cap: float = 10      # one point per swap either user has completed, up to this
+    rating: float = 0.5             # per star of the pair's average rating
+    response: float = 0.1           # per percent of the pair's average response rate
+    location: float = 5
+    interest: float = 2             # per shared interest
+
+DEFAULT_WEIGHTS = ScoreWeights()
+
+def compatibility_score(a: Dict[str, Any], b: Dict[str, Any],
+                        weights: ScoreWeights = DEFAULT_WEIGHTS) -> tuple[float, Dict[str, Any]]:
+    w = weights
+    offers_a = set(a["skills_offered"])
+    wants_a = set(a["skills_wanted"])
+    offers_b = set(b["skills_offered"])
+    wants_b = set(b["skills_wanted"])
+    
+    a_to_b = offers_a.intersection(wants_b)
+    b_to_a = offers_b.intersection(wants_a)
+    
+    reciprocity = 0
+    if wants_b and a_to_b:
+        reciprocity += (len(a_to_b) / len(wants_b)) * w.reciprocity
+    if wants_a and b_to_a:
+        reciprocity += (len(b_to_a) / len(wants_a)) * w.reciprocity
+    
+    proficiency = 0
+    prof_a = a.get("proficiency", {})
+    endorsed_a = a.get("endorsements_by_skill", {})
+    for skill in a_to_b:
+        if skill in prof_a:
+            if prof_a[skill] == "Expert":
+                proficiency += w.expert
+            elif prof_a[skill] == "Intermediate":
+                proficiency += w.intermediate
+        proficiency += min(endorsed_a.get(skill, 0) * w.endorsement, w.endorsement_cap)
+    
+    engagement = min(a.get("swaps_completed", 0) + b.get("swaps_completed", 0), w.engagement_cap)
+    rating = ((a.get("rating", 0) + b.get("rating", 0)) / 2) * w.rating
+    response = ((a.get("response_rate", 100) + b.get("response_rate", 100)) / 2) * w.response
+    
+    # Compared as canonical ids, so "Mumbai" and "Mumbai, India" count as the same place
+    location_a = user_location(a)
+    same_place = bool(location_a) and location_a == user_location(b)
+    location_bonus = w.location if same_place else 0
+    
+    interests_a = set(a.get("interests", []))
+    interests_b = set(b.get("interests", []))
+    interest_overlap = len(interests_a.intersection(interests_b)) * w.interest
+    
+    total = min(reciprocity + proficiency + engagement + rating + response + location_bonus + interest_overlap, 100)
+    
+    details = {
+        "reciprocity": round(reciprocity, 1),
+        "proficiency": round(proficiency, 1),
+        "engagement": round(engagement, 1),
+        "rating": round(rating, 1),
+        "response_rate": round(response, 1),
+        "location_match": same_place,
+        "mutual_skills": list(a_to_b.union(b_to_a)),
+        "common_interests": list(interests_a.intersection(interests_b))
+    }
+    
+    return round(total, 1), details
+
+# ---------------- Batch Scoring ----------------
+class ScoreProfile(NamedTuple):
+    offers: frozenset
+    wants: frozenset
+    proficiency: Dict[str, str]
+    endorsed: Dict[str, int]
+    swaps: int
+    rating: float
+    response: float
+    location: str
+    interests: frozenset
+
+def score_profile(user: Dict[str, Any]) -> ScoreProfile:
+    # The parts of a profile compatibility_score reads, with the sets built once
+    return ScoreProfile(frozenset(user["skills_offered"]), frozenset(user["skills_wanted"]),
+                        user.get("proficiency", {}), user.get("endorsements_by_skill", {}),
+                        user.get("swaps_completed", 0), user.get("rating", 0), user.get("response_rate", 100),
+                        user_location(user), frozenset(user.get("interests", [])))
+
+Scorer = Callable[[ScoreProfile, List[ScoreProfile]], List[float]]
+
+@functools.lru_cache(maxsize=256)
+def compile_scorer(weights: ScoreWeights = DEFAULT_WEIGHTS) -> Scorer:
+    # The weights become closure constants of a specialised loop, so scoring
+    # under many configurations costs no attribute lookups per pair
+    (w_reciprocity, w_expert, w_intermediate, w_endorsement, w_endorsement_cap,
+     w_engagement_cap, w_rating, w_response, w_location, w_interest) = weights
+    
+    def scorer(a: ScoreProfile, others: List[ScoreProfile]) -> List[float]:
+        # compatibility_score(a, b, weights)[0] for every b, without the details;
+        # the arithmetic is kept in the same order so the totals are identical
+        a_offers, a_wants, a_proficiency, a_endorsed = a.offers, a.wants, a.proficiency, a.endorsed
+        a_swaps, a_rating, a_response, a_location, a_interests = a.swaps, a.rating, a.response, a.location, a.interests
+        scores = []
+        for b in others:
+            a_to_b = a_offers & b.wants
+            b_to_a = b.offers & a_wants
+            reciprocity = 0
+            if b.wants and a_to_b:
+                reciprocity += (len(a_to_b) / len(b.wants)) * w_reciprocity
+            if a_wants and b_to_a:
+                reciprocity += (len(b_to_a) / len(a_wants)) * w_reciprocity
+            proficiency = 0
+            for skill in a_to_b:
+                level = a_proficiency.get(skill)
+                if level == "Expert":
+                    proficiency += w_expert
+                elif level == "Intermediate":
+                    proficiency += w_intermediate
+                proficiency += min(a_endorsed.get(skill, 0) * w_endorsement, w_endorsement_cap)
+            engagement = min(a_swaps + b.swaps, w_engagement_cap)
+            rating = ((a_rating + b.rating) / 2) * w_rating
+            response = ((a_response + b.response) / 2) * w_response
+            location_bonus = w_location if a_location and a_location == b.location else 0
+            interest_overlap = len(a_interests & b.interests) * w_interest
+            scores.append(round(min(reciprocity + proficiency + engagement + rating + response + location_bonus + interest_overlap, 100), 1))
+        return scores
+    
+    return scorer
+
+def batch_scores(a: ScoreProfile, others: List[ScoreProfile], weights: ScoreWeights = DEFAULT_WEIGHTS) -> List[float]:
+    return compile_scorer(weights)(a, others)
+
+ManyScorer = Callable[[List[ScoreProfile], List[ScoreProfile], Optional[List[List[int]]]], List[List[float]]]
+
+@functools.lru_cache(maxsize=256)
+def compile_many_scorer(weights: ScoreWeights = DEFAULT_WEIGHTS) -> ManyScorer:
+    # Several profiles against one candidate list in a single pass: each candidate
+    # is unpacked once for all of them instead of once per profile
+    (w_reciprocity, w_expert, w_intermediate, w_endorsement, w_endorsement_cap,
+     w_engagement_cap, w_rating, w_response, w_location, w_interest) = weights
+    
+    def scorer(profiles: List[ScoreProfile], others: List[ScoreProfile],
+               takers: Optional[List[List[int]]] = None) -> List[List[float]]:
+        # rows[i] holds profiles[i]'s scores against the others it is scored against, in
+        # their order: all of them, or those whose takers list names i. The arithmetic
+        # is the same as compile_scorer's, in the same order, so the totals are identical
+        rows: List[List[float]] = [[] for _ in profiles]
+        queriers = [(row,) + tuple(a) for row, a in zip(rows, profiles)]
+        for j, b in enumerate(others):
+            b_offers, b_wants, _, _, b_swaps, b_rating, b_response, b_location, b_interests = b
+            for (row, a_offers, a_wants, a_proficiency, a_endorsed, a_swaps, a_rating,
+                 a_response, a_location, a_interests) in (queriers if takers is None else [queriers[i] for i in takers[j]]):
+                a_to_b = a_offers & b_wants
+                b_to_a = b_offers & a_wants
+                reciprocity = 0
+                if b_wants and a_to_b:
+                    reciprocity += (len(a_to_b) / len(b_wants)) * w_reciprocity
+                if a_wants and b_to_a:
+                    reciprocity += (len(b_to_a) / len(a_wants)) * w_reciprocity
+                proficiency = 0
+                for skill in a_to_b:
+                    level = a_proficiency.get(skill)
+                    if level == "Expert":
+                        proficiency += w_expert
+                    elif level == "Intermediate":
+                        proficiency += w_intermediate
+                    proficiency += min(a_endorsed.get(skill, 0) * w_endorsement, w_endorsement_cap)
+                engagement = min(a_swaps + b_swaps, w_engagement_cap)
+                rating = ((a_rating + b_rating) / 2) * w_rating
+                response = ((a_response + b_response) / 2) * w_response
+                location_bonus = w_location if a_location and a_location == b_location else 0
+                interest_overlap = len(a_interests & b_interests) * w_interest
+                row.append(round(min(reciprocity + proficiency + engagement + rating + response + location_bonus + interest_overlap, 100), 1))
+        return rows
+    
+    return scorer
+
+def batch_scores_many(profiles: List[ScoreProfile], others: List[ScoreProfile], takers: Optional[List[List[int]]] = None,
+                      weights: ScoreWeights = DEFAULT_WEIGHTS) -> List[List[float]]:
+    return compile_many_scorer(weights)(profiles, others, takers)
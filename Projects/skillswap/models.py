@@ -0,0 +1,47 @@
+"""
+Record constructors for users and swap requests.
+"""
+
+import uuid, datetime
+from typing import List, Dict, Any
+
+def make_user(name: str, email: str, bio: str, offered: List[str], wanted: List[str], 
+              proficiency: Dict[str, str], location: str = "", interests: List[str] = []) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "email": email,
+        "bio": bio,
+        "location": location,
+        "interests": interests,
+        "skills_offered": [s.strip().lower() for s in offered if s.strip()],
+        "skills_wanted": [s.strip().lower() for s in wanted if s.strip()],
+        "proficiency": proficiency,
+        "rating": 5.0,
+        "swaps_completed": 0,
+        "endorsements_received": 0,
+        "endorsements_by_skill": {},
+        "badges": [],
+        "level": 1,
+        "experience_points": 0,
+        "availability": "Available",
+        "response_rate": 100,
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "last_active": datetime.datetime.utcnow().isoformat()
+    }
+
+def make_request(sender_id: str, receiver_id: str, skill_offered: str, skill_wanted: str, 
+                message: str = "", priority: str = "Medium") -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "skill_offered": skill_offered,
+        "skill_wanted": skill_wanted,
+        "message": message,
+        "priority": priority,
+        "status": "Pending",
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "updated_at": datetime.datetime.utcnow().isoformat(),
+        "viewed": False
+    }
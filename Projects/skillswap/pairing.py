@@ -0,0 +1,132 @@
+"""
+Pairing rounds — pair every available user at once for cohort events.
+
+Scores each user against a bounded set of candidates from the skill postings
+(a sparse top-K graph instead of a dense matrix), then takes the heaviest
+compatible pairs greedily, which is within a factor of two of the
+maximum-weight matching.
+"""
+
+import heapq, time
+from typing import List, Dict, Any, Tuple, Optional
+
+from .matching import compatibility_score
+from .lsh import LSHIndex, build_index
+from .models import make_request
+from .swaps import add_request
+
+# ---------------- Config ----------------
+TOP_K = 10              # strongest candidates kept per user
+POSTING_WINDOW = 8      # users scanned per skill posting
+MIN_SCORE = 40          # weakest pair worth proposing
+APPROX_PROBES = 20      # LSH bands probed per user in approximate mode, about 90% recall
+
+Graph = Dict[Tuple[str, str], float]
+
+# ---------------- Candidate Graph ----------------
+def available_users(users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [u for u in users if u.get("availability", "Available") == "Available"]
+
+def candidate_ids(users: List[Dict[str, Any]], window: int = POSTING_WINDOW) -> Dict[str, set]:
+    # Anyone who teaches what I want or wants what I teach; each user reads a
+    # different window of a popular posting so the work stays bounded
+    offered_by: Dict[str, List[str]] = {}
+    wanted_by: Dict[str, List[str]] = {}
+    for u in users:
+        for s in set(u["skills_offered"]):
+            offered_by.setdefault(s, []).append(u["id"])
+        for s in set(u["skills_wanted"]):
+            wanted_by.setdefault(s, []).append(u["id"])
+    
+    candidates: Dict[str, set] = {}
+    for i, u in enumerate(users):
+        found = candidates.setdefault(u["id"], set())
+        for postings, skills in ((offered_by, u["skills_wanted"]), (wanted_by, u["skills_offered"])):
+            for s in set(skills):
+                posting = postings.get(s, [])
+                size = min(window, len(posting))
+                start = (i * size) % len(posting) if posting else 0
+                for j in range(start, start + size):
+                    found.add(posting[j % len(posting)])
+        found.discard(u["id"])
+    return candidates
+
+def pair_score(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    # compatibility_score is one-sided; both directions are averaged so an edge weighs
+    # the same whichever of its users it was scored from
+    return round((compatibility_score(a, b)[0] + compatibility_score(b, a)[0]) / 2, 1)
+
+def top_k_graph(users: List[Dict[str, Any]], k: int = TOP_K, window: int = POSTING_WINDOW, 
+                min_score: float = MIN_SCORE, index: Optional[LSHIndex] = None, 
+                probes: Optional[int] = None) -> Graph:
+    by_id = {u["id"]: u for u in users}
+    if index is not None:
+        candidates = {u["id"]: {i for i in index.candidates(u, probes or APPROX_PROBES) if i in by_id} for u in users}
+    else:
+        candidates = candidate_ids(users, window)
+    
+    graph: Graph = {}
+    for user_id, others in candidates.items():
+        me = by_id[user_id]
+        scored = []
+        for other_id in others:
+            key = (user_id, other_id) if user_id < other_id else (other_id, user_id)
+            if key in graph:
+                continue
+            score = pair_score(me, by_id[other_id])
+            if score >= min_score:
+                scored.append((score, key))
+        for score, key in heapq.nlargest(k, scored):
+            graph[key] = score
+    return graph
+
+# ---------------- Matching ----------------
+def greedy_matching(graph: Graph) -> List[Tuple[str, str, float]]:
+    matched = set()
+    pairs = []
+    for (a, b), score in sorted(graph.items(), key=lambda kv: kv[1], reverse=True):
+        if a not in matched and b not in matched:
+            matched.update((a, b))
+            pairs.append((a, b, score))
+    return pairs
+
+def pick_skills(a: Dict[str, Any], b: Dict[str, Any]) -> Tuple[str, str]:
+    gives = sorted(set(a["skills_offered"]) & set(b["skills_wanted"])) or a["skills_offered"] or [""]
+    gets = sorted(set(b["skills_offered"]) & set(a["skills_wanted"])) or b["skills_offered"] or [""]
+    return gives[0], gets[0]
+
+def run_pairing_round(data: Dict[str, Any], k: int = TOP_K, min_score: float = MIN_SCORE, 
+                      approximate: bool = False, probes: Optional[int] = None) -> List[Dict[str, Any]]:
+    users = available_users(data.get("users", []))
+    by_id = {u["id"]: u for u in users}
+    index = build_index(users) if approximate else None
+    pairs = greedy_matching(top_k_graph(users, k, min_score=min_score, index=index, probes=probes))
+    
+    # All requests go into the data in one batch so the caller saves them in a single write
+    new_requests = []
+    for a_id, b_id, score in pairs:
+        skill_offered, skill_wanted = pick_skills(by_id[a_id], by_id[b_id])
+        new_requests.append(make_request(a_id, b_id, skill_offered, skill_wanted, 
+                                         f"Paired in this round ({score} match)", "High"))
+    # The same open request is never created twice
+    return [req for req in new_requests if add_request(data, req)]
+
+if __name__ == "__main__":
+    import argparse
+    from .store import read_data, update_data
+    
+    parser = argparse.ArgumentParser(description="Pair all available SkillSwap users at once")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE)
+    parser.add_argument("--approximate", action="store_true", help="draw candidates from LSH buckets")
+    parser.add_argument("--probes", type=int, default=None, help="LSH bands probed per user (recall vs speed)")
+    parser.add_argument("--dry-run", action="store_true", help="report pairs without saving them")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    data = read_data()
+    created = run_pairing_round(data, args.top_k, args.min_score, args.approximate, args.probes)
+    if not args.dry_run:
+        update_data(lambda d: [add_request(d, req) for req in created])
+    print(f"Paired {len(created) * 2} users into {len(created)} requests "
+          f"in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,455 @@
+"""
+Hash-partitioned storage — users and everything they own are spread over N
+partition files by a stable hash of the user id, so processes writing for
+different users mostly commit to different files.
+
+Requests live in their sender's partition; when the receiver hashes to
+another partition, a small reference is kept there too so a user's inbox can
+be read from their own partition plus the few partitions it points at.
+Per-user indexes (mailboxes, owned records, open requests, endorsements,
+location lists) are split the same way; record positions are renumbered
+on every merge instead of being stored. Counters (request rollups, skill
+counts) are held as per-partition shares that add up to the total, and a
+commit's change to them goes to a partition it writes anyway. What belongs
+to nobody in particular (the archive manifest, swap circles) lives in a
+separate global part, so only writes to those contend across users.
+
+Every part is a VersionedStore. A commit locks the parts it writes, in file
+order, checks that none moved since it loaded them, and only then publishes
+them, so a commit spanning several partitions lands whole or not at all. A
+writer that finds a part moved reloads and replays its mutation.
+
+A manifest names the live layout; rebalancing holds every part's lock while
+it writes a new layout next to the old one and switches the manifest over.
+
+Usage, from the Projects directory:
+    python -m skillswap.partitions --init 8        # split data.json into 8 partitions
+    python -m skillswap.partitions --rebalance 16  # move to 16 partitions
+    python -m skillswap.partitions --stats
+"""
+
+from pathlib import Path
+import argparse, contextlib, json, numbers, os, time, zlib
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+from . import columns
+from .store import VersionedStore, COLLECTIONS, DATA_FILE, empty_data, generation_path, rebuild_positions, stamp_versions, _stamp
+
+# ---------------- Config ----------------
+PARTITION_DIR = Path("data")
+MANIFEST = "manifest.json"
+
+# Field naming the user that owns each record
+OWNERS = {
+    "users": "id",
+    "requests": "sender_id",
+    "messages": "sender_id",
+    "endorsements": "endorsee_id",
+    "achievements": "user_id",
+}
+
+# Indexes keyed by something naming a user, split like the records they point at
+USER_INDEXES = {
+    "mailboxes": lambda key: key,
+    "owned": lambda key: key,
+    "open_requests": lambda key: key.split(":")[0],     # sender:receiver, kept with the sender's requests
+    "endorsements": lambda key: key.split(":")[1],      # endorser:endorsee:skill, kept with the endorsee
+}
+# Indexes mapping a key to a list of user ids, split per user
+USER_LISTS = ["locations"]
+# Nested counters held as per-partition shares that add up to the total
+COUNTERS = [("rollups",), ("indexes", "skills")]
+
+Shares = List[Dict[Tuple[str, ...], Any]]
+Prepared = Tuple[List[Tuple[int, Tuple[Any, ...], Dict[Tuple[str, ...], Any]]], Optional[bytes]]
+
+# ---------------- Routing ----------------
+def partition_of(user_id: str, partitions: int) -> int:
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(str(user_id).encode("utf-8")) % partitions
+
+def read_manifest(root: Path = PARTITION_DIR) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((root / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+def write_manifest(root: Path, manifest: Dict[str, Any]):
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f".{MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, root / MANIFEST)
+
+# ---------------- Counters ----------------
+def _get_path(doc: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(doc, dict) or key not in doc:
+            return None
+        doc = doc[key]
+    return doc
+
+def _set_path(doc: Dict[str, Any], path: Tuple[str, ...], value: Any):
+    for key in path[:-1]:
+        doc = doc.setdefault(key, {})
+    doc[path[-1]] = value
+
+def add_shares(shares: Iterable[Any]) -> Any:
+    # Sum of nested counters: dicts key by key (sorted, so time-keyed buckets stay
+    # in order), lists element by element, numbers as numbers
+    present = [s for s in shares if s is not None]
+    if not present:
+        return None
+    if isinstance(present[0], dict):
+        keys = sorted({k for s in present for k in s})
+        return {k: add_shares([s.get(k) for s in present]) for k in keys}
+    if isinstance(present[0], list):
+        width = max(len(s) for s in present)
+        return [sum(s[i] for s in present if i < len(s)) for i in range(width)]
+    if isinstance(present[0], numbers.Number):
+        return sum(present)
+    return present[-1]
+
+def distribute(total: Any, shares: List[Any], carrier: int) -> List[Any]:
+    # Each partition's new share of total: shares stay as they are where the sum still
+    # matches, the difference goes to the carrier, and keys gone from total leave every share
+    if isinstance(total, dict):
+        result: List[Any] = [{} if isinstance(s, dict) else None for s in shares]
+        for key, value in total.items():
+            subs = [s.get(key) if isinstance(s, dict) else None for s in shares]
+            for i, part in enumerate(distribute(value, subs, carrier)):
+                if part is not None:
+                    if result[i] is None:
+                        result[i] = {}
+                    result[i][key] = part
+        return result
+    if isinstance(total, list):
+        out = [None if s is None else (list(s) + [0] * len(total))[:len(total)] for s in shares]
+        held = [sum(s[i] for s in out if s is not None) for i in range(len(total))]
+        if held != total:
+            base = out[carrier] or [0] * len(total)
+            out[carrier] = [b + t - h for b, t, h in zip(base, total, held)]
+        return out
+    if isinstance(total, numbers.Number):
+        out = list(shares)
+        held = sum(s for s in shares if s is not None)
+        if held != total:
+            out[carrier] = (out[carrier] or 0) + total - held
+        return out
+    out = [None] * len(shares)
+    out[carrier] = total
+    return out
+
+def counter_shares(doc: Dict[str, Any]) -> Dict[Tuple[str, ...], Any]:
+    return {path: _get_path(doc, path) for path in COUNTERS}
+
+def split_counters(data: Dict[str, Any], held: Shares, carrier: int) -> Shares:
+    # The counters of data as shares, against the shares the partitions hold now
+    shares: Shares = [{} for _ in held]
+    for path in COUNTERS:
+        total = _get_path(data, path)
+        parts = [None] * len(held) if total is None else distribute(total, [h.get(path) for h in held], carrier)
+        for share, part in zip(shares, parts):
+            share[path] = part
+    return shares
+
+def _set_counters(doc: Dict[str, Any], shares: Dict[Tuple[str, ...], Any]):
+    for path, share in shares.items():
+        if share is not None:
+            _set_path(doc, path, share)
+        elif isinstance(_get_path(doc, path[:-1]), dict):
+            _get_path(doc, path[:-1]).pop(path[-1], None)
+
+# ---------------- Split and Merge ----------------
+def split(data: Dict[str, Any], partitions: int, counters: Optional[Shares] = None) -> List[Dict[str, Any]]:
+    # One document per partition, plus the global part last. Counters are given as
+    # each partition's share; by default partition 0 holds them all
+    docs = [empty_data() for _ in range(partitions)]
+    for doc in docs:
+        doc["request_refs"] = []
+        doc["indexes"] = {name: {} for name in list(USER_INDEXES) + USER_LISTS}
+    for coll in COLLECTIONS:
+        field = OWNERS[coll]
+        for rec in data.get(coll, []):
+            docs[partition_of(rec.get(field, ""), partitions)][coll].append(rec)
+    for req in data.get("requests", []):
+        home = partition_of(req.get("sender_id", ""), partitions)
+        there = partition_of(req.get("receiver_id", ""), partitions)
+        if there != home:
+            docs[there]["request_refs"].append({"id": req["id"], "receiver_id": req["receiver_id"], "partition": home})
+    for doc in docs:
+        # Merging reorders requests, so refs are kept sorted to stay stable across loads
+        doc["request_refs"].sort(key=lambda ref: ref["id"])
+
+    indexes = data.get("indexes", {})
+    for name, owner in USER_INDEXES.items():
+        for key, value in indexes.get(name, {}).items():
+            docs[partition_of(owner(key), partitions)]["indexes"][name][key] = value
+    for name in USER_LISTS:
+        # Keys come in sorted, since a merge orders them by whichever partition had them
+        # first; otherwise every commit would rewrite every partition's lists
+        for key, user_ids in sorted(indexes.get(name, {}).items()):
+            for user_id in user_ids:
+                docs[partition_of(user_id, partitions)]["indexes"][name].setdefault(key, []).append(user_id)
+
+    if counters is None:
+        counters = split_counters(data, [{} for _ in range(partitions)], 0)
+    for doc, shares in zip(docs, counters):
+        _set_counters(doc, shares)
+
+    # Record positions are not stored per partition: merging renumbers them
+    split_out = (set(USER_INDEXES) | set(USER_LISTS) | {path[1] for path in COUNTERS if path[0] == "indexes"}
+                 | {"positions"})
+    shared = {k: v for k, v in data.items()
+              if k not in COLLECTIONS and k != "generation" and (k,) not in COUNTERS}
+    if "indexes" in shared:
+        shared["indexes"] = {k: v for k, v in shared["indexes"].items() if k not in split_out}
+    return docs + [shared]
+
+def merge(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    data = empty_data()
+    for doc in docs[:-1]:
+        for coll in COLLECTIONS:
+            data[coll].extend(doc.get(coll, []))
+    data.update({k: v for k, v in docs[-1].items() if k not in COLLECTIONS and k != "generation"})
+    indexes = data.setdefault("indexes", {})
+    for name in list(USER_INDEXES) + USER_LISTS:
+        merged: Dict[str, Any] = {}
+        for doc in docs[:-1]:
+            for key, value in doc.get("indexes", {}).get(name, {}).items():
+                if name in USER_LISTS:
+                    merged.setdefault(key, []).extend(value)
+                else:
+                    merged[key] = value
+        if merged or any(name in doc.get("indexes", {}) for doc in docs[:-1]):
+            indexes[name] = merged
+    for path in COUNTERS:
+        total = add_shares([_get_path(doc, path) for doc in docs[:-1]])
+        if total is not None:
+            _set_path(data, path, total)
+    rebuild_positions(data)
+    return data
+
+# ---------------- Locking ----------------
+def lock_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.lock")
+
+@contextlib.contextmanager
+def locked(paths: Iterable[Path]) -> Iterator[None]:
+    # Exclusive locks on the given data files, always taken in the same order
+    handles = []
+    try:
+        for path in sorted(set(paths)):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(lock_path(path), "a+b")
+            handles.append(handle)
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        for handle in reversed(handles):
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            handle.close()
+
+def _moved(part: VersionedStore) -> bool:
+    # Published, or claimed by a writer that has not published yet, since we loaded it
+    return part.stale() or generation_path(part.path, part.generation + 1).exists()
+
+# ---------------- Partitioned Store ----------------
+class PartitionedStore:
+    # Same interface as VersionedStore, so WriteBehind and update_data work on either
+    def __init__(self, root: Path = PARTITION_DIR, columns: Optional[Path] = None):
+        self.root = root
+        self.columns = columns
+        # Versions the last published commit assigned, across its parts
+        self.published: Dict[Tuple[str, str], int] = {}
+        self._open()
+
+    def _open(self):
+        manifest = read_manifest(self.root)
+        if manifest is None:
+            raise FileNotFoundError(f"no partition manifest in {self.root}")
+        self.partitions = manifest["partitions"]
+        self.layout = self.root / manifest["layout"]
+        self.parts = [VersionedStore(self.layout / f"part-{i:03d}.json") for i in range(self.partitions)]
+        self.parts.append(VersionedStore(self.layout / "global.json"))
+        # Counter shares each partition held when last loaded or written
+        self._shares: Shares = [counter_shares({}) for _ in range(self.partitions)]
+        self._manifest = _stamp(self.root / MANIFEST)
+
+    def _relayout(self) -> bool:
+        if _stamp(self.root / MANIFEST) == self._manifest:
+            return False
+        self._open()
+        return True
+
+    def load(self) -> Dict[str, Any]:
+        self._relayout()
+        return self._merge([part.load() for part in self.parts])
+
+    def reload(self) -> Dict[str, Any]:
+        # Parts decode only what changed since they were last loaded or prepared
+        if self._relayout():
+            return self.load()
+        return self._merge([part.reload() for part in self.parts])
+
+    def _merge(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self._shares = [counter_shares(doc) for doc in docs[:-1]]
+        return merge(docs)
+
+    def load_user(self, user_id: str) -> Dict[str, Any]:
+        # A single user's view: their partition, plus the senders' partitions of their inbox
+        self._relayout()
+        index = partition_of(user_id, self.partitions)
+        own = self.parts[index].load()
+        user = next((u for u in own["users"] if u["id"] == user_id), None)
+        sent = [r for r in own["requests"] if r.get("sender_id") == user_id]
+        received = [r for r in own["requests"] if r.get("receiver_id") == user_id]
+        homes: Dict[int, set] = {}
+        for ref in own.get("request_refs", []):
+            if ref["receiver_id"] == user_id:
+                homes.setdefault(ref["partition"], set()).add(ref["id"])
+        for home, ids in homes.items():
+            received.extend(r for r in self.parts[home].load()["requests"] if r["id"] in ids)
+        return {"user": user, "sent": sent, "received": received}
+
+    @property
+    def generation(self) -> int:
+        # Every commit advances at least one part, so the sum only grows within a layout
+        return sum(part.generation for part in self.parts)
+
+    def stale(self) -> bool:
+        return _stamp(self.root / MANIFEST) != self._manifest or any(part.stale() for part in self.parts)
+
+    def prepare(self, data: Dict[str, Any]) -> Prepared:
+        # Only partitions whose content changed are written. Counter changes go to the
+        # first partition written anyway, so they never pull in a partition of their own
+        held = self._shares
+        docs = split(data, self.partitions, held)
+        payloads = [part.prepare(doc) for part, doc in zip(self.parts, docs)]
+        changed = {i for i, (part, payload) in enumerate(zip(self.parts, payloads)) if payload[1] != part.fingerprints}
+        carrier = min((i for i in changed if i < self.partitions), default=0)
+        shares = split_counters(data, held, carrier)
+        for i, share in enumerate(shares):
+            if share != held[i]:
+                _set_counters(docs[i], share)
+                payloads[i] = self.parts[i].prepare(docs[i])
+                changed.add(i)
+        prepared = [(i, payloads[i], shares[i] if i < self.partitions else {}) for i in sorted(changed)]
+        stats = columns.encode_columns(data, self.generation + len(prepared)) if self.columns else None
+        return prepared, stats
+
+    def publish(self, prepared: Prepared) -> bool:
+        parts, stats = prepared
+        with locked(self.parts[i].path for i, _, _ in parts):
+            # Checked under the locks: nothing is published unless every part can be
+            if _stamp(self.root / MANIFEST) != self._manifest:
+                return False
+            if any(_moved(self.parts[i]) for i, _, _ in parts):
+                return False
+            self.published = {}
+            for i, payload, shares in parts:
+                if not self.parts[i].publish(payload):
+                    raise RuntimeError(f"{self.parts[i].path} changed while locked; "
+                                       "is a writer without partition locks running?")
+                if i < self.partitions:
+                    self._shares[i] = shares
+                self.published.update(self.parts[i].published)
+        if stats is not None:
+            columns.install_columns(stats, self.columns)
+        return True
+
+    def stamped(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return stamp_versions(data, self.published)
+
+    def commit(self, data: Dict[str, Any]) -> bool:
+        return self.publish(self.prepare(data))
+
+    def rebase(self, data: Dict[str, Any], force: bool = False) -> Tuple[Dict[str, Any], bool]:
+        # Nothing of a failed commit was published, so the mutation is always
+        # replayed on the latest data rather than merged record by record
+        return self.reload(), False
+
+# ---------------- Layouts ----------------
+def write_layout(root: Path, data: Dict[str, Any], partitions: int) -> str:
+    name = f"p{partitions}-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+    layout = root / name
+    layout.mkdir(parents=True, exist_ok=False)
+    docs = split(data, partitions)
+    for i, doc in enumerate(docs[:-1]):
+        VersionedStore(layout / f"part-{i:03d}.json").commit(doc)
+    VersionedStore(layout / "global.json").commit(docs[-1])
+    return name
+
+def init_partitions(partitions: int, source: Path = DATA_FILE, root: Path = PARTITION_DIR) -> str:
+    if read_manifest(root) is not None:
+        raise FileExistsError(f"{root} is already partitioned; use --rebalance")
+    data = VersionedStore(source).load()
+    name = write_layout(root, data, partitions)
+    write_manifest(root, {"partitions": partitions, "layout": name})
+    _restamp_columns(root, data, partitions)
+    return name
+
+def rebalance(partitions: int, root: Path = PARTITION_DIR) -> str:
+    # Holds every part's lock from the copy to the manifest switch, so no commit can
+    # land in the old layout unseen; writers then find the manifest changed and reload
+    old = PartitionedStore(root)
+    with locked(part.path for part in old.parts):
+        data = old.load()
+        name = write_layout(root, data, partitions)
+        write_manifest(root, {"partitions": partitions, "layout": name, "previous": old.layout.name})
+        _restamp_columns(root, data, partitions)
+    return name
+
+def _restamp_columns(root: Path, data: Dict[str, Any], partitions: int):
+    # A new layout starts every part at generation 1, so the store's generation changes
+    # while the content does not; the column file is rewritten to match it
+    if root == PARTITION_DIR:
+        columns.write_columns(data, partitions + 1)
+
+def partition_stats(root: Path = PARTITION_DIR) -> List[Dict[str, Any]]:
+    store = PartitionedStore(root)
+    stats = []
+    for i, part in enumerate(store.parts[:-1]):
+        doc = part.load()
+        stats.append({
+            "partition": i,
+            "users": len(doc["users"]),
+            "requests": len(doc["requests"]),
+            "refs": len(doc.get("request_refs", [])),
+            "bytes": part.path.stat().st_size if part.path.exists() else 0,
+        })
+    return stats
+
+# ---------------- Command Line ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Manage the partitioned SkillSwap store")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--init", type=int, metavar="N", help="split data.json into N partitions")
+    group.add_argument("--rebalance", type=int, metavar="N", help="move the live data to N partitions")
+    group.add_argument("--stats", action="store_true", help="show records per partition")
+    args = parser.parse_args()
+
+    if args.init:
+        print(f"Created layout {init_partitions(args.init)} in {PARTITION_DIR}/")
+    elif args.rebalance:
+        print(f"Switched to layout {rebalance(args.rebalance)}; the previous layout is kept for rollback")
+    else:
+        for row in partition_stats():
+            print(f"  part {row['partition']:>3}: {row['users']:>7} users  {row['requests']:>7} requests  "
+                  f"{row['refs']:>6} refs  {row['bytes'] / 1024:>9.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Profile deletion — removes a user together with everything that refers to
+them, found through the per-user indexes rather than by scanning: requests
+through their mailbox, endorsements and achievements through the "owned"
+index, and each of those by its recorded position. Counterparties' indexes,
+endorsement counters and the skill market are corrected in the same commit.
+
+Precomputed swap circles and archived requests are tombstoned instead of
+rewritten: readers skip anything that involves a purged user, and the
+archive's counts no longer include their requests.
+
+Usage, from the Projects directory:
+    python -m skillswap.purge purge_list.txt   # one email or user id per line
+"""
+
+from pathlib import Path
+from typing import List, Dict, Any, Iterable
+
+from .store import get_index, record_position, remove_records
+from .swaps import unindex_request
+from .endorsements import endorsement_key
+from .market import unindex_user
+from .locations import index_location
+from .archive import uncount_users
+from .rollups import count_status
+
+# Fields naming the users each record belongs to
+OWNED_BY = {
+    "endorsements": ["endorser_id", "endorsee_id"],
+    "achievements": ["user_id"],
+    "messages": ["sender_id", "receiver_id"],
+}
+
+def rebuild_owned(data: Dict[str, Any]):
+    # Recovers the index from the collections, e.g. after a bulk edit
+    owned = data.setdefault("indexes", {})["owned"] = {}
+    for coll, fields in OWNED_BY.items():
+        for rec in data.get(coll, []):
+            for user_id in {rec.get(f) for f in fields if rec.get(f)}:
+                owned.setdefault(user_id, {}).setdefault(coll, []).append(rec["id"])
+
+def _disown(owned: Dict[str, Any], user_id: str, coll: str, rec_id: str):
+    ids = owned.get(user_id, {}).get(coll, [])
+    if rec_id in ids:
+        ids.remove(rec_id)
+
+def purge_users(data: Dict[str, Any], user_ids: Iterable[str]) -> Dict[str, int]:
+    # Returns how many records were removed per collection
+    purged = set(user_ids)
+    mailboxes = get_index(data, "mailboxes")
+    owned = get_index(data, "owned")
+
+    doomed: Dict[str, set] = {"requests": set()}
+    for user_id in purged:
+        for lists in mailboxes.get(user_id, {}).values():
+            for entries in lists.values():
+                doomed["requests"].update(rec_id for _, rec_id in entries)
+        for coll, rec_ids in owned.get(user_id, {}).items():
+            doomed.setdefault(coll, set()).update(rec_ids)
+
+    removed = {}
+    uncounted: Dict[str, Dict[str, int]] = {}
+    for coll, rec_ids in doomed.items():
+        if not rec_ids:
+            continue
+        gone = remove_records(data, coll, rec_ids)
+        for rec in gone:
+            if coll == "requests":
+                unindex_request(data, rec)
+                count_status(data, rec["status"], -1)
+                continue
+            for user_id in {rec.get(f) for f in OWNED_BY.get(coll, []) if rec.get(f)} - purged:
+                _disown(owned, user_id, coll, rec["id"])
+            if coll == "endorsements":
+                get_index(data, "endorsements").pop(
+                    endorsement_key(rec["endorser_id"], rec["endorsee_id"], rec["skill"]), None)
+                if rec["endorsee_id"] not in purged:
+                    per_skill = uncounted.setdefault(rec["endorsee_id"], {})
+                    per_skill[rec["skill"]] = per_skill.get(rec["skill"], 0) + 1
+        removed[coll] = len(gone)
+
+    for user_id, per_skill in uncounted.items():
+        pos = record_position(data, "users", user_id)
+        if pos is None:
+            continue
+        user = data["users"][pos]
+        for skill, n in per_skill.items():
+            by_skill = user.setdefault("endorsements_by_skill", {})
+            by_skill[skill] = max(by_skill.get(skill, 0) - n, 0)
+            if not by_skill[skill]:
+                del by_skill[skill]
+            user["endorsements_received"] = max(user.get("endorsements_received", 0) - n, 0)
+    gone_users = remove_records(data, "users", purged)
+    for user in gone_users:
+        unindex_user(data, user)
+        index_location(data, user, -1)
+    removed["users"] = len(gone_users)
+
+    for user_id in purged:
+        mailboxes.pop(user_id, None)
+        owned.pop(user_id, None)
+    if "swap_cycles" in data:
+        circles = data["swap_cycles"]
+        for user_id in purged:
+            circles.get("by_user", {}).pop(user_id, None)
+        circles["removed_users"] = sorted(set(circles.get("removed_users", [])) | purged)
+    if data.get("archive", {}).get("segments"):
+        uncount_users(data, purged)
+    return removed
+
+def delete_user(data: Dict[str, Any], user_id: str) -> Dict[str, int]:
+    return purge_users(data, [user_id])
+
+def resolve_users(data: Dict[str, Any], keys: Iterable[str]) -> List[str]:
+    # Purge lists may name users by id or by email
+    wanted = {k.strip().lower() for k in keys if k.strip()}
+    return [u["id"] for u in data.get("users", []) if u["id"].lower() in wanted or u.get("email", "").lower() in wanted]
+
+if __name__ == "__main__":
+    import argparse, time
+    from .store import read_data, update_data
+
+    parser = argparse.ArgumentParser(description="Delete SkillSwap users and everything that refers to them")
+    parser.add_argument("purge_list", type=Path, help="file with one email or user id per line")
+    parser.add_argument("--dry-run", action="store_true", help="report without deleting")
+    args = parser.parse_args()
+
+    keys = args.purge_list.read_text(encoding="utf-8").splitlines()
+    started = time.perf_counter()
+    if args.dry_run:
+        data = read_data()
+        removed = purge_users(data, resolve_users(data, keys))
+    else:
+        removed = update_data(lambda d: purge_users(d, resolve_users(d, keys)))
+    summary = ", ".join(f"{n} {coll}" for coll, n in removed.items() if n) or "nothing"
+    print(f"{'Would remove' if args.dry_run else 'Removed'} {summary} in {time.perf_counter() - started:.1f}s")
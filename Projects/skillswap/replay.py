@@ -0,0 +1,208 @@
+"""
+Offline replay — scores every decided swap request in the history (hot and
+archived) under many compatibility_score weight configurations, and reports
+how well each configuration ranks the requests that were accepted above the
+ones that were rejected.
+
+A request counts as accepted when it reached Accepted or Completed, and as
+rejected when it was Rejected; pending ones are left out. Pairs are scored
+sender → receiver, the way Discover ranks partners, with the batch scorer
+compiled for each configuration. Configurations are spread over worker
+processes that share the loaded history.
+
+Profiles are replayed as they are now, not as they were when each request
+was sent, so skills added or dropped since then shift the results.
+
+Metrics per configuration:
+    auc      chance an accepted request outscores a rejected one (0.5 = no signal)
+    map      mean average precision of each receiver's inbox ranked by score
+    lift@10  acceptance rate of the top-scored 10% over the overall rate
+
+Usage, from the Projects directory:
+    python -m skillswap.replay --random 200 --workers 8
+    python -m skillswap.replay --configs weights.json --save replay.json
+"""
+
+from pathlib import Path
+import json, multiprocessing, random, time
+from typing import List, Dict, Any, Optional, Tuple
+
+from .matching import ScoreWeights, DEFAULT_WEIGHTS, score_profile, batch_scores
+from .store import read_section
+
+# ---------------- Config ----------------
+ACCEPTED = {"Accepted", "Completed"}
+REJECTED = {"Rejected"}
+TOP_SHARE = 0.1         # share of requests counted by lift@10
+SPREAD = 0.75           # random configurations scale each default weight by 1 ± this
+
+# ---------------- History ----------------
+class History:
+    # Profiles and decided requests, grouped by sender so each sender is scored in one batch
+    def __init__(self, data: Dict[str, Any], include_archive: bool = True):
+        from .archive import iter_archived
+
+        users = read_section(data, "users", [])
+        position = {u["id"]: i for i, u in enumerate(users)}
+        self.profiles = [score_profile(u) for u in users]
+        senders: Dict[int, Tuple[List[int], List[int]]] = {}
+        requests = list(read_section(data, "requests", []))
+        if include_archive:
+            requests += list(iter_archived(data))
+        self.skipped = 0
+        for req in requests:
+            if req["status"] not in ACCEPTED and req["status"] not in REJECTED:
+                continue
+            sender, receiver = position.get(req["sender_id"]), position.get(req["receiver_id"])
+            if sender is None or receiver is None:
+                self.skipped += 1
+                continue
+            receivers, labels = senders.setdefault(sender, ([], []))
+            receivers.append(receiver)
+            labels.append(1 if req["status"] in ACCEPTED else 0)
+        self.groups = [(sender, [self.profiles[r] for r in receivers], receivers, labels)
+                       for sender, (receivers, labels) in senders.items()]
+        self.labels = [label for _, _, _, labels in self.groups for label in labels]
+        self.receivers = [r for _, _, receivers, _ in self.groups for r in receivers]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def scores(self, weights: ScoreWeights) -> List[float]:
+        # In the same order as labels and receivers
+        scores: List[float] = []
+        for sender, others, _, _ in self.groups:
+            scores.extend(batch_scores(self.profiles[sender], others, weights))
+        return scores
+
+# ---------------- Metrics ----------------
+def auc(scores: List[float], labels: List[int]) -> Optional[float]:
+    # Mann-Whitney U over average ranks, so tied scores count as half
+    positives = sum(labels)
+    negatives = len(labels) - positives
+    if not positives or not negatives:
+        return None
+    order = sorted(range(len(scores)), key=scores.__getitem__)
+    rank_sum = 0.0
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and scores[order[j + 1]] == scores[order[i]]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        rank_sum += average_rank * sum(labels[order[k]] for k in range(i, j + 1))
+        i = j + 1
+    return (rank_sum - positives * (positives + 1) / 2) / (positives * negatives)
+
+def average_precision(scores: List[float], labels: List[int]) -> float:
+    hits = 0
+    total = 0.0
+    for n, i in enumerate(sorted(range(len(scores)), key=lambda i: -scores[i]), 1):
+        if labels[i]:
+            hits += 1
+            total += hits / n
+    return total / hits if hits else 0.0
+
+def mean_average_precision(scores: List[float], labels: List[int], receivers: List[int]) -> Optional[float]:
+    # Only inboxes holding both outcomes say anything about ranking
+    inboxes: Dict[int, Tuple[List[float], List[int]]] = {}
+    for score, label, receiver in zip(scores, labels, receivers):
+        box = inboxes.setdefault(receiver, ([], []))
+        box[0].append(score)
+        box[1].append(label)
+    ranked = [average_precision(s, l) for s, l in inboxes.values() if 0 < sum(l) < len(l)]
+    return sum(ranked) / len(ranked) if ranked else None
+
+def lift(scores: List[float], labels: List[int], share: float = TOP_SHARE) -> Optional[float]:
+    if not labels or not sum(labels):
+        return None
+    top = sorted(range(len(scores)), key=lambda i: -scores[i])[:max(int(len(scores) * share), 1)]
+    return (sum(labels[i] for i in top) / len(top)) / (sum(labels) / len(labels))
+
+# ---------------- Evaluation ----------------
+_history: Optional[History] = None
+
+def _use_history(history: History):
+    global _history
+    _history = history
+
+def evaluate(weights: ScoreWeights) -> Dict[str, Any]:
+    scores = _history.scores(weights)
+    metrics = {"auc": auc(scores, _history.labels),
+               "map": mean_average_precision(scores, _history.labels, _history.receivers),
+               "lift@10": lift(scores, _history.labels)}
+    return {"weights": weights._asdict(), **{k: None if v is None else round(v, 4) for k, v in metrics.items()}}
+
+def random_configs(n: int, seed: int = 1, spread: float = SPREAD) -> List[ScoreWeights]:
+    rng = random.Random(seed)
+    return [ScoreWeights(*[w * rng.uniform(1 - spread, 1 + spread) for w in DEFAULT_WEIGHTS]) for _ in range(n)]
+
+def load_configs(path: Path) -> List[ScoreWeights]:
+    # A JSON list of overrides, e.g. [{"location": 10}, {"reciprocity": 30, "interest": 4}]
+    configs = []
+    for overrides in json.loads(path.read_text(encoding="utf-8")):
+        unknown = set(overrides) - set(ScoreWeights._fields)
+        if unknown:
+            raise ValueError(f"unknown weights: {', '.join(sorted(unknown))}")
+        configs.append(DEFAULT_WEIGHTS._replace(**overrides))
+    return configs
+
+def replay(history: History, configs: List[ScoreWeights], workers: int = 1) -> List[Dict[str, Any]]:
+    # The production weights are always evaluated first, as the baseline
+    configs = [DEFAULT_WEIGHTS] + [c for c in configs if c != DEFAULT_WEIGHTS]
+    if workers <= 1:
+        _use_history(history)
+        results = [evaluate(c) for c in configs]
+    else:
+        # Forked workers inherit the history instead of each loading their own
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+        with context.Pool(workers, initializer=_use_history, initargs=(history,)) as pool:
+            results = pool.map(evaluate, configs, chunksize=max(len(configs) // (workers * 4), 1))
+    results[0]["baseline"] = True
+    return results
+
+def print_results(results: List[Dict[str, Any]], top: int = 10, key: str = "auc"):
+    baseline = results[0]
+    ranked = sorted(results, key=lambda r: r[key] if r[key] is not None else -1, reverse=True)[:top]
+    print(f"{'auc':>7} {'map':>7} {'lift@10':>8}  weights")
+    for r in ranked + ([] if baseline in ranked else [baseline]):
+        fmt = lambda v: "-" if v is None else f"{v:.4f}"
+        weights = " ".join(f"{k}={v:g}" for k, v in r["weights"].items())
+        print(f"{fmt(r['auc']):>7} {fmt(r['map']):>7} {fmt(r['lift@10']):>8}  {weights}{'  (current)' if r is baseline else ''}")
+
+if __name__ == "__main__":
+    import argparse, os
+    from .store import read_data
+
+    parser = argparse.ArgumentParser(description="Replay request history under different score weights")
+    parser.add_argument("--configs", type=Path, help="JSON list of weight overrides to evaluate")
+    parser.add_argument("--random", type=int, default=0, help="also evaluate this many random configurations")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rank-by", choices=["auc", "map", "lift@10"], default="auc")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-archive", action="store_true", help="replay only requests still in the data file")
+    parser.add_argument("--save", type=Path, help="write every configuration's results as JSON")
+    args = parser.parse_args()
+
+    try:
+        configs = load_configs(args.configs) if args.configs else []
+    except ValueError as exc:
+        parser.error(str(exc))
+    configs += random_configs(args.random, args.seed)
+
+    started = time.perf_counter()
+    history = History(read_data(), include_archive=not args.no_archive)
+    if not history:
+        parser.error("no accepted, completed or rejected requests to replay")
+    print(f"Loaded {len(history)} decided requests ({sum(history.labels)} accepted) "
+          f"in {time.perf_counter() - started:.1f}s; {history.skipped} involve deleted users")
+    started = time.perf_counter()
+    results = replay(history, configs, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {len(results)} configurations in {elapsed:.1f}s "
+          f"({len(results) * len(history) / elapsed:,.0f} pairs/s over {args.workers} workers)")
+    print_results(results, args.top, args.rank_by)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved {len(results)} results to {args.save}")
@@ -0,0 +1,194 @@
+"""
+Rerun benchmark — measures what a user actually waits for: a full rerun of
+app.py, driven through Streamlit's AppTest against generated datasets of
+increasing size.
+
+Each navigation page is rerun repeatedly and each heavy quick action is
+clicked once per round; latency is reported as p50/p95 per page and dataset
+size. Peak Python memory is traced during the last round, which is left out
+of the timings so tracing does not skew them; no step runs more often than
+its rounds, so actions that change data are never clicked an extra time.
+Results can be saved as a baseline and later runs compared against it.
+
+Usage, from the Projects directory:
+    python -m skillswap.rerun_bench --sizes 1000,10000,50000 --save baseline.json
+    python -m skillswap.rerun_bench --compare baseline.json
+"""
+
+from pathlib import Path
+import json, os, tempfile, time, tracemalloc
+from typing import List, Dict, Any, Callable, Tuple
+
+from .synthetic import generate_data
+from .store import VersionedStore, rebuild_positions
+from .swaps import rebuild_request_indexes
+from .purge import rebuild_owned
+from .rollups import rebuild_rollups
+from .market import rebuild_market
+from .locations import rebuild_locations
+from .writer import COALESCE_WINDOW
+
+# ---------------- Config ----------------
+APP_FILE = Path(__file__).resolve().parent.parent / "app.py"
+SIZES = [1000, 10000, 50000]    # users per dataset; requests are REQUESTS_PER_USER times that
+REQUESTS_PER_USER = 2
+REPEAT = 10                     # timed reruns per page
+ROUNDS = 3                      # clicks per quick action
+TIMEOUT = 600                   # seconds AppTest waits for one rerun
+REGRESSION = 0.2                # slowdown against the baseline that counts as a regression
+
+PAGES = ["🏠 Dashboard", "🔍 Discover", "📬 Requests", "📊 Analytics", "🎖️ Leaderboard"]
+# Read-only actions first, so the data they see is the generated data
+ACTIONS = ["report", "export_requests", "calc_matches", "pairing_round",
+           "backfill", "accept_all", "complete_all", "archive_history"]
+
+Step = Callable[[Any], Any]
+
+# ---------------- Datasets ----------------
+def prepare_dataset(root: Path, users: int, seed: int = 42) -> Dict[str, Any]:
+    # Written with the indexes and rollups the app expects, so no migration runs while timing
+    data = generate_data(users, users * REQUESTS_PER_USER, seed)
+    rebuild_request_indexes(data)
+    rebuild_owned(data)
+    rebuild_rollups(data)
+    rebuild_market(data)
+    rebuild_locations(data)
+    rebuild_positions(data)
+    VersionedStore(root / "data.json").commit(data)
+    return data
+
+# ---------------- Driving ----------------
+def _select(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+def page_step(mode: str, profile: str) -> Step:
+    def step(at):
+        _select(at.sidebar.radio, "Navigation").set_value(mode)
+        if mode == "🔍 Discover":
+            at.run()
+            _select(at.selectbox, "Your Profile").set_value(profile)
+        return at.run()
+    return step
+
+def action_step(key: str) -> Step:
+    return lambda at: at.button(key=key).click().run()
+
+def _timed(at, step: Step) -> float:
+    started = time.perf_counter()
+    step(at)
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].message}")
+    return elapsed
+
+def _measure(at, step: Step, runs: int) -> Tuple[List[float], float]:
+    # Times of all runs but the last, and the peak MB of the last one, traced
+    times = [_timed(at, step) for _ in range(runs - 1)]
+    tracemalloc.start()
+    try:
+        _timed(at, step)
+        return times, tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def summarize(times: List[float], peak_mb: float) -> Dict[str, Any]:
+    return {"p50_ms": round(percentile(times, 0.5) * 1000, 1), "p95_ms": round(percentile(times, 0.95) * 1000, 1),
+            "peak_mb": round(peak_mb, 1), "runs": len(times)}
+
+def bench_size(users: int, repeat: int = REPEAT, rounds: int = ROUNDS,
+               actions: List[str] = ACTIONS) -> Dict[str, Dict[str, Any]]:
+    from streamlit.testing.v1 import AppTest
+    import streamlit as st
+
+    results = {}
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            data = prepare_dataset(Path(tmp), users)
+            # The writer, score cache and match index are per process; start each dataset clean
+            st.cache_resource.clear()
+            st.cache_data.clear()
+            at = AppTest.from_file(str(APP_FILE), default_timeout=TIMEOUT)
+            at.run()
+            profile = data["users"][0]["name"]
+            _select(at.sidebar.selectbox, "Select Profile").set_value(profile)
+            at.run()
+
+            for mode in PAGES:
+                step = page_step(mode, profile)
+                step(at)    # warm-up: first visit builds per-page caches
+                results[mode] = summarize(*_measure(at, step, repeat))
+
+            _select(at.sidebar.radio, "Navigation").set_value("🏠 Dashboard")
+            for key in actions:
+                step = action_step(key)
+                results[f"action:{key}"] = summarize(*_measure(at, step, rounds))
+            # Let the writer thread flush the last action before its directory goes away
+            time.sleep(COALESCE_WINDOW * 20)
+        finally:
+            os.chdir(previous)
+    return results
+
+def run(sizes: List[int], repeat: int = REPEAT, rounds: int = ROUNDS) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": repeat, "sizes": {}}
+    for users in sizes:
+        started = time.perf_counter()
+        report["sizes"][str(users)] = bench_size(users, repeat, rounds)
+        print(f"{users} users done in {time.perf_counter() - started:.0f}s")
+    return report
+
+# ---------------- Reporting ----------------
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = REGRESSION) -> List[Dict[str, Any]]:
+    # One row per (size, scenario) present in both, with the p50 change
+    rows = []
+    for size, scenarios in current["sizes"].items():
+        for name, now in scenarios.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not before or not before["p50_ms"]:
+                continue
+            change = now["p50_ms"] / before["p50_ms"] - 1
+            rows.append({"size": size, "scenario": name, "before_ms": before["p50_ms"], "now_ms": now["p50_ms"],
+                         "change": round(change, 3), "regressed": change > threshold})
+    return rows
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'users':>7}  {'scenario':<26} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>8}")
+    for size, scenarios in report["sizes"].items():
+        for name, r in scenarios.items():
+            print(f"{size:>7}  {name:<26} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['peak_mb']:>8}")
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    print(f"{'users':>7}  {'scenario':<26} {'before':>9} {'now':>9} {'change':>8}")
+    for r in rows:
+        flag = "  <-- slower" if r["regressed"] else ""
+        print(f"{r['size']:>7}  {r['scenario']:<26} {r['before_ms']:>9} {r['now_ms']:>9} {r['change']:>+8.0%}{flag}")
+
+if __name__ == "__main__":
+    import argparse, sys
+
+    parser = argparse.ArgumentParser(description="Benchmark full app reruns per page and dataset size")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated user counts")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed reruns per page")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="clicks per quick action")
+    parser.add_argument("--save", type=Path, help="write the results as a baseline file")
+    parser.add_argument("--compare", type=Path, help="compare against a saved baseline")
+    args = parser.parse_args()
+    if min(args.repeat, args.rounds) < 2:
+        parser.error("--repeat and --rounds need at least 2 runs; the last one is traced, not timed")
+
+    report = run([int(s) for s in args.sizes.split(",") if s], args.repeat, args.rounds)
+    print_report(report)
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        rows = compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+        print_comparison(rows)
+        if any(r["regressed"] for r in rows):
+            sys.exit(1)
@@ -0,0 +1,166 @@
+"""
+Request rollups — hourly and daily counts of requests created, accepted,
+rejected and completed, plus histograms of how long requests took from
+creation to acceptance and to completion.
+
+They are kept up to date by the request changes in swaps.py, so trend
+queries read one bucket per hour or day instead of scanning requests. Hourly
+buckets are kept for HOURLY_DAYS days, daily buckets for good. The rollups
+also count requests per current status, hot and archived together, for the
+platform totals.
+
+A rebuild from history can only see each request's current status, so an
+accepted-then-completed request counts as completed but not as accepted.
+"""
+
+import bisect, datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from .store import read_section
+
+# ---------------- Config ----------------
+EVENTS = ["created", "accepted", "rejected", "completed"]
+STATUS_EVENTS = {"Accepted": "accepted", "Rejected": "rejected", "Completed": "completed"}
+LATENCY_EVENTS = ["accepted", "completed"]
+# Upper bounds in hours of each latency bin; the last bin is everything slower
+LATENCY_BOUNDS = [1, 3, 6, 12, 24, 48, 96, 168, 336, 720]
+HOURLY_DAYS = 14
+
+GRAINS = {"hourly": 13, "daily": 10}   # length of the ISO timestamp prefix naming a bucket
+STEPS = {"hourly": datetime.timedelta(hours=1), "daily": datetime.timedelta(days=1)}
+
+def rollups(data: Dict[str, Any]) -> Dict[str, Any]:
+    return data.setdefault("rollups", {"hourly": {}, "daily": {}})
+
+def bucket_key(timestamp: str, grain: str) -> str:
+    return timestamp[:GRAINS[grain]]
+
+def latency_hours(start: str, end: str) -> Optional[float]:
+    try:
+        delta = datetime.datetime.fromisoformat(end) - datetime.datetime.fromisoformat(start)
+    except (TypeError, ValueError):
+        return None
+    return max(delta.total_seconds() / 3600, 0.0)
+
+# ---------------- Updates ----------------
+def record(data: Dict[str, Any], event: str, timestamp: str, created_at: Optional[str] = None,
+           trim: bool = True):
+    # Counts one event in its hour and day; accepted and completed also record
+    # how long the request had been open, when created_at is given
+    if not timestamp:
+        return
+    sections = rollups(data)
+    cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=HOURLY_DAYS)).isoformat()
+    for grain in GRAINS:
+        if grain == "hourly" and timestamp < cutoff:
+            continue
+        bucket = sections[grain].setdefault(bucket_key(timestamp, grain), {})
+        bucket[event] = bucket.get(event, 0) + 1
+    if event in LATENCY_EVENTS and created_at:
+        hours = latency_hours(created_at, timestamp)
+        if hours is not None:
+            day = sections["daily"][bucket_key(timestamp, "daily")]
+            hist = day.setdefault(f"{event}_latency", [0] * (len(LATENCY_BOUNDS) + 1))
+            hist[bisect.bisect_left(LATENCY_BOUNDS, hours)] += 1
+    if trim:
+        _trim_hourly(sections["hourly"], bucket_key(cutoff, "hourly"))
+
+def _trim_hourly(hourly: Dict[str, Any], cutoff: str):
+    # Every key is compared: imports and merged partitions add buckets out of time order
+    for key in [key for key in hourly if key < cutoff]:
+        del hourly[key]
+
+def count_status(data: Dict[str, Any], status: str, delta: int = 1):
+    # Archiving leaves these alone; adding, deleting and status changes move them
+    statuses = rollups(data).setdefault("statuses", {})
+    statuses[status] = statuses.get(status, 0) + delta
+
+def _transition(req: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    # When the request reached its status, and when it was created if that tells how long
+    # it took; imported requests carry no transition time, so they get no latency
+    created_at = req.get("created_at", "")
+    updated_at = req.get("updated_at")
+    if not updated_at or updated_at == created_at:
+        return created_at, None
+    return updated_at, created_at
+
+def record_status(data: Dict[str, Any], req: Dict[str, Any]):
+    event = STATUS_EVENTS.get(req["status"])
+    if event:
+        record(data, event, *_transition(req))
+
+def rebuild_rollups(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Recovers the rollups from hot and archived requests, e.g. after an import
+    from .archive import iter_archived
+
+    events = []
+    statuses: Dict[str, int] = {}
+    for req in list(read_section(data, "requests", [])) + list(iter_archived(data)):
+        statuses[req["status"]] = statuses.get(req["status"], 0) + 1
+        events.append((req.get("created_at", ""), "created", None))
+        if req["status"] in STATUS_EVENTS:
+            timestamp, created_at = _transition(req)
+            events.append((timestamp, STATUS_EVENTS[req["status"]], created_at))
+    events.sort(key=lambda e: e[0])
+    data["rollups"] = {"hourly": {}, "daily": {}, "statuses": statuses}
+    # Starting empty, with expired events kept out of the hourly buckets, leaves nothing to trim
+    for timestamp, event, created_at in events:
+        record(data, event, timestamp, created_at, trim=False)
+    return data["rollups"]
+
+# ---------------- Queries ----------------
+def series(data: Dict[str, Any], grain: str, start: datetime.datetime, end: datetime.datetime,
+           events: List[str] = EVENTS) -> Dict[str, List[Any]]:
+    # One value per bucket from start to end inclusive, zeros where nothing happened
+    buckets = read_section(data, "rollups", {}).get(grain, {})
+    keys = []
+    at = start
+    while at <= end:
+        keys.append(bucket_key(at.isoformat(), grain))
+        at += STEPS[grain]
+    result: Dict[str, List[Any]] = {"bucket": keys}
+    for event in events:
+        result[event] = [buckets.get(key, {}).get(event, 0) for key in keys]
+    return result
+
+def latency_histogram(data: Dict[str, Any], event: str, start: datetime.datetime,
+                      end: datetime.datetime) -> List[int]:
+    daily = read_section(data, "rollups", {}).get("daily", {})
+    total = [0] * (len(LATENCY_BOUNDS) + 1)
+    at = start
+    while at <= end:
+        for i, n in enumerate(daily.get(bucket_key(at.isoformat(), "daily"), {}).get(f"{event}_latency", [])):
+            total[i] += n
+        at += STEPS["daily"]
+    return total
+
+def percentile_hours(hist: List[int], q: float) -> Optional[float]:
+    # Upper bound of the bin holding the q-th fraction, inf past the last bound
+    count = sum(hist)
+    if not count:
+        return None
+    seen = 0
+    for i, n in enumerate(hist):
+        seen += n
+        if seen >= q * count:
+            return float(LATENCY_BOUNDS[i]) if i < len(LATENCY_BOUNDS) else float("inf")
+    return float("inf")
+
+def bin_labels() -> List[str]:
+    labels = []
+    lower = 0
+    for bound in LATENCY_BOUNDS:
+        labels.append(f"{lower}-{bound}h")
+        lower = bound
+    return labels + [f">{lower}h"]
+
+if __name__ == "__main__":
+    import argparse, time
+    from .store import update_data
+
+    parser = argparse.ArgumentParser(description="Rebuild SkillSwap request rollups from history")
+    parser.parse_args()
+    started = time.perf_counter()
+    built = update_data(rebuild_rollups)
+    print(f"Rebuilt {len(built['daily'])} daily and {len(built['hourly'])} hourly buckets "
+          f"in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,78 @@
+"""
+Pair-score cache — a bounded LRU of compatibility_score results keyed on
+both profiles' ids and record versions, shared by every session in the
+process. A profile that changes gets a new version when it is committed, so
+its old entries simply stop being asked for and age out.
+
+Versions are only final once the writer has published a commit, so callers
+pass settled=False for data with unpublished edits; those scores are computed
+but not stored. The size cap can be set with SKILLSWAP_SCORE_CACHE.
+"""
+
+from collections import OrderedDict
+import os, threading
+from typing import Dict, Any, Tuple
+
+from .matching import compatibility_score
+
+# ---------------- Config ----------------
+MAX_ENTRIES = int(os.environ.get("SKILLSWAP_SCORE_CACHE", "50000"))
+ENTRY_BYTES = 700       # measured size of one cached (score, details) pair
+
+Key = Tuple[str, int, str, int]
+
+class ScoreCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Key, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = None
+
+    def score(self, a: Dict[str, Any], b: Dict[str, Any], settled: bool = True) -> Tuple[float, Dict[str, Any]]:
+        # The details dict is shared between callers and must not be modified
+        key = (a["id"], a.get("version", 0), b["id"], b.get("version", 0))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = compatibility_score(a, b)
+        if settled:
+            with self._lock:
+                self._entries[key] = result
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def invalidate_on(self, epoch: Any):
+        # A commit that lost a race can leave a version number meaning different
+        # content, so everything is dropped whenever the writer reports a conflict
+        with self._lock:
+            if epoch != self._epoch:
+                self._entries.clear()
+                self._epoch = epoch
+
+    def resize(self, max_entries: int):
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "approx_mb": round(len(self._entries) * ENTRY_BYTES / 2**20, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
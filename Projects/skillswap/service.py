@@ -0,0 +1,302 @@
+"""
+Match query service — a small asyncio HTTP/JSON server answering "top matches
+for a user" and "score of a pair" for partner tools, next to the Streamlit app.
+
+Profiles are loaded once into a warm snapshot (precomputed scoring profiles
+plus the LSH index) that is swapped for a fresh one when the data file
+changes. Concurrent top-match queries arriving within BATCH_WINDOW are
+scored together in one pass over their shared candidates, off the event
+loop, and a user asked for by several clients is only scored once.
+Connections are kept alive, and --workers starts several server processes
+sharing the port.
+
+Endpoints:
+    GET /matches?user=<id>&k=10   top k partners, highest score first
+    GET /score?a=<id>&b=<id>      compatibility score and its breakdown
+    GET /health                   snapshot size, generation and counters
+
+Usage, from the Projects directory:
+    python -m skillswap.service --port 8765 --workers 4
+"""
+
+import asyncio, heapq, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from .matching import score_profile, batch_scores, batch_scores_many
+from .lsh import build_index
+from .score_cache import ScoreCache
+from .store import open_store
+
+# ---------------- Config ----------------
+HOST = "127.0.0.1"
+PORT = 8765
+BATCH_WINDOW = 0.002    # seconds a top-match query waits for others to batch with
+MAX_BATCH = 64          # queries that flush a batch early
+REFRESH_SECONDS = 2.0   # how often the data file is checked for changes
+DEFAULT_K = 10
+MAX_K = 100
+MAX_HEADER_BYTES = 16384
+
+# ---------------- Warm Snapshot ----------------
+class Snapshot:
+    # Read-only once built; queries hold on to the one they started with
+    def __init__(self, users: List[Dict[str, Any]], generation: int, approximate: bool):
+        self.generation = generation
+        self.by_id = {u["id"]: u for u in users}
+        self.ids = list(self.by_id)
+        self.profiles = [score_profile(self.by_id[i]) for i in self.ids]
+        self.position = {user_id: i for i, user_id in enumerate(self.ids)}
+        self.lsh = build_index(users) if approximate else None
+        self.built_at = time.time()
+
+    def top_matches(self, user_id: str, k: int) -> List[Tuple[float, str]]:
+        me = self.by_id[user_id]
+        if self.lsh is not None:
+            candidates = [self.position[c] for c in self.lsh.candidates(me) if c in self.position]
+        else:
+            candidates = [i for i, other in enumerate(self.ids) if other != user_id]
+        scores = batch_scores(self.profiles[self.position[user_id]], [self.profiles[i] for i in candidates])
+        return heapq.nlargest(k, zip(scores, (self.ids[i] for i in candidates)))
+
+    def match_batch(self, wanted: Dict[str, int]) -> Dict[str, List[Tuple[float, str]]]:
+        # One executor call per batch; the distinct users asked for are scored in one pass
+        # over the union of their candidates, each at the largest k asked
+        users = [user_id for user_id in wanted if user_id in self.by_id]
+        if not users:
+            return {}
+        if self.lsh is not None:
+            own = [{self.position[c] for c in self.lsh.candidates(self.by_id[u]) if c in self.position} for u in users]
+            shared = sorted(set().union(*own))
+            # Each user is still scored only against its own candidates
+            at = {i: j for j, i in enumerate(shared)}
+            takers: Optional[List[List[int]]] = [[] for _ in shared]
+            for n, candidates in enumerate(own):
+                for i in candidates:
+                    takers[at[i]].append(n)
+            scored = [sorted(candidates) for candidates in own]
+        else:
+            shared = range(len(self.ids))
+            takers = None
+            scored = [shared] * len(users)
+        rows = batch_scores_many([self.profiles[self.position[u]] for u in users],
+                                 [self.profiles[i] for i in shared], takers)
+        results = {}
+        for user_id, row, positions in zip(users, rows, scored):
+            me = self.position[user_id]
+            results[user_id] = heapq.nlargest(wanted[user_id], (
+                (score, self.ids[i]) for score, i in zip(row, positions) if i != me))
+        return results
+
+class MatchEngine:
+    def __init__(self, approximate: bool = True, store=None):
+        self.approximate = approximate
+        self.store = store or open_store()
+        self.scores = ScoreCache()
+        self.snapshot: Optional[Snapshot] = None
+        self.reloads = 0
+
+    def load(self) -> Snapshot:
+        data = self.store.load()
+        snapshot = Snapshot(data.get("users", []), self.store.generation, self.approximate)
+        # A new generation may reuse version numbers for different content
+        self.scores.invalidate_on(snapshot.generation)
+        self.snapshot = snapshot
+        self.reloads += 1
+        return snapshot
+
+    def score(self, a_id: str, b_id: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        snapshot = self.snapshot
+        a, b = snapshot.by_id.get(a_id), snapshot.by_id.get(b_id)
+        if a is None or b is None:
+            return None
+        return self.scores.score(a, b)
+
+# ---------------- Batching ----------------
+class Batcher:
+    def __init__(self, engine: MatchEngine, executor: ThreadPoolExecutor):
+        self.engine = engine
+        self.executor = executor
+        self.batches = 0
+        self.queries = 0
+        self._pending: Dict[str, List[Tuple[int, asyncio.Future]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, user_id: str, k: int) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(user_id, []).append((k, future))
+        self.queries += 1
+        if sum(map(len, self._pending.values())) >= MAX_BATCH:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(BATCH_WINDOW, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            self.batches += 1
+            asyncio.ensure_future(self._run(pending))
+
+    async def _run(self, pending: Dict[str, List[Tuple[int, asyncio.Future]]]):
+        wanted = {user_id: max(k for k, _ in waiters) for user_id, waiters in pending.items()}
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.engine.snapshot.match_batch, wanted)
+        except Exception as e:
+            for waiters in pending.values():
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for user_id, waiters in pending.items():
+            for k, future in waiters:
+                if not future.done():
+                    future.set_result(results.get(user_id, [])[:k])
+
+# ---------------- HTTP ----------------
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+def _response(status: int, body: Dict[str, Any], keep_alive: bool) -> bytes:
+    payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + payload
+
+class MatchService:
+    def __init__(self, engine: MatchEngine):
+        self.engine = engine
+        # One scoring thread: batches run in order while the loop keeps serving
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="skillswap-score")
+        self.batcher = Batcher(engine, self.executor)
+        self.started = time.time()
+        self.requests = 0
+
+    async def route(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Dict[str, Any]]:
+        snapshot = self.engine.snapshot
+        arg = lambda name: (query.get(name) or [""])[0]
+        if path == "/matches":
+            user_id = arg("user")
+            if user_id not in snapshot.by_id:
+                return 404, {"error": f"unknown user {user_id!r}"}
+            try:
+                k = min(max(int(arg("k") or DEFAULT_K), 1), MAX_K)
+            except ValueError:
+                return 400, {"error": "k must be an integer"}
+            matches = await self.batcher.submit(user_id, k)
+            return 200, {"user": user_id, "generation": snapshot.generation,
+                         "matches": [{"id": other, "name": snapshot.by_id.get(other, {}).get("name"), "score": score}
+                                     for score, other in matches]}
+        if path == "/score":
+            result = self.engine.score(arg("a"), arg("b"))
+            if result is None:
+                return 404, {"error": "unknown user"}
+            return 200, {"a": arg("a"), "b": arg("b"), "score": result[0], "details": result[1]}
+        if path == "/health":
+            return 200, {"users": len(snapshot.ids), "generation": snapshot.generation,
+                         "approximate": self.engine.approximate, "reloads": self.engine.reloads,
+                         "requests": self.requests, "batches": self.batcher.batches, "queries": self.batcher.queries,
+                         "uptime_s": round(time.time() - self.started, 1), "pid": os.getpid(),
+                         "score_cache": self.engine.scores.stats()}
+        return 404, {"error": f"no route {path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # HTTP/1.1 with keep-alive; request bodies are read and ignored
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    writer.write(_response(400, {"error": "malformed request line"}, False))
+                    break
+                method, target, version = parts
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if headers.get("content-length"):
+                    await reader.readexactly(int(headers["content-length"]))
+                self.requests += 1
+                if method != "GET":
+                    status, body = 405, {"error": "only GET is supported"}
+                else:
+                    url = urlsplit(target)
+                    try:
+                        status, body = await self.route(url.path, parse_qs(url.query))
+                    except Exception as e:
+                        status, body = 500, {"error": str(e)}
+                writer.write(_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def refresh(self):
+        # Swaps in a new snapshot when another process has committed
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(REFRESH_SECONDS)
+            try:
+                if self.engine.store.stale():
+                    await loop.run_in_executor(None, self.engine.load)
+            except Exception as e:
+                print(f"[{os.getpid()}] reload failed, keeping generation {self.engine.snapshot.generation}: {e}")
+
+async def serve(host: str = HOST, port: int = PORT, approximate: bool = True, reuse_port: bool = False):
+    engine = MatchEngine(approximate)
+    started = time.perf_counter()
+    snapshot = engine.load()
+    print(f"[{os.getpid()}] {len(snapshot.ids)} users warm in {time.perf_counter() - started:.1f}s, "
+          f"listening on http://{host}:{port}")
+    service = MatchService(engine)
+    server = await asyncio.start_server(service.handle, host, port, reuse_port=reuse_port or None,
+                                        limit=MAX_HEADER_BYTES)
+    refresher = asyncio.ensure_future(service.refresh())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        refresher.cancel()
+
+def run_worker(host: str, port: int, approximate: bool, reuse_port: bool):
+    try:
+        asyncio.run(serve(host, port, approximate, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    import argparse, multiprocessing
+
+    parser = argparse.ArgumentParser(description="Serve SkillSwap match queries over HTTP/JSON")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=1, help="server processes sharing the port")
+    parser.add_argument("--exact", action="store_true", help="score every user instead of LSH candidates")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker(args.host, args.port, not args.exact, False)
+    else:
+        # Each worker keeps its own warm snapshot; the kernel spreads connections between them
+        workers = [multiprocessing.Process(target=run_worker, args=(args.host, args.port, not args.exact, True))
+                   for _ in range(args.workers)]
+        for w in workers:
+            w.start()
+        try:
+            for w in workers:
+                w.join()
+        except KeyboardInterrupt:
+            for w in workers:
+                w.terminate()
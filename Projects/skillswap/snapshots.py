@@ -0,0 +1,210 @@
+"""
+Incremental snapshots — backups stored as compressed, content-addressed
+chunks, so records that did not change since the last snapshot are not
+written again and a daily backup costs only the delta.
+
+Chunk boundaries are picked from the record ids themselves, so adding or
+removing a record only changes the chunk it falls in; indexes are chunked
+the same way by their keys. A snapshot is a small manifest listing its
+chunks. Restoring reassembles them and commits the result as a new
+generation through the active store, JSON, binary or partitioned.
+
+Usage, from the Projects directory:
+    python -m skillswap.snapshots create
+    python -m skillswap.snapshots list
+    python -m skillswap.snapshots restore 20240101-020000-000000 [--to data.json]
+    python -m skillswap.snapshots prune --keep 14
+"""
+
+from pathlib import Path
+import argparse, datetime, gzip, hashlib, json, os, zlib
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from .store import COLLECTIONS, ConflictError, VersionedStore, open_store, read_data, temp_path
+
+# ---------------- Config ----------------
+SNAPSHOT_DIR = Path("snapshots")
+CHUNK_RECORDS = 256     # average records per chunk
+MAX_CHUNK_RECORDS = 1024
+COMPRESS_LEVEL = 6
+
+# ---------------- Chunks ----------------
+def chunk_path(digest: str, root: Path = SNAPSHOT_DIR) -> Path:
+    return root / "chunks" / digest[:2] / f"{digest}.jsonl.gz"
+
+def _boundary(rec_id: str) -> bool:
+    return zlib.crc32(str(rec_id).encode("utf-8")) % CHUNK_RECORDS == 0
+
+def _split(keyed: Iterable[Tuple[str, str]]) -> Iterator[List[str]]:
+    # Content-defined: a chunk ends after any line whose key hashes to a boundary
+    lines = []
+    for key, line in keyed:
+        lines.append(line)
+        if _boundary(key) or len(lines) >= MAX_CHUNK_RECORDS:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+def split_chunks(records: List[Dict[str, Any]]) -> Iterator[List[str]]:
+    return _split((rec["id"], json.dumps(rec)) for rec in records)
+
+def split_index(index: Dict[str, Any]) -> Iterator[List[str]]:
+    # One [key, value] line per entry, so a change to one key rewrites only its chunk
+    return _split((key, json.dumps([key, value])) for key, value in index.items())
+
+def write_chunk(lines: List[str], root: Path, stats: Dict[str, int]) -> str:
+    raw = ("\n".join(lines) + "\n").encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    path = chunk_path(digest, root)
+    if path.exists():
+        stats["chunks_reused"] += 1
+        return digest
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = temp_path(path)
+    # mtime=0 keeps the compressed bytes identical for identical content
+    with open(tmp, "wb") as f, gzip.GzipFile(fileobj=f, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0) as gz:
+        gz.write(raw)
+    os.replace(tmp, path)
+    stats["chunks_new"] += 1
+    stats["bytes_written"] += path.stat().st_size
+    return digest
+
+def read_chunk(digest: str, root: Path = SNAPSHOT_DIR) -> Iterator[str]:
+    with gzip.open(chunk_path(digest, root), "rt", encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+# ---------------- Snapshots ----------------
+def create_snapshot(data: Dict[str, Any], root: Path = SNAPSHOT_DIR) -> Dict[str, Any]:
+    stats = {"chunks_new": 0, "chunks_reused": 0, "bytes_written": 0}
+    manifest = {
+        "collections": {},
+        "indexes": {},
+        "sections": [],
+        "records": {},
+    }
+    for name in COLLECTIONS:
+        records = data.get(name, [])
+        manifest["collections"][name] = [write_chunk(lines, root, stats) for lines in split_chunks(records)]
+        manifest["records"][name] = len(records)
+    for name, index in (data.get("indexes") or {}).items():
+        if isinstance(index, dict):
+            manifest["indexes"][name] = [write_chunk(lines, root, stats) for lines in split_index(index)]
+        else:
+            manifest["sections"].append(write_chunk([json.dumps(["indexes", {name: index}])], root, stats))
+    for key, value in data.items():
+        if key not in COLLECTIONS and key not in ("generation", "indexes"):
+            # One chunk per section, so an unchanged one is shared between snapshots
+            manifest["sections"].append(write_chunk([json.dumps([key, value])], root, stats))
+    manifest.update(stats)
+    _claim_manifest(manifest, root)
+    return manifest
+
+def _claim_manifest(manifest: Dict[str, Any], root: Path):
+    # Ids go down to the microsecond, and the manifest is linked into place only if
+    # no snapshot took the same id first, so concurrent snapshots never overwrite each other
+    root.mkdir(parents=True, exist_ok=True)
+    while True:
+        now = datetime.datetime.now()
+        manifest["id"] = now.strftime("%Y%m%d-%H%M%S-%f")
+        manifest["created_at"] = now.isoformat()
+        path = root / f"{manifest['id']}.json"
+        tmp = temp_path(path)
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        try:
+            os.link(tmp, path)
+            return
+        except FileExistsError:
+            continue
+        finally:
+            tmp.unlink()
+
+def list_snapshots(root: Path = SNAPSHOT_DIR) -> List[Dict[str, Any]]:
+    return [json.loads(p.read_text(encoding="utf-8")) for p in sorted(root.glob("*.json"))]
+
+def load_manifest(snapshot_id: str, root: Path = SNAPSHOT_DIR) -> Dict[str, Any]:
+    path = root / f"{snapshot_id}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"no snapshot {snapshot_id} in {root}")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def read_snapshot(snapshot_id: str, root: Path = SNAPSHOT_DIR) -> Dict[str, Any]:
+    # The document as it was snapshotted, reassembled from its chunks
+    manifest = load_manifest(snapshot_id, root)
+    data: Dict[str, Any] = {}
+    for name, digests in manifest["collections"].items():
+        data[name] = [json.loads(line) for digest in digests for line in read_chunk(digest, root)]
+    for digest in manifest["sections"]:
+        for line in read_chunk(digest, root):
+            key, value = json.loads(line)
+            if key == "indexes":
+                # Older snapshots kept all indexes in one section
+                data.setdefault("indexes", {}).update(value)
+            else:
+                data[key] = value
+    for name, digests in manifest.get("indexes", {}).items():
+        index = data.setdefault("indexes", {}).setdefault(name, {})
+        for digest in digests:
+            for line in read_chunk(digest, root):
+                key, value = json.loads(line)
+                index[key] = value
+    return data
+
+def restore_snapshot(snapshot_id: str, target: Optional[Path] = None, root: Path = SNAPSHOT_DIR) -> int:
+    # Commits the snapshot as a new generation of the active store, or of the data
+    # file at target, in the format that file uses; returns the generation
+    data = read_snapshot(snapshot_id, root)
+    store = open_store() if target is None else VersionedStore(target)
+    store.load()
+    if not store.commit(data):
+        raise ConflictError(f"{target or 'the data'} was committed to during the restore; run it again")
+    return store.generation
+
+def prune_snapshots(keep: int, root: Path = SNAPSHOT_DIR) -> Dict[str, int]:
+    # Drops all but the newest snapshots, then any chunk none of the survivors uses
+    manifests = sorted(root.glob("*.json"))
+    for path in manifests[:-keep] if keep else manifests:
+        path.unlink()
+    live = set()
+    for manifest in list_snapshots(root):
+        live.update(manifest["sections"])
+        for digests in list(manifest["collections"].values()) + list(manifest.get("indexes", {}).values()):
+            live.update(digests)
+    removed = 0
+    for path in root.glob("chunks/*/*.jsonl.gz"):
+        if path.name.split(".")[0] not in live:
+            path.unlink()
+            removed += 1
+    return {"snapshots": len(manifests) - min(keep, len(manifests)), "chunks": removed}
+
+# ---------------- Command Line ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Incremental SkillSwap snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create", help="snapshot the current data")
+    commands.add_parser("list", help="list snapshots")
+    restore = commands.add_parser("restore", help="restore a snapshot as a new generation")
+    restore.add_argument("snapshot")
+    restore.add_argument("--to", type=Path, help="a data file to restore into instead of the active store")
+    prune = commands.add_parser("prune", help="keep only the newest snapshots")
+    prune.add_argument("--keep", type=int, default=14)
+    args = parser.parse_args()
+
+    if args.command == "create":
+        m = create_snapshot(read_data())
+        print(f"Snapshot {m['id']}: {m['chunks_new']} new chunks, {m['chunks_reused']} reused, "
+              f"{m['bytes_written'] / 1024:.1f} KB written")
+    elif args.command == "list":
+        for m in list_snapshots():
+            records = ", ".join(f"{n} {name}" for name, n in m["records"].items() if n)
+            print(f"  {m['id']}  {records}  (+{m['bytes_written'] / 1024:.1f} KB)")
+    elif args.command == "restore":
+        generation = restore_snapshot(args.snapshot, args.to)
+        print(f"Restored {args.snapshot} into {args.to or 'the active store'} as generation {generation}")
+    else:
+        removed = prune_snapshots(args.keep)
+        print(f"Removed {removed['snapshots']} snapshots and {removed['chunks']} unused chunks")
+
+if __name__ == "__main__":
+    main()
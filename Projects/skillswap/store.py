@@ -0,0 +1,641 @@
+"""
+SkillSwap storage — the JSON document every page reads and writes.
+
+Every record carries a version that is bumped whenever its content changes;
+the new versions go on copies in the stored document, and a writer adopts
+them with stamped() once the commit is published.
+Commits are compare-and-swap: a writer claims the next generation with an
+exclusive hard link, then publishes it with an atomic rename, so readers
+never see a half-written file and concurrent writers never overwrite each
+other. A writer that loses the race merges its changed records and index
+entries onto the winner's document, provided those were not changed in the
+meantime.
+"""
+
+from pathlib import Path
+import json, json.scanner, marshal, os, threading, time, random
+from typing import List, Dict, Any, Tuple, Optional, Callable, Iterable, Union
+
+from . import columns, compact
+
+# ---------------- Config ----------------
+DATA_FILE = Path("data.json")
+COLLECTIONS = ["users", "requests", "messages", "endorsements", "achievements"]
+KEEP_GENERATIONS = 5    # claimed generation files kept next to the data file
+MAX_RETRIES = 20        # CAS attempts before a commit gives up
+
+# Keyed (collection, id) for records, ("indexes", name, key) for index entries,
+# ("indexes", name) for an index kept whole and ("", name) for other sections
+Fingerprints = Dict[Tuple[str, ...], Tuple[int, int]]
+
+# Decodes one JSON value at the start of a string, without json.loads' per-call checks
+_scan = json.scanner.make_scanner(json.JSONDecoder())
+
+class ConflictError(RuntimeError):
+    pass
+
+# ---------------- Data Management ----------------
+def empty_data() -> Dict[str, Any]:
+    return {name: [] for name in COLLECTIONS}
+
+def generation_path(path: Path, generation: int) -> Path:
+    return path.with_name(f"{path.name}.{generation}")
+
+def _stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _decode_lines(text: str, known: Dict[int, Any]) -> Optional[Tuple[Dict[str, Any], Fingerprints]]:
+    # Reads the one-record-per-line layout encode_versioned writes, with index entries
+    # on lines of their own, fingerprinting each line by its hash; with known objects
+    # (digest -> object) only lines not among them are decoded. None for any other layout
+    lines = text.split("\n")
+    if len(lines) < 3 or lines[0] != "{" or lines[-2:] != ["}", ""]:
+        return None
+    whole = None if known else json.loads(text)
+    data: Dict[str, Any] = {}
+    fps: Fingerprints = {}
+    coll = None
+    name = None     # the index being read, "" between indexes, None outside "indexes"
+    for line in lines[1:-2]:
+        body = line[:-1] if line.endswith(",") else line
+        if coll is not None:
+            if body == "]":
+                coll = None
+            elif body:
+                digest = hash(body)
+                if whole is not None:
+                    rec = whole[coll][len(data[coll])]
+                else:
+                    rec = known.get(digest)
+                    if rec is None:
+                        rec = _scan(body, 0)[0]
+                data[coll].append(rec)
+                fps[(coll, rec["id"])] = (digest, rec.get("version", 0))
+            continue
+        if name is not None:
+            if body == "}":
+                name = None if name == "" else ""
+                continue
+            key, end = _scan(body, 0)
+            if body[end:end + 2] != ": ":
+                return None
+            value = body[end + 2:]
+            if name == "" and value == "{":
+                name = key
+                data["indexes"][name] = {}
+                continue
+            index = data["indexes"] if name == "" else data["indexes"][name]
+            digest = hash(body) if name == "" else hash((name, body))
+            if whole is not None:
+                index[key] = whole["indexes"][key] if name == "" else whole["indexes"][name][key]
+            else:
+                index[key] = known[digest] if digest in known else _scan(value, 0)[0]
+            fps[("indexes", key) if name == "" else ("indexes", name, key)] = (digest, 0)
+            continue
+        key, sep, value = body.partition(": ")
+        if not sep:
+            return None
+        key = _scan(key, 0)[0]
+        if value == "[" and key in COLLECTIONS:
+            coll = key
+            data[key] = []
+            continue
+        if value == "{" and key == "indexes":
+            name = ""
+            data[key] = {}
+            continue
+        digest = hash(value)
+        if whole is not None:
+            data[key] = whole[key]
+        else:
+            data[key] = known[digest] if digest in known else _scan(value, 0)[0]
+        if key == "indexes" and data[key]:
+            # Written by an earlier layout, all indexes on one line
+            fps.update(_index_fingerprints(data[key]))
+        elif key != "generation":
+            fps[("", key)] = (digest, 0)
+    return data, fps
+
+def _read_document(path: Path, known: Optional[Dict[int, Any]] = None,
+                   binary: bool = False) -> Tuple[Dict[str, Any], Optional[Fingerprints], Optional[str]]:
+    # JSON or the compact binary format, told apart by the file header, with the
+    # compression a binary file was written with. Fingerprints in the store's own scheme
+    # come cheaply from our JSON layout (read off the lines) and from binary files
+    raw = path.read_bytes()
+    if compact.is_binary(raw):
+        texts: Dict[str, str] = {}
+        data = compact.decode(raw, texts)
+        return data, fingerprint(data, binary, texts), compact.compression_of(raw)
+    if not binary:
+        decoded = _decode_lines(raw.decode("utf-8"), known or {})
+        if decoded is not None:
+            return decoded + (None,)
+    return json.loads(raw), None, None
+
+def _load_latest(path: Path, known: Optional[Dict[int, Any]] = None,
+                 binary: bool = False) -> Tuple[Dict[str, Any], int, Optional[Fingerprints], Optional[str]]:
+    data, fps, compression = None, None, compact.COMPRESSION
+    try:
+        data, fps, compression = _read_document(path, known, binary)
+        generation = data.get("generation", 0)
+    except FileNotFoundError:
+        generation = 0
+    except ValueError:
+        # Left behind by a non-atomic writer; the newest claimed generation is intact
+        claimed = [int(p.suffix[1:]) for p in path.parent.glob(f"{path.name}.*") if p.suffix[1:].isdigit()]
+        if not claimed:
+            raise ValueError(f"{path} is corrupt and has no generation to recover from")
+        generation = max(claimed)
+        data, fps, compression = _read_document(generation_path(path, generation), known, binary)
+
+    # A generation can be claimed but not yet published, or its writer died in between
+    while generation_path(path, generation + 1).exists():
+        generation += 1
+        data, fps, compression = _read_document(generation_path(path, generation), known, binary)
+    if data is None:
+        return empty_data(), generation, {}, compression
+    return data, generation, fps, compression
+
+def _pruned_past(path: Path, generation: int) -> bool:
+    # Generations are pruned oldest first, so a live claim always has its predecessor
+    if generation > 1:
+        return not generation_path(path, generation - 1).exists()
+    return any(p.suffix[1:].isdigit() and int(p.suffix[1:]) > 1 for p in path.parent.glob(f"{path.name}.*"))
+
+def latest_generation(path: Path) -> int:
+    # Without parsing the document; claims are kept for every recent generation
+    claimed = [int(p.suffix[1:]) for p in path.parent.glob(f"{path.name}.*") if p.suffix[1:].isdigit()]
+    if claimed:
+        return max(claimed)
+    return _load_latest(path)[1] if path.exists() else 0
+
+def temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+def _publish(path: Path, payload: Union[str, bytes], generation: int) -> bool:
+    tmp = temp_path(path)
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    return claim_generation(path, tmp, generation)
+
+def claim_generation(path: Path, tmp: Path, generation: int) -> bool:
+    # Publishes an already written and synced file as the given generation
+    claim = generation_path(path, generation)
+    try:
+        os.link(tmp, claim)
+    except FileExistsError:
+        tmp.unlink()
+        return False
+    if _pruned_past(path, generation):
+        # The number was free only because it had been pruned; our base is long gone
+        claim.unlink()
+        tmp.unlink()
+        return False
+    os.replace(tmp, path)
+    generation_path(path, generation - KEEP_GENERATIONS).unlink(missing_ok=True)
+    return True
+
+# ---------------- Versioned Store ----------------
+def record_digest(rec: Dict[str, Any]) -> int:
+    # Content hash of a record for the binary format, a third of the cost of its JSON text.
+    # Marshal version 2 writes no back-references, so equal records give equal bytes
+    # however their strings happen to be shared
+    return hash(marshal.dumps(rec, 2))
+
+def _index_fingerprints(indexes: Dict[str, Any], binary: bool = False) -> Fingerprints:
+    # Each entry of a dict index on its own, so writers touching different keys of one
+    # index do not conflict; any other index, or an empty one, as a whole
+    fps: Fingerprints = {}
+    for name, index in indexes.items():
+        if isinstance(index, dict) and index:
+            for key, value in index.items():
+                if binary:
+                    digest = record_digest((name, key, value))
+                else:
+                    digest = hash((name, f"{json.dumps(key)}: {json.dumps(value)}"))
+                fps[("indexes", name, key)] = (digest, 0)
+        elif binary:
+            fps[("indexes", name)] = (record_digest((name, index)), 0)
+        else:
+            fps[("indexes", name)] = (hash(f"{json.dumps(name)}: {json.dumps(index)}"), 0)
+    return fps
+
+def fingerprint(data: Dict[str, Any], binary: bool = False, texts: Optional[Dict[str, str]] = None) -> Fingerprints:
+    # Records by their JSON text, or by record_digest for the binary format; indexes by
+    # entry and other sections by their JSON text, taken from texts where it was already dumped
+    texts = texts or {}
+    fps: Fingerprints = {}
+    for key, value in data.items():
+        if key in COLLECTIONS:
+            for rec in value:
+                digest = record_digest(rec) if binary else hash(json.dumps(rec))
+                fps[(key, rec["id"])] = (digest, rec.get("version", 0))
+        elif key == "indexes" and value:
+            fps.update(_index_fingerprints(value, binary))
+        elif key != "generation":
+            fps[("", key)] = (hash(texts[key] if key in texts else json.dumps(value)), 0)
+    return fps
+
+Versions = Dict[Tuple[str, str], int]
+
+def _dump_json(rec: Dict[str, Any]) -> Tuple[Optional[str], int]:
+    text = json.dumps(rec)
+    return text, hash(text)
+
+def _dump_binary(rec: Dict[str, Any]) -> Tuple[Optional[str], int]:
+    return None, record_digest(rec)
+
+def _written(rec: Dict[str, Any], before: Optional[Tuple[int, int]],
+             dump: Callable[[Dict[str, Any]], Tuple[Optional[str], int]]) -> Tuple[Dict[str, Any], Tuple[Optional[str], int], int]:
+    # The record as stored, its dump and its version: the base version while its content
+    # is unchanged, the next one once it changed. A record holding another version is
+    # stored as a copy, so the caller's record is never changed
+    version = before[1] if before else 0
+    written = rec if rec.get("version", 0) == version else dict(rec, version=version)
+    dumped = dump(written)
+    if before is None or dumped[1] != before[0]:
+        version += 1
+        written = dict(rec, version=version)
+        dumped = dump(written)
+    return written, dumped, version
+
+def _version_collection(coll: str, records: List[Dict[str, Any]], base: Fingerprints,
+                        dump: Callable[[Dict[str, Any]], Tuple[Optional[str], int]],
+                        fps: Fingerprints, versions: Versions) -> Tuple[List[Dict[str, Any]], List[Optional[str]]]:
+    # The records as stored, copying the list only if a record was copied, and their dumps
+    stored = None
+    texts = []
+    for i, rec in enumerate(records):
+        key = (coll, rec["id"])
+        written, (text, digest), version = _written(rec, base.get(key), dump)
+        if written is not rec:
+            if stored is None:
+                stored = list(records)
+            stored[i] = written
+            versions[key] = version
+        fps[key] = (digest, version)
+        texts.append(text)
+    return (records if stored is None else stored), texts
+
+def _encode_indexes(indexes: Dict[str, Any], fps: Fingerprints) -> str:
+    # One line per entry of each dict index, the lines _index_fingerprints hashes
+    blocks = []
+    for name, index in indexes.items():
+        if isinstance(index, dict) and index:
+            lines = []
+            for key, value in index.items():
+                line = f"{json.dumps(key)}: {json.dumps(value)}"
+                fps[("indexes", name, key)] = (hash((name, line)), 0)
+                lines.append(line)
+            blocks.append(f"{json.dumps(name)}: {{\n" + ",\n".join(lines) + "\n}")
+        else:
+            line = f"{json.dumps(name)}: {json.dumps(index)}"
+            fps[("indexes", name)] = (hash(line), 0)
+            blocks.append(line)
+    return '"indexes": {\n' + ",\n".join(blocks) + "\n}"
+
+def encode_versioned(data: Dict[str, Any], base: Fingerprints,
+                     generation: int) -> Tuple[str, Fingerprints, Dict[str, Any], Versions]:
+    # One record, or index entry, per line; records whose content differs from the base
+    # get the next version. Also returns the document as stored, which is data with
+    # stamped copies of the records whose version changed, and those versions; data is
+    # left as it was
+    doc = dict(data, generation=generation)
+    fps: Fingerprints = {}
+    versions: Versions = {}
+    parts = []
+    for key, value in list(doc.items()):
+        if key in COLLECTIONS:
+            doc[key], encoded = _version_collection(key, value, base, _dump_json, fps, versions)
+            parts.append(f"{json.dumps(key)}: [\n" + ",\n".join(encoded) + "\n]")
+        elif key == "indexes" and value:
+            parts.append(_encode_indexes(value, fps))
+        else:
+            enc = json.dumps(value)
+            if key != "generation":
+                fps[("", key)] = (hash(enc), 0)
+            parts.append(f"{json.dumps(key)}: {enc}")
+    return "{\n" + ",\n".join(parts) + "\n}\n", fps, doc, versions
+
+def version_binary(data: Dict[str, Any], base: Fingerprints,
+                   generation: int) -> Tuple[Dict[str, Any], Dict[str, str], Fingerprints, Versions]:
+    # encode_versioned for the binary format: records and index entries are compared by
+    # record_digest and only the other sections kept as JSON are dumped, their text handed
+    # on to compact.encode along with the document as stored
+    doc = dict(data, generation=generation)
+    fps: Fingerprints = {}
+    versions: Versions = {}
+    texts: Dict[str, str] = {}
+    for key, value in list(doc.items()):
+        if key in COLLECTIONS:
+            doc[key] = _version_collection(key, value, base, _dump_binary, fps, versions)[0]
+        elif key == "indexes" and value:
+            fps.update(_index_fingerprints(value, True))
+        else:
+            texts[key] = json.dumps(value)
+            if key != "generation":
+                fps[("", key)] = (hash(texts[key]), 0)
+    return doc, texts, fps, versions
+
+def known_objects(data: Dict[str, Any], fps: Fingerprints) -> Dict[int, Any]:
+    # Digest -> the record, index entry or section it was taken from, for reloads to reuse
+    objects = {}
+    for key, value in data.items():
+        if key in COLLECTIONS:
+            for rec in value:
+                fp = fps.get((key, rec["id"]))
+                if fp is not None:
+                    objects[fp[0]] = rec
+        elif key == "indexes" and value:
+            for name, index in value.items():
+                if ("indexes", name) in fps:
+                    objects[fps[("indexes", name)][0]] = index
+                    continue
+                for k, entry in index.items():
+                    fp = fps.get(("indexes", name, k))
+                    if fp is not None:
+                        objects[fp[0]] = entry
+        elif ("", key) in fps:
+            objects[fps[("", key)][0]] = value
+    return objects
+
+def backoff(attempt: int):
+    # Jittered, so writers that collided once do not keep colliding
+    time.sleep(random.uniform(0, 0.002 * 2 ** min(attempt, 8)))
+
+def _marker(fps: Fingerprints, key: Tuple[str, ...]) -> Optional[int]:
+    # Records conflict on version, index entries and other sections on content
+    fp = fps.get(key)
+    return None if fp is None else fp[1] if key[0] in COLLECTIONS else fp[0]
+
+def _derived(key: Tuple[str, ...]) -> bool:
+    # The positions index follows the collections; a merge rebuilds it rather than merging it
+    return key[:2] == ("indexes", "positions")
+
+class VersionedStore:
+    def __init__(self, path: Path = DATA_FILE, binary: Optional[bool] = None, columns: Optional[Path] = None):
+        self.path = path
+        # Writes the compact binary format instead of JSON; by default for .ssb files
+        self.binary = path.suffix == compact.BINARY_FILE.suffix if binary is None else binary
+        # Binary files keep the compression found in the file they replace
+        self.compression = compact.COMPRESSION
+        # Column snapshot rewritten after each commit, if any
+        self.columns = columns
+        self.generation = 0
+        self.fingerprints: Fingerprints = {}
+        self._stamp = None
+        # Objects last loaded or prepared, by digest; they must not be changed in place
+        # before the next reload, which hands unchanged ones back instead of decoding them
+        self._objects: Dict[int, Any] = {}
+        # Versions the last published commit assigned, by (collection, id)
+        self.published: Versions = {}
+
+    def load(self) -> Dict[str, Any]:
+        return self._load({})
+
+    def reload(self) -> Dict[str, Any]:
+        # The latest document, decoding only what changed since the last load or prepare
+        return self._load(self._objects)
+
+    def _load(self, known: Dict[int, Any]) -> Dict[str, Any]:
+        self._stamp = _stamp(self.path)
+        data, self.generation, fps, self.compression = _load_latest(self.path, known, self.binary)
+        self.fingerprints = fingerprint(data, self.binary) if fps is None else fps
+        self._objects = known_objects(data, self.fingerprints)
+        return data
+
+    def stale(self) -> bool:
+        return _stamp(self.path) != self._stamp
+
+    def prepare(self, data: Dict[str, Any]) -> Tuple[Union[str, bytes], Fingerprints, int, Optional[bytes], Versions]:
+        # data is not changed: records whose version changes are stored as copies, and
+        # the versions are kept for stamped() once the commit is published
+        if self.binary:
+            doc, texts, fps, versions = version_binary(data, self.fingerprints, self.generation + 1)
+            payload = compact.encode(doc, self.compression, texts)
+        else:
+            payload, fps, doc, versions = encode_versioned(data, self.fingerprints, self.generation + 1)
+        self._objects = known_objects(doc, fps)
+        stats = columns.encode_columns(data, self.generation + 1) if self.columns else None
+        return payload, fps, self.generation + 1, stats, versions
+
+    def publish(self, prepared: Tuple[Union[str, bytes], Fingerprints, int, Optional[bytes], Versions]) -> bool:
+        payload, fps, generation, stats, versions = prepared
+        if not _publish(self.path, payload, generation):
+            return False
+        self.generation, self.fingerprints = generation, fps
+        self.published = versions
+        self._stamp = _stamp(self.path)
+        if stats is not None:
+            columns.install_columns(stats, self.columns)
+        return True
+
+    def stamped(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # data with the versions the last published commit gave its records
+        return stamp_versions(data, self.published)
+
+    def commit(self, data: Dict[str, Any]) -> bool:
+        return self.publish(self.prepare(data))
+
+    def rebase(self, data: Dict[str, Any], force: bool = False) -> Tuple[Dict[str, Any], bool]:
+        # Returns the latest document with our changed records merged in, and whether
+        # that was possible; on a record-level conflict the latest document is returned
+        # as-is, unless force is set, in which case our version of those records wins
+        base = self.fingerprints
+        # Compared the way prepare would store data, so records whose only difference is
+        # a version they were never stamped with do not count as changed
+        if self.binary:
+            ours = version_binary(data, base, self.generation + 1)[2]
+        else:
+            ours = encode_versioned(data, base, self.generation + 1)[1]
+        changed = [k for k, fp in ours.items() if base.get(k) != fp and not _derived(k)]
+        removed = [k for k in base if k not in ours and not _derived(k)]
+
+        latest = self.reload()
+        if not force:
+            for key in changed + removed:
+                if _marker(self.fingerprints, key) != _marker(base, key):
+                    return latest, False
+
+        touched = {key[0] for key in changed + removed if key[0] in COLLECTIONS}
+        positions = {coll: {r["id"]: i for i, r in enumerate(latest.setdefault(coll, []))} for coll in touched}
+        records = {(coll, r["id"]): r for coll in touched for r in data.get(coll, [])}
+        # Indexes of latest are copied before they are changed, as reloads share their objects
+        theirs = dict(latest.get("indexes") or {})
+        copied = set()
+
+        def index(name: str) -> Dict[str, Any]:
+            if name not in copied:
+                copied.add(name)
+                current = theirs.get(name)
+                theirs[name] = dict(current) if isinstance(current, dict) else {}
+            return theirs[name]
+
+        for key in changed:
+            if key[0] == "indexes" and len(key) == 3:
+                index(key[1])[key[2]] = data["indexes"][key[1]][key[2]]
+            elif key[0] == "indexes":
+                theirs[key[1]] = data["indexes"][key[1]]
+                copied.discard(key[1])
+            elif not key[0]:
+                latest[key[1]] = data[key[1]]
+            elif key[1] in positions[key[0]]:
+                latest[key[0]][positions[key[0]][key[1]]] = records[key]
+            else:
+                latest[key[0]].append(records[key])
+        dropped = {}
+        for key in removed:
+            if key[0] == "indexes" and len(key) == 3:
+                if key[1] in theirs:
+                    index(key[1]).pop(key[2], None)
+            elif key[0] == "indexes":
+                if key[1] not in data.get("indexes", {}):
+                    theirs.pop(key[1], None)
+            elif not key[0]:
+                latest.pop(key[1], None)
+            else:
+                dropped.setdefault(key[0], set()).add(key[1])
+        for coll, ids in dropped.items():
+            latest[coll] = [r for r in latest[coll] if r["id"] not in ids]
+        if isinstance(theirs.get("positions"), dict):
+            index("positions").update((coll, {r["id"]: i for i, r in enumerate(latest[coll])}) for coll in touched)
+        if theirs or "indexes" in latest:
+            latest["indexes"] = theirs
+        return latest, True
+
+# ---------------- Simple Access ----------------
+def open_store():
+    # Partitioned when a partition manifest exists, then the binary data file if one
+    # was converted, the JSON data file otherwise
+    from .partitions import PartitionedStore, PARTITION_DIR, MANIFEST
+    if (PARTITION_DIR / MANIFEST).exists():
+        return PartitionedStore(columns=columns.COLUMNS_FILE)
+    if compact.BINARY_FILE.exists():
+        return VersionedStore(compact.BINARY_FILE, columns=columns.COLUMNS_FILE)
+    return VersionedStore(columns=columns.COLUMNS_FILE)
+
+def read_data() -> Dict[str, Any]:
+    return open_store().load()
+
+def update_data(mutation: Callable[[Dict[str, Any]], Any], store=None) -> Any:
+    # Load, mutate and commit; if another writer won, merge onto theirs or re-run the mutation
+    store = store or open_store()
+    data = store.load()
+    result = mutation(data)
+    for attempt in range(MAX_RETRIES):
+        if store.commit(data):
+            return result
+        backoff(attempt)
+        data, clean = store.rebase(data)
+        if not clean:
+            result = mutation(data)
+    raise ConflictError(f"gave up after {MAX_RETRIES} conflicting commits")
+
+def write_data(data: Dict[str, Any]):
+    # Replaces the whole document, whatever other writers published in between
+    def replace(current):
+        current.clear()
+        current.update(data)
+    update_data(replace)
+
+def get_index(data: Dict[str, Any], name: str) -> Dict[str, Any]:
+    # Materialized indexes live next to the collections so they are saved in the same write
+    return data.setdefault("indexes", {}).setdefault(name, {})
+
+def read_section(data: Dict[str, Any], name: str, default: Any = None) -> Any:
+    # For helpers that only read: a writer's lazy view hands out its shared section
+    # instead of copying it, so the result must not be modified
+    peek = getattr(data, "peek", None)
+    return peek(name, default) if peek else data.get(name, default)
+
+def read_index(data: Dict[str, Any], name: str) -> Dict[str, Any]:
+    return read_section(data, "indexes", {}).get(name, {})
+
+def own_record(data: Dict[str, Any], user_id: str, collection: str, rec_id: str):
+    # Per-user record ids, so everything a user owns is found without a scan
+    get_index(data, "owned").setdefault(user_id, {}).setdefault(collection, []).append(rec_id)
+
+# ---------------- Record Positions ----------------
+def rebuild_positions(data: Dict[str, Any]):
+    # Recovers the index from the collections, e.g. after a bulk edit
+    data.setdefault("indexes", {})["positions"] = {
+        coll: {rec["id"]: i for i, rec in enumerate(data.get(coll, []))} for coll in COLLECTIONS}
+
+def record_position(data: Dict[str, Any], collection: str, rec_id: str) -> Optional[int]:
+    # Where a record sits in its collection, through the "positions" index. A position
+    # is trusted only if the record there has the id, and an absence only if the index
+    # covers the whole collection; otherwise, e.g. after a bulk import appended without
+    # the index, the collection is scanned
+    records = read_section(data, collection, [])
+    positions = read_index(data, "positions").get(collection)
+    if positions is not None:
+        pos = positions.get(rec_id)
+        if pos is not None and pos < len(records) and records[pos]["id"] == rec_id:
+            return pos
+        if pos is None and len(positions) == len(records):
+            return None
+    return next((i for i, r in enumerate(records) if r["id"] == rec_id), None)
+
+def find_record(data: Dict[str, Any], collection: str, rec_id: str) -> Optional[Dict[str, Any]]:
+    # For reading; a mutation changes data[collection][record_position(...)] instead
+    pos = record_position(data, collection, rec_id)
+    return None if pos is None else read_section(data, collection, [])[pos]
+
+def _positions(data: Dict[str, Any], collection: str, rebuild: bool = False) -> Dict[str, int]:
+    # The collection's positions, rebuilt if it was changed without them
+    records = data.get(collection, [])
+    index = get_index(data, "positions")
+    if rebuild or collection not in index or len(index[collection]) != len(records):
+        index[collection] = {rec["id"]: i for i, rec in enumerate(records)}
+    return index[collection]
+
+def add_record(data: Dict[str, Any], collection: str, rec: Dict[str, Any]):
+    positions = _positions(data, collection)
+    records = data.setdefault(collection, [])
+    positions[rec["id"]] = len(records)
+    records.append(rec)
+
+def stamp_versions(data: Dict[str, Any], versions: Versions) -> Dict[str, Any]:
+    # A copy of data whose records carry the given versions. Records that change, and the
+    # lists holding them, are copied rather than changed, so readers of data are unaffected
+    stamped = dict(data)
+    for (coll, rec_id), version in versions.items():
+        pos = record_position(data, coll, rec_id)
+        if pos is None or data[coll][pos].get("version", 0) == version:
+            continue
+        if stamped[coll] is data[coll]:
+            stamped[coll] = list(data[coll])
+        stamped[coll][pos] = dict(data[coll][pos], version=version)
+    return stamped
+
+def remove_records(data: Dict[str, Any], collection: str, rec_ids: Iterable[str]) -> List[Dict[str, Any]]:
+    # Each removed record's place is taken by the collection's last record, so only the
+    # positions of the records that move change, not those of everything after the gap.
+    # Returns the removed records
+    positions = _positions(data, collection)
+    records = data.get(collection, [])
+    removed = []
+    for rec_id in rec_ids:
+        pos = positions.get(rec_id)
+        if pos is not None and (pos >= len(records) or records[pos]["id"] != rec_id):
+            positions = _positions(data, collection, rebuild=True)
+            pos = positions.get(rec_id)
+        if pos is None:
+            continue
+        del positions[rec_id]
+        last = records.pop()
+        if pos < len(records):
+            removed.append(records[pos])
+            records[pos] = last
+            positions[last["id"]] = pos
+        else:
+            removed.append(last)
+    return removed
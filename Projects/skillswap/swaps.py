@@ -0,0 +1,151 @@
+"""
+Swap requests — at most one open request per (sender, receiver, skill
+offered, skill wanted), found through an index instead of a scan, so sending
+the same request twice is a no-op.
+
+Every user also has a mailbox index: received ("in") and sent ("out")
+requests, split by status and ordered by the time they entered it, so the
+Requests tabs read one page of one user's requests and their counts are the
+list lengths. Status changes go through set_status to keep both indexes and
+the request rollups up to date.
+"""
+
+import bisect, datetime, heapq, itertools
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from .store import add_record, get_index, read_index
+from .rollups import count_status, record, record_status
+
+OPEN_STATUSES = ["Pending", "Accepted"]
+STATUSES = ["Pending", "Accepted", "Completed", "Rejected"]
+PAGE_SIZE = 10
+
+Cursor = Optional[List[str]]
+
+# ---------------- Open Requests ----------------
+def pair_key(sender_id: str, receiver_id: str) -> str:
+    return f"{sender_id}:{receiver_id}"
+
+def skills_key(skill_offered: str, skill_wanted: str) -> str:
+    return f"{skill_offered}:{skill_wanted}"
+
+def open_request_id(data: Dict[str, Any], sender_id: str, receiver_id: str,
+                    skill_offered: str, skill_wanted: str) -> Optional[str]:
+    pair = read_index(data, "open_requests").get(pair_key(sender_id, receiver_id), {})
+    return pair.get(skills_key(skill_offered, skill_wanted))
+
+def requested(data: Dict[str, Any], sender_id: str, receiver_ids: Iterable[str]) -> set:
+    # Everyone in receiver_ids who already has an open request from sender, in one pass
+    index = read_index(data, "open_requests")
+    return {r for r in receiver_ids if index.get(pair_key(sender_id, r))}
+
+def _unindex_open(index: Dict[str, Any], req: Dict[str, Any]):
+    pk = pair_key(req["sender_id"], req["receiver_id"])
+    key = skills_key(req["skill_offered"], req["skill_wanted"])
+    pair = index.get(pk, {})
+    if pair.get(key) == req["id"]:
+        del pair[key]
+        if not pair:
+            del index[pk]
+
+# ---------------- Mailboxes ----------------
+def _entry(req: Dict[str, Any]) -> List[str]:
+    return [req.get("updated_at") or req.get("created_at", ""), req["id"]]
+
+def _lanes(req: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [(req["receiver_id"], "in"), (req["sender_id"], "out")]
+
+def _file(index: Dict[str, Any], req: Dict[str, Any]):
+    for user_id, box in _lanes(req):
+        entries = index.setdefault(user_id, {}).setdefault(box, {}).setdefault(req["status"], [])
+        bisect.insort(entries, _entry(req))
+
+def _unfile(index: Dict[str, Any], req: Dict[str, Any]):
+    # Lanes are sorted, so the entry is found by bisection; a request whose timestamps
+    # changed since it was filed falls back to a scan of its lane
+    entry = _entry(req)
+    for user_id, box in _lanes(req):
+        lists = index.get(user_id, {}).get(box, {})
+        entries = lists.get(req["status"], [])
+        i = bisect.bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+        else:
+            for i in range(len(entries) - 1, -1, -1):
+                if entries[i][1] == req["id"]:
+                    del entries[i]
+                    break
+        if not entries:
+            lists.pop(req["status"], None)
+
+def mailbox_count(data: Dict[str, Any], user_id: str, box: str, statuses: Iterable[str] = STATUSES) -> int:
+    lists = read_index(data, "mailboxes").get(user_id, {}).get(box, {})
+    return sum(len(lists.get(status, [])) for status in statuses)
+
+def _newest_first(entries: List[List[str]], end: int):
+    for i in range(end - 1, -1, -1):
+        yield entries[i]
+
+def mailbox_page(data: Dict[str, Any], user_id: str, lanes: List[Tuple[str, str]], cursor: Cursor = None,
+                 limit: int = PAGE_SIZE) -> Tuple[List[str], Cursor]:
+    # Newest first across the given (box, status) lanes; the cursor is the last
+    # entry already shown, and None comes back once nothing older is left
+    lists = read_index(data, "mailboxes").get(user_id, {})
+    streams = []
+    for box, status in lanes:
+        entries = lists.get(box, {}).get(status, [])
+        end = bisect.bisect_left(entries, cursor) if cursor else len(entries)
+        streams.append(_newest_first(entries, end))
+    shown = list(itertools.islice(heapq.merge(*streams, reverse=True), limit + 1))
+    next_cursor = shown[limit - 1] if len(shown) > limit else None
+    return [rec_id for _, rec_id in shown[:limit]], next_cursor
+
+# ---------------- Changes ----------------
+def add_request(data: Dict[str, Any], req: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Returns None when the same open request already exists
+    index = get_index(data, "open_requests")
+    pk = pair_key(req["sender_id"], req["receiver_id"])
+    key = skills_key(req["skill_offered"], req["skill_wanted"])
+    if key in index.get(pk, {}):
+        return None
+    add_record(data, "requests", req)
+    if req["status"] in OPEN_STATUSES:
+        index.setdefault(pk, {})[key] = req["id"]
+    _file(get_index(data, "mailboxes"), req)
+    record(data, "created", req.get("created_at", ""))
+    record_status(data, req)
+    count_status(data, req["status"])
+    return req
+
+def set_status(data: Dict[str, Any], req: Dict[str, Any], status: str):
+    mailboxes = get_index(data, "mailboxes")
+    _unfile(mailboxes, req)
+    count_status(data, req["status"], -1)
+    req["status"] = status
+    req["updated_at"] = datetime.datetime.utcnow().isoformat()
+    _file(mailboxes, req)
+    record_status(data, req)
+    count_status(data, status)
+    if status not in OPEN_STATUSES:
+        _unindex_open(get_index(data, "open_requests"), req)
+
+def unindex_request(data: Dict[str, Any], req: Dict[str, Any]):
+    # For requests leaving the hot data, e.g. into the archive
+    _unindex_open(get_index(data, "open_requests"), req)
+    _unfile(get_index(data, "mailboxes"), req)
+
+def rebuild_request_indexes(data: Dict[str, Any]):
+    # Recovers both indexes from the requests collection, e.g. after a bulk edit
+    indexes = data.setdefault("indexes", {})
+    open_index = indexes["open_requests"] = {}
+    mailboxes = indexes["mailboxes"] = {}
+    for req in data.get("requests", []):
+        if req["status"] in OPEN_STATUSES:
+            pair = open_index.setdefault(pair_key(req["sender_id"], req["receiver_id"]), {})
+            pair.setdefault(skills_key(req["skill_offered"], req["skill_wanted"]), req["id"])
+        for user_id, box in _lanes(req):
+            mailboxes.setdefault(user_id, {}).setdefault(box, {}).setdefault(req["status"], []).append(_entry(req))
+    for boxes in mailboxes.values():
+        for lists in boxes.values():
+            for entries in lists.values():
+                entries.sort()
@@ -0,0 +1,75 @@
+"""
+Synthetic SkillSwap datasets for benchmarks and recall harnesses.
+
+Skill popularity follows a Zipf-like curve, so a few skills (like "python")
+appear on a large share of profiles, as they do on the real platform.
+"""
+
+import random, datetime
+from typing import List, Dict, Any
+
+from .models import make_user, make_request
+
+SKILLS = ["python", "react", "javascript", "sql", "aws", "docker", "typescript", "figma",
+          "django", "kubernetes", "pandas", "golang", "rust", "java", "css", "tailwind",
+          "terraform", "numpy", "matplotlib", "scikit-learn", "postgresql", "flutter",
+          "swift", "kotlin", "excel", "tableau", "photoshop", "spanish", "guitar", "public speaking"]
+SKILLS += [f"skill-{i}" for i in range(470)]
+LOCATIONS = ["Mumbai", "Bangalore", "Pune", "Delhi", "Hyderabad", "Chennai", "Kolkata", "Remote"]
+INTERESTS = ["web dev", "AI", "gaming", "design", "cloud", "data science", "music", "startups",
+             "open source", "mobile", "security", "writing"]
+LEVELS = ["Beginner", "Intermediate", "Expert"]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(SKILLS))]
+
+def _pick_skills(rng: random.Random, k: int) -> List[str]:
+    picked = set()
+    while len(picked) < k:
+        picked.add(rng.choices(SKILLS, weights=WEIGHTS)[0])
+    return sorted(picked)
+
+def generate_users(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    users = []
+    for i in range(n):
+        offered = _pick_skills(rng, rng.randint(2, 6))
+        wanted = [s for s in _pick_skills(rng, rng.randint(2, 5)) if s not in offered] or ["guitar"]
+        user = make_user(
+            f"User {i}", f"user{i}@skillswap.com", "Synthetic profile",
+            offered, wanted, {s: rng.choice(LEVELS) for s in offered},
+            rng.choice(LOCATIONS), rng.sample(INTERESTS, rng.randint(0, 3))
+        )
+        user["rating"] = round(rng.uniform(3.5, 5.0), 1)
+        user["swaps_completed"] = rng.randint(0, 20)
+        user["experience_points"] = user["swaps_completed"] * 50
+        user["level"] = user["experience_points"] // 100 + 1
+        user["response_rate"] = rng.randint(70, 100)
+        user["availability"] = rng.choice(["Available", "Available", "Busy", "Away"])
+        users.append(user)
+    return users
+
+def generate_requests(users: List[Dict[str, Any]], n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime.datetime.utcnow() - datetime.timedelta(days=365)
+    requests = []
+    for _ in range(n):
+        sender, receiver = rng.sample(users, 2)
+        req = make_request(sender["id"], receiver["id"], rng.choice(sender["skills_offered"]), 
+                           rng.choice(receiver["skills_offered"]), "Hi, let's swap!",
+                           rng.choice(["Low", "Medium", "High"]))
+        created = start + datetime.timedelta(seconds=rng.randint(0, 365 * 86400))
+        req["created_at"] = created.isoformat()
+        req["status"] = rng.choice(["Pending", "Accepted", "Completed", "Completed", "Rejected"])
+        updated = created if req["status"] == "Pending" else created + datetime.timedelta(hours=rng.randint(1, 240))
+        req["updated_at"] = updated.isoformat()
+        requests.append(req)
+    return requests
+
+def generate_data(n_users: int, n_requests: int = 0, seed: int = 42) -> Dict[str, Any]:
+    users = generate_users(n_users, seed)
+    return {
+        "users": users,
+        "requests": generate_requests(users, n_requests, seed) if n_requests and len(users) > 1 else [],
+        "messages": [],
+        "endorsements": [],
+        "achievements": []
+    }
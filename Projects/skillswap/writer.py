@@ -0,0 +1,391 @@
+"""
+Write-behind store — UI handlers submit mutations, which are applied to a
+shared in-memory copy of the data at once, while a background thread
+flushes each burst of them to disk in a single versioned commit. Every
+submit returns a Future that resolves with the mutation's result once it
+is durable.
+
+If another process committed first, the flush merges our changed records
+onto its document, or replays the pending mutations on it when the same
+records were touched, then tries again. When another process's commit is
+picked up, only the records and sections it changed are decoded.
+
+Slow batch work goes through submit_job: it runs on a job thread against its
+own copy-on-write view and hands back the mutation to commit, so neither the
+page nor other writers wait for it.
+
+The shared data is never changed in place. A mutation sees it through
+copy-on-write containers: each dict or list it reaches is shallow-copied
+the first time, so a change copies only the path down to the record it
+touches, and readers keep the objects they already hold.
+"""
+
+import copy, threading, time, atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Tuple, Optional
+
+from .columns import ColumnSnapshot, encode_columns, load_columns
+from .store import ConflictError, MAX_RETRIES, backoff, open_store
+
+COALESCE_WINDOW = 0.05  # seconds a burst may keep growing before it is flushed
+
+Mutation = Callable[[Dict[str, Any]], Any]
+Job = Callable[[Dict[str, Any]], Mutation]
+
+# ---------------- Copy on Write ----------------
+class Copies:
+    # The copies made for one mutation or one reader's view; once closed they
+    # behave as plain containers and are copied again before any change
+    def __init__(self):
+        self.open = True
+
+def _private(value: Any, copies: Copies) -> Any:
+    # value itself if it was copied for this mutation already, else a shallow copy of it
+    kind = type(value)
+    if kind is dict or (kind is CowDict and value._copies is not copies):
+        return CowDict(value, copies)
+    if kind is list or (kind is CowList and value._copies is not copies):
+        return CowList(value, copies)
+    return value
+
+def settle(value: Any) -> Any:
+    # Back to plain containers, so shared data behaves exactly like loaded data. Children
+    # still shared with the source are left alone; anything else is walked, since a
+    # container the mutation built may hold copies it made
+    kind = type(value)
+    if kind is CowDict or kind is LazySections:
+        source = value._source
+        return {k: v if k in source and dict.get(source, k) is v else settle(v) for k, v in dict.items(value)}
+    if kind is CowList:
+        source = value._source
+        ids = None
+        settled = []
+        for i, v in enumerate(list.__iter__(value)):
+            if type(v) in (dict, list):
+                if i < len(source) and list.__getitem__(source, i) is v:
+                    settled.append(v)
+                    continue
+                if ids is None:
+                    ids = {id(x) for x in list.__iter__(source)}
+                if id(v) in ids:
+                    settled.append(v)
+                    continue
+            settled.append(settle(v))
+        return settled
+    # Built by the mutation, so it is ours to change
+    if kind is dict:
+        for k, v in dict.items(value):
+            if type(v) in _CONTAINERS:
+                value[k] = settle(v)
+    elif kind is list:
+        for i, v in enumerate(value):
+            if type(v) in _CONTAINERS:
+                value[i] = settle(v)
+    return value
+
+class CowDict(dict):
+    # A shallow copy whose nested dicts and lists are copied in turn as they are reached
+    __slots__ = ("_source", "_copies")
+
+    def __init__(self, source: Dict[str, Any], copies: Copies):
+        super().__init__(source)
+        self._source = source
+        self._copies = copies
+
+    def _reach(self, key, value):
+        if not self._copies.open:
+            return value
+        private = _private(value, self._copies)
+        if private is not value:
+            dict.__setitem__(self, key, private)
+        return private
+
+    def __getitem__(self, key):
+        return self._reach(key, dict.__getitem__(self, key))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def pop(self, key, *default):
+        value = dict.pop(self, key, *default)
+        return _private(value, self._copies) if self._copies.open else value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        return key, _private(value, self._copies) if self._copies.open else value
+
+    def values(self):
+        return [self[key] for key in self] if self._copies.open else dict.values(self)
+
+    def items(self):
+        return [(key, self[key]) for key in self] if self._copies.open else dict.items(self)
+
+    def copy(self):
+        return CowDict(self, self._copies) if self._copies.open else dict(self)
+
+    def __deepcopy__(self, memo):
+        return {k: copy.deepcopy(v, memo) for k, v in dict.items(self)}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+class CowList(list):
+    __slots__ = ("_source", "_copies")
+
+    def __init__(self, source: List[Any], copies: Copies):
+        super().__init__(source)
+        self._source = source
+        self._copies = copies
+
+    def __getitem__(self, index):
+        value = list.__getitem__(self, index)
+        if not self._copies.open:
+            return value
+        if isinstance(index, slice):
+            # Elements are copied in place, so changes made through the slice stick
+            return [self[i] for i in range(*index.indices(len(self)))]
+        private = _private(value, self._copies)
+        if private is not value:
+            list.__setitem__(self, index, private)
+        return private
+
+    def __iter__(self):
+        if not self._copies.open:
+            return list.__iter__(self)
+        return self._walk(range(len(self)))
+
+    def __reversed__(self):
+        if not self._copies.open:
+            return list.__reversed__(self)
+        return self._walk(range(len(self) - 1, -1, -1))
+
+    def _walk(self, positions):
+        for i in positions:
+            if i >= len(self):
+                return
+            yield self[i]
+
+    def pop(self, index=-1):
+        value = list.pop(self, index)
+        return _private(value, self._copies) if self._copies.open else value
+
+    def copy(self):
+        return list(self) if self._copies.open else list.copy(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in list.__iter__(self)]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+_CONTAINERS = (dict, list, CowDict, CowList)
+
+class LazySections(CowDict):
+    # Looks like the data document; each section is copied only as far as it is
+    # used, and peek() reads one without copying
+    __slots__ = ()
+
+    def __init__(self, source: Dict[str, Any], copies: Optional[Copies] = None):
+        super().__init__(source, copies or Copies())
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        # The shared object itself: for reading only, never to be modified
+        return dict.get(self, key, default)
+
+    def resolved(self) -> Dict[str, Any]:
+        # The changed document with plain containers; the view is closed afterwards
+        data = settle(self)
+        self._copies.open = False
+        return data
+
+def apply(data: Dict[str, Any], mutation: Mutation) -> Tuple[Dict[str, Any], Any]:
+    # Runs the mutation on a copy-on-write view; data itself is left as it was
+    working = LazySections(data)
+    result = mutation(working)
+    return working.resolved(), result
+
+def _forward(done: Future, future: Future):
+    if done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(done.result())
+
+class WriteBehind:
+    def __init__(self, window: float = COALESCE_WINDOW):
+        self.window = window
+        self.mutations = 0
+        self.flushes = 0
+        self.conflicts = 0
+        self.store = open_store()
+        self._lock = threading.Lock()
+        self._data = self.store.load()
+        self._waiting: List[Tuple[Future, Mutation, Any]] = []
+        self._dirty = False     # records changed since versions were last published
+        self._flushing = False  # the writer thread is using the store
+        self._wake = threading.Event()
+        self._closed = False
+        self._columns: Optional[Tuple[Dict[str, Any], ColumnSnapshot]] = None
+        self._column_parts: Dict[str, Any] = {}
+        self._thread = threading.Thread(target=self._run, name="skillswap-writer", daemon=True)
+        self._thread.start()
+        self._jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="skillswap-job")
+        atexit.register(self.close)
+    
+    def read(self) -> LazySections:
+        return self.read_settled()[0]
+    
+    def read_settled(self) -> Tuple[LazySections, bool]:
+        # Each rerun gets its own view, so optimistic edits never leak between sessions.
+        # Also says whether every record in it carries its final version, which is
+        # not the case for edits the writer thread has not published yet
+        with self._lock:
+            if not self._waiting and not self._flushing and self.store.stale():
+                self._data = self.store.reload()
+            return LazySections(self._data), not self._dirty
+    
+    def read_columns(self) -> ColumnSnapshot:
+        # The store's column file while it matches the shared data; while edits are in
+        # flight, or without a file, columns encoded from the shared data once per change.
+        # Collections unchanged since the file was read are copied from it, not re-encoded
+        with self._lock:
+            data, generation = self._data, self.store.generation
+            pending = bool(self._waiting) or self._flushing or self._dirty
+        if not pending and self.store.columns:
+            snapshot = load_columns(self.store.columns)
+            if snapshot is not None and snapshot.generation == generation:
+                self._columns = (data, snapshot)
+                return snapshot
+        cached = self._columns
+        if cached is None or cached[0] is not data:
+            parts = self._column_parts
+            if cached is not None:
+                for coll in ("users", "requests"):
+                    records = data.get(coll, [])
+                    if cached[0].get(coll, []) is records and parts.get(coll, (None,))[0] is not records:
+                        parts[coll] = (records, cached[1].parts(coll))
+            payload = encode_columns(data, generation, parts)
+            cached = self._columns = (data, ColumnSnapshot(payload=payload))
+        return cached[1]
+    
+    def submit(self, mutation: Mutation) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            try:
+                self._data, result = apply(self._data, mutation)
+            except Exception as exc:
+                future.set_exception(exc)
+                return future
+            self.mutations += 1
+            self._dirty = True
+            self._waiting.append((future, mutation, result))
+        self._wake.set()
+        return future
+    
+    def submit_job(self, job: Job) -> Future:
+        # job reads a view of the data on the job thread and returns the mutation to
+        # submit; the Future resolves with that mutation's result once it is durable
+        future: Future = Future()
+        
+        def run():
+            try:
+                mutation = job(self.read())
+                self.submit(mutation).add_done_callback(lambda done: _forward(done, future))
+            except Exception as exc:
+                future.set_exception(exc)
+        
+        self._jobs.submit(run)
+        return future
+    
+    def sync(self):
+        # Blocks until everything submitted so far is on disk
+        self.submit(lambda data: None).result()
+    
+    def close(self):
+        # Jobs already started still commit what they found
+        self._jobs.shutdown(wait=True)
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            if not self._closed:
+                time.sleep(self.window)
+            self._flush()
+        self._flush()
+    
+    def _flush(self):
+        with self._lock:
+            self._wake.clear()
+            waiting, self._waiting = self._waiting, []
+            if not waiting:
+                return
+            self._flushing = True
+            data = self._data
+        try:
+            self._commit(waiting, data)
+        finally:
+            with self._lock:
+                self._flushing = False
+    
+    def _commit(self, waiting: List[Tuple[Future, Mutation, Any]], data: Dict[str, Any]):
+        for attempt in range(MAX_RETRIES):
+            # Encoding and disk I/O happen outside the lock: the data is never changed
+            # in place, so submits keep landing on copies in the meantime
+            prepared = self.store.prepare(data)
+            if self.store.publish(prepared):
+                with self._lock:
+                    # The published versions replace the records they belong to; only
+                    # if nothing landed meanwhile are all versions final
+                    settled = self._data is data
+                    self._data = self.store.stamped(self._data)
+                    if settled:
+                        self._dirty = False
+                break
+            backoff(attempt)
+            with self._lock:
+                self.conflicts += 1
+                merged, clean = self.store.rebase(self._data)
+                # Whatever landed meanwhile is part of the next attempt's payload
+                waiting += self._waiting
+                self._waiting = []
+                if not clean:
+                    # Our records were changed elsewhere, so every pending mutation re-runs on theirs
+                    replayed = []
+                    for f, m, _ in waiting:
+                        merged, result = self._replay(f, m, merged)
+                        replayed.append((f, m, result))
+                    waiting = replayed
+                self._data = data = merged
+        else:
+            with self._lock:
+                self._data = self.store.load()
+            for future, _, _ in waiting:
+                future.set_exception(ConflictError("could not commit after repeated conflicts"))
+            return
+        
+        self.flushes += 1
+        for future, _, result in waiting:
+            if not future.done():
+                future.set_result(result)
+    
+    @staticmethod
+    def _replay(future: Future, mutation: Mutation, data: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+        # Through a copy-on-write view too: the reloaded data shares unchanged objects with readers
+        try:
+            return apply(data, mutation)
+        except Exception as exc:
+            future.set_exception(exc)
+            return data, None
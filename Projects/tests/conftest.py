@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from skillswap.synthetic import generate_data
+from skillswap.store import rebuild_positions
+from skillswap.swaps import rebuild_request_indexes
+from skillswap.purge import rebuild_owned
+from skillswap.rollups import rebuild_rollups
+from skillswap.market import rebuild_market
+from skillswap.locations import rebuild_locations
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # The store, archive and snapshots default to paths relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def make_data():
+    # Generated data with the indexes and rollups the app maintains
+    def make(users: int = 40, requests: int = 120, seed: int = 7):
+        data = generate_data(users, requests, seed)
+        rebuild_request_indexes(data)
+        rebuild_owned(data)
+        rebuild_rollups(data)
+        rebuild_market(data)
+        rebuild_locations(data)
+        rebuild_positions(data)
+        return data
+    return make
@@ -0,0 +1,46 @@
+from skillswap.achievements import (SWAP_COMPLETED, ENDORSEMENT_RECEIVED, REQUEST_ACCEPTED,
+                                    backfill, make_event, process_events)
+from skillswap.endorsements import add_endorsement
+from skillswap.swaps import set_status
+
+STATS = ["swaps_completed", "experience_points", "requests_accepted", "endorsements_received", "level"]
+
+def _fresh(data):
+    # Profiles as if nothing had been counted yet
+    for user in data["users"]:
+        user.update(swaps_completed=0, experience_points=0, requests_accepted=0, level=1, badges=[])
+    data["achievements"] = []
+    data["indexes"]["owned"] = {}
+    return data
+
+def _standing(data):
+    awarded = {}
+    for a in data["achievements"]:
+        awarded.setdefault(a["user_id"], []).append(a["type"])
+    return {u["id"]: ([u.get(stat, 0) for stat in STATS], sorted(u["badges"]), sorted(awarded.get(u["id"], [])))
+            for u in data["users"]}
+
+def _act(data):
+    # What the Requests and Profile pages do, one commit at a time
+    for req in [r for r in data["requests"] if r["status"] == "Pending"][:15]:
+        set_status(data, req, "Accepted")
+        process_events(data, [make_event(REQUEST_ACCEPTED, req["receiver_id"], req["id"], req["updated_at"])])
+    for req in [r for r in data["requests"] if r["status"] == "Accepted"][:10]:
+        set_status(data, req, "Completed")
+        process_events(data, [make_event(SWAP_COMPLETED, req["sender_id"], req["id"], req["updated_at"]),
+                              make_event(SWAP_COMPLETED, req["receiver_id"], req["id"], req["updated_at"])])
+    users = data["users"]
+    for i, endorsee in enumerate(users[:8]):
+        for endorser in users[8:20]:
+            e = add_endorsement(data, endorser, endorsee, endorsee["skills_offered"][0])
+            process_events(data, [make_event(ENDORSEMENT_RECEIVED, endorsee["id"], e["id"])])
+
+def test_events_match_a_backfill_from_history(make_data):
+    data = _fresh(make_data())
+    backfill(data)
+    _act(data)
+    assert backfill(data) == []
+    rebuilt = _fresh({"users": [dict(u) for u in data["users"]], "requests": data["requests"],
+                      "endorsements": data["endorsements"], "indexes": {}})
+    backfill(rebuilt)
+    assert _standing(rebuilt) == _standing(data)
@@ -0,0 +1,66 @@
+from skillswap.archive import (archivable, write_segments, register_segments, iter_archived, archived_page,
+                               archived_count, status_count)
+from skillswap.purge import purge_users
+from skillswap.rollups import rebuild_rollups
+from skillswap.store import find_record
+
+def _archived(make_data):
+    # Enough old finished requests for several gzip blocks per segment
+    data = make_data(users=60, requests=4000)
+    old = archivable(data)
+    register_segments(data, write_segments(old))
+    return data, old
+
+def _ids(requests):
+    return [r["id"] for r in requests]
+
+def test_archived_requests_leave_the_hot_data_and_read_back(make_data):
+    data, old = _archived(make_data)
+    assert len(old) > 1000
+    assert not any(find_record(data, "requests", r["id"]) for r in old)
+    assert sorted(_ids(iter_archived(data))) == sorted(_ids(old))
+    for status in ("Completed", "Rejected"):
+        assert archived_count(data, status) == sum(1 for r in old if r["status"] == status)
+
+def test_status_counts_include_the_archive(make_data):
+    data, _ = _archived(make_data)
+    statuses = dict(data["rollups"]["statuses"])
+    assert status_count(data, "Completed") == statuses["Completed"]
+    assert rebuild_rollups(data)["statuses"] == statuses
+
+def test_pages_match_a_full_scan(make_data):
+    data, _ = _archived(make_data)
+    for status in (None, "Completed", "Rejected"):
+        everything = _ids(iter_archived(data, status))
+        for page in (0, 1, 7, 30, 400):
+            assert _ids(archived_page(data, status, page=page, per_page=25)) == everything[page * 25:page * 25 + 25]
+
+def test_user_filter_matches_a_full_scan(make_data):
+    data, _ = _archived(make_data)
+    user_id = data["users"][3]["id"]
+    everything = [r for r in iter_archived(data) if user_id in (r["sender_id"], r["receiver_id"])]
+    assert _ids(iter_archived(data, user_id=user_id)) == _ids(everything)
+    assert _ids(archived_page(data, user_id=user_id, page=1, per_page=10)) == _ids(everything)[10:20]
+
+def test_requests_edited_after_writing_stay_hot(make_data):
+    data = make_data(users=60, requests=600)
+    old = archivable(data)
+    segments = write_segments(old)
+    edited = find_record(data, "requests", old[0]["id"])
+    edited["version"] = edited.get("version", 0) + 1
+    register_segments(data, segments)
+    assert find_record(data, "requests", old[0]["id"]) is edited
+    assert old[0]["id"] not in _ids(iter_archived(data))
+    assert sum(len(list(iter_archived(data, status))) for status in ("Completed", "Rejected")) == len(old) - 1
+
+def test_purged_users_leave_the_archive(make_data):
+    data, old = _archived(make_data)
+    user_id = data["users"][0]["id"]
+    theirs = [r for r in old if user_id in (r["sender_id"], r["receiver_id"])]
+    before = archived_count(data, "Completed")
+    purge_users(data, [user_id])
+    assert not [r for r in iter_archived(data) if user_id in (r["sender_id"], r["receiver_id"])]
+    assert archived_count(data, "Completed") == before - sum(1 for r in theirs if r["status"] == "Completed")
+    everything = _ids(iter_archived(data, "Completed"))
+    assert len(everything) == archived_count(data, "Completed")
+    assert _ids(archived_page(data, "Completed", page=3, per_page=50)) == everything[150:200]
@@ -0,0 +1,42 @@
+from skillswap.columns import COLUMNS_FILE, ColumnSnapshot, encode_columns
+from skillswap.store import VersionedStore, add_record
+from skillswap.writer import WriteBehind
+
+def _columns(snapshot):
+    return {coll: snapshot.parts(coll) for coll in ("users", "requests")}
+
+def _full(data):
+    return _columns(ColumnSnapshot(payload=encode_columns(data)))
+
+def _edit(data):
+    data["users"][0]["name"] = "Renamed ✓"
+    data["users"][0]["rating"] = 1.5
+    add_record(data, "users", dict(data["users"][1], id="copy", name="Copy", location="Nowhere"))
+    return True
+
+def test_columns_follow_edits_before_and_after_the_flush(make_data):
+    VersionedStore(columns=COLUMNS_FILE).commit(make_data())
+    writer = WriteBehind(window=0.5)
+    try:
+        assert _columns(writer.read_columns()) == _full(writer.read())
+        future = writer.submit(_edit)
+        # Still in flight: users are encoded from the shared data, requests copied from the file
+        pending = writer.read_columns()
+        assert pending.text("name", 0) == "Renamed ✓" and pending.users == len(writer.read()["users"])
+        assert _columns(pending) == _full(writer.read())
+        future.result(timeout=5)
+        flushed = writer.read_columns()
+        assert _columns(flushed) == _full(VersionedStore().load())
+    finally:
+        writer.close()
+
+def test_memo_reencodes_only_replaced_collections(make_data):
+    data = make_data()
+    memo = {}
+    encode_columns(data, 1, memo)
+    cached_requests = memo["requests"]
+    edited = dict(data, users=list(data["users"]))
+    edited["users"][2] = dict(edited["users"][2], level=9, availability="Away")
+    payload = encode_columns(edited, 2, memo)
+    assert memo["requests"] is cached_requests and memo["users"][0] is edited["users"]
+    assert _columns(ColumnSnapshot(payload=payload)) == _full(edited)
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from skillswap.compact import encode, decode, compression_of, to_binary, to_json
+from skillswap.store import VersionedStore
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_round_trip(make_data, compression):
+    data = make_data()
+    raw = encode(data, compression)
+    assert compression_of(raw) == compression
+    assert decode(raw) == data
+
+def test_values_outside_the_schema_survive(make_data):
+    data = make_data(users=5, requests=5)
+    data["users"][0]["rating"] = "4.5"               # wrong type for the column
+    data["users"][1]["nickname"] = "extra field"
+    data["users"][2]["proficiency"] = None
+    data["users"][3]["name"] = "Zoë ☃ \0 nul"
+    data["users"][4].pop("bio")
+    data["requests"][0]["version"] = 2 ** 70         # too big for a packed integer
+    data["requests"][1]["viewed"] = 1
+    decoded = decode(encode(data))
+    assert decoded == data
+    assert type(decoded["requests"][1]["viewed"]) is int
+    assert "bio" not in decoded["users"][4]
+
+def test_section_texts_are_reused(make_data):
+    data = make_data()
+    texts = {}
+    decode(encode(data), texts)
+    assert json.loads(texts["rollups"]) == data["rollups"]
+    texts["rollups"] = json.dumps({"from": "texts"})
+    assert decode(encode(data, texts=texts))["rollups"] == {"from": "texts"}
+
+def test_corrupt_files_raise_value_error(make_data):
+    raw = encode(make_data(), "zlib")
+    for broken in (b"JSON" + raw[4:], raw[:40], raw[:5] + b"\x09" + raw[6:]):
+        with pytest.raises(ValueError):
+            decode(broken)
+
+def test_conversion_round_trip_through_the_store(make_data):
+    data = make_data()
+    VersionedStore().commit(data)
+    to_binary(Path("data.json"), Path("data.ssb"), "zlib")
+    binary = VersionedStore(Path("data.ssb"))
+    loaded = binary.load()
+    assert loaded == VersionedStore().load()
+    assert binary.compression == "zlib"
+
+    loaded["users"][0]["name"] = "changed"
+    assert binary.commit(loaded)
+    assert compression_of(Path("data.ssb").read_bytes()) == "zlib"
+    to_json(Path("data.ssb"), Path("back.json"))
+    assert VersionedStore(Path("back.json")).load() == VersionedStore(Path("data.ssb")).load()
@@ -0,0 +1,48 @@
+from skillswap.cycles import build_edges, cycles_for_user, find_cycles, precompute_cycles, prune
+from skillswap.purge import delete_user
+from skillswap.synthetic import generate_users
+
+def _brute_force(edges, max_length=4):
+    # Every cycle of the unpruned graph, written from its smallest member as find_cycles does
+    found = set()
+    for a, out in edges.items():
+        for b in out:
+            for c in edges.get(b, {}):
+                if len({a, b, c}) < 3 or min(a, b, c) != a:
+                    continue
+                if a in edges.get(c, {}):
+                    found.add((a, b, c))
+                if max_length >= 4:
+                    for d in edges.get(c, {}):
+                        if d not in (a, b, c) and a < d and a in edges.get(d, {}):
+                            found.add((a, b, c, d))
+    return found
+
+def test_pruning_keeps_every_cycle():
+    users = generate_users(150, seed=11)
+    edges = build_edges(users)
+    pruned = prune(edges)
+    assert len(pruned) < len(edges)
+    expected = _brute_force(edges)
+    assert expected and _brute_force(pruned) == expected
+    found = find_cycles(users, max_cycles=10 ** 6, time_budget=60)
+    assert {tuple(c["users"]) for c in found} == expected
+
+def test_deleted_users_leave_the_precomputed_circles(make_data):
+    data = make_data(users=150, requests=10)
+    precompute_cycles(data)
+    circles = data["swap_cycles"]["cycles"]
+    gone = circles[0]["users"][0]
+    delete_user(data, gone)
+    by_id = {u["id"]: u for u in data["users"]}
+    for user in data["users"]:
+        shown = cycles_for_user(data, user["id"])
+        listed = [circles[i] for i in data["swap_cycles"]["by_user"].get(user["id"], [])]
+        assert shown == [c for c in listed if gone not in c["users"]]
+        # Each circle shown still holds among the remaining profiles
+        for circle in shown:
+            for i, skill in enumerate(circle["skills"]):
+                teacher = by_id[circle["users"][i]]
+                learner = by_id[circle["users"][(i + 1) % len(circle["users"])]]
+                assert skill in teacher["skills_offered"] and skill in learner["skills_wanted"]
+    assert gone not in data["swap_cycles"]["by_user"]
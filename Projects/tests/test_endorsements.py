@@ -0,0 +1,41 @@
+import copy
+
+from skillswap.endorsements import add_endorsement, has_endorsed, rebuild_endorsements
+from skillswap.purge import delete_user
+
+def _counters(data):
+    # Skills whose count went back to zero may be left in place
+    return {u["id"]: ({s: n for s, n in u.get("endorsements_by_skill", {}).items() if n},
+                      u.get("endorsements_received", 0)) for u in data["users"]}
+
+def _endorse_around(data, rounds=3):
+    users = data["users"]
+    added = 0
+    for r in range(rounds):
+        for i, endorser in enumerate(users):
+            endorsee = users[(i + r + 1) % len(users)]
+            for skill in endorsee["skills_offered"][:2] + ["not-offered"]:
+                added += add_endorsement(data, endorser, endorsee, skill.upper()) is not None
+    return added
+
+def test_endorsements_are_deduplicated(make_data):
+    data = make_data()
+    endorser, endorsee = data["users"][0], data["users"][1]
+    skill = endorsee["skills_offered"][0]
+    assert add_endorsement(data, endorser, endorsee, f" {skill.title()} ")
+    assert has_endorsed(data, endorser["id"], endorsee["id"], skill)
+    assert add_endorsement(data, endorser, endorsee, skill) is None
+    assert add_endorsement(data, endorser, endorser, endorser["skills_offered"][0]) is None
+    assert add_endorsement(data, endorser, endorsee, "not-offered") is None
+    assert endorsee["endorsements_by_skill"] == {skill: 1} and endorsee["endorsements_received"] == 1
+
+def test_counters_match_a_rebuild(make_data):
+    data = make_data()
+    assert _endorse_around(data) == len(data["endorsements"]) > 0
+    # Deleting users takes their endorsements, given and received, out of the counters
+    for user in data["users"][:3]:
+        delete_user(data, user["id"])
+    rebuilt = copy.deepcopy(data)
+    rebuild_endorsements(rebuilt)
+    assert rebuilt["indexes"]["endorsements"] == data["indexes"]["endorsements"]
+    assert _counters(rebuilt) == _counters(data)
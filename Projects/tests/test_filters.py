@@ -0,0 +1,76 @@
+import copy, datetime
+
+from skillswap.filters import AVAILABILITY, ACTIVITY_DAYS, RATING_FLOORS, UserBitmaps, FilterIndex, mark_active
+from skillswap.locations import user_location
+from skillswap.market import add_user, update_user
+from skillswap.purge import delete_user
+from skillswap.store import VersionedStore
+from skillswap.swaps import add_request, set_status
+from skillswap.models import make_request, make_user
+from skillswap.writer import WriteBehind
+
+def _idle(data, days=30):
+    then = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat()
+    for user in data["users"]:
+        user["last_active"] = then
+
+def _active_ids(data, days=1):
+    bitmaps = UserBitmaps(data["users"])
+    return {u["id"] for u in bitmaps.select(bitmaps.active_within(days))}
+
+def test_actions_mark_users_active(make_data):
+    data = make_data()
+    _idle(data)
+    assert _active_ids(data) == set()
+
+    req = next(r for r in data["requests"] if r["status"] == "Pending")
+    set_status(data, req, "Accepted")
+    mark_active(data, req["receiver_id"], req["updated_at"])
+    assert _active_ids(data) == {req["receiver_id"]}
+
+    sender, receiver = data["users"][0], data["users"][1]
+    new_req = make_request(sender["id"], receiver["id"], sender["skills_offered"][0], receiver["skills_offered"][0])
+    mark_active(data, new_req["sender_id"], new_req["created_at"])
+    add_request(data, new_req)
+    assert _active_ids(data) == {req["receiver_id"], sender["id"]}
+
+
+def _answers(bitmaps, now):
+    # Every query the Discover page can ask, answered as sorted user ids
+    ids = lambda bitmap: sorted(u["id"] for u in bitmaps.select(bitmap))
+    return {
+        "availability": {a: ids(bitmaps.availability([a])) for a in AVAILABILITY},
+        "active": {d: ids(bitmaps.active_within(d, now)) for d in ACTIVITY_DAYS},
+        "rating": {f: ids(bitmaps.rating_at_least(f)) for f in RATING_FLOORS},
+        "location": {loc: ids(bitmaps.get("location", loc)) for loc in {user_location(u) for u in bitmaps.users}},
+        "skill": {s: ids(bitmaps.get("skill", s)) for s in bitmaps.skills},
+        "all": ids(bitmaps.all),
+    }
+
+def test_synced_bitmaps_match_a_fresh_build(make_data):
+    VersionedStore().commit(make_data())
+    writer = WriteBehind(window=0.01)
+    index = FilterIndex()
+    now = datetime.datetime.utcnow()
+    try:
+        before = writer.read()["users"]
+        first = index.sync(before)
+        assert index.sync(before) is first
+        expected_before = _answers(UserBitmaps(copy.deepcopy(before)), now)
+
+        def changes(data):
+            users = data["users"]
+            add_user(data, make_user("new", "new@example.com", "", ["rust"], ["python"], {}, location="Bombay"))
+            update_user(data, users[0]["id"], {"skills_offered": ["rust"], "availability": "Away", "rating": 4.5})
+            mark_active(data, users[1]["id"], now.isoformat())
+            delete_user(data, users[2]["id"])
+        writer.submit(changes).result(timeout=5)
+
+        after = writer.read()["users"]
+        assert after is not before
+        synced = index.sync(after)
+        assert synced is not first
+        assert _answers(synced, now) == _answers(UserBitmaps(copy.deepcopy(after)), now)
+        assert _answers(first, now) == expected_before
+    finally:
+        writer.close()
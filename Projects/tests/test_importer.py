@@ -0,0 +1,85 @@
+import copy, json
+
+from skillswap.importer import Importer
+from skillswap.store import VersionedStore, rebuild_positions
+from skillswap.swaps import rebuild_request_indexes
+from skillswap.market import rebuild_market
+from skillswap.locations import rebuild_locations
+from skillswap.rollups import rebuild_rollups
+
+USERS = """name,email,skills_offered,skills_wanted,proficiency,location,rating
+Asha,asha@example.com,python;sql,guitar,python:Expert,Pune,4.5
+Ben,ben@example.com,guitar,python,,Mumbai,
+Asha Again,ASHA@example.com,rust,,,,
+,noname@example.com,python,,,,
+Bad Email,not-an-email,python,,,,
+No Skills,noskills@example.com,,python,,,
+Odd Level,odd@example.com,python,,python:Guru,,
+Odd Rating,rating@example.com,python,,,,five
+Cara,cara@example.com,figma,sql,figma:Intermediate,Remote,
+"""
+
+def _requests(existing_email):
+    rows = [
+        {"sender_email": "asha@example.com", "receiver_email": "ben@example.com", "skill_offered": "python",
+         "skill_wanted": "guitar", "created_at": "2024-05-01T10:00:00Z"},
+        {"sender_email": "asha@example.com", "receiver_email": "ben@example.com", "skill_offered": "Python",
+         "skill_wanted": "guitar"},
+        {"sender_email": "ben@example.com", "receiver_email": "cara@example.com", "skill_offered": "guitar",
+         "skill_wanted": "figma", "status": "completed", "created_at": "2024-05-02T09:30:00+05:30"},
+        {"sender_email": "ben@example.com", "receiver_email": "cara@example.com", "skill_offered": "guitar",
+         "skill_wanted": "figma", "status": "Completed"},
+        {"sender_email": "cara@example.com", "receiver_email": existing_email, "skill_offered": "figma",
+         "skill_wanted": "sql", "status": "Accepted"},
+        {"sender_email": "nobody@example.com", "receiver_email": "ben@example.com", "skill_offered": "a", "skill_wanted": "b"},
+        {"sender_email": "ben@example.com", "receiver_email": "ben@example.com", "skill_offered": "a", "skill_wanted": "b"},
+        {"sender_email": "ben@example.com", "receiver_email": "asha@example.com", "skill_offered": "guitar",
+         "skill_wanted": "python", "created_at": "yesterday"},
+        {"sender_email": "ben@example.com", "receiver_email": "asha@example.com", "skill_offered": "guitar",
+         "skill_wanted": "python", "status": "Lost"},
+    ]
+    return "\n".join(json.dumps(r) for r in rows) + "\n{not json\n"
+
+def _rebuilt(data):
+    rebuilt = copy.deepcopy(data)
+    rebuild_request_indexes(rebuilt)
+    rebuild_market(rebuilt)
+    rebuild_locations(rebuilt)
+    rebuild_rollups(rebuilt)
+    rebuild_positions(rebuilt)
+    return rebuilt
+
+def _sorted_lists(index):
+    return {k: sorted(v) for k, v in index.items()}
+
+def test_import_dedupes_rejects_and_matches_a_rebuild(make_data, tmp_path):
+    base = make_data()
+    VersionedStore().commit(base)
+    (tmp_path / "users.csv").write_text(USERS)
+    (tmp_path / "requests.jsonl").write_text(_requests(base["users"][0]["email"]))
+
+    importer = Importer(batch_size=2)
+    importer.import_users(tmp_path / "users.csv")
+    importer.import_requests(tmp_path / "requests.jsonl")
+    importer.finish()
+    reasons = [(r["file"], r["line"], r["reason"]) for r in importer.rejected]
+    assert reasons == [
+        ("users.csv", 4, "duplicate email"), ("users.csv", 5, "missing name"), ("users.csv", 6, "invalid email"),
+        ("users.csv", 7, "no skills offered"), ("users.csv", 8, "unknown proficiency 'Guru'"),
+        ("users.csv", 9, "rating is not a number"),
+        ("requests.jsonl", 2, "duplicate open request"), ("requests.jsonl", 6, "unknown sender"),
+        ("requests.jsonl", 7, "sender and receiver are the same user"), ("requests.jsonl", 8, "invalid created_at"),
+        ("requests.jsonl", 9, "unknown status 'Lost'"), ("requests.jsonl", 10, "not valid JSON")]
+    assert (importer.counts["users"], importer.counts["requests"]) == (3, 4)
+
+    data = VersionedStore().load()
+    assert len(data["users"]) == len(base["users"]) + 3
+    assert len(data["requests"]) == len(base["requests"]) + 4
+    imported = {r["created_at"] for r in data["requests"][len(base["requests"]):]}
+    assert {"2024-05-01T10:00:00", "2024-05-02T04:00:00"} <= imported
+
+    rebuilt = _rebuilt(data)
+    for name in ("open_requests", "mailboxes", "skills", "positions"):
+        assert rebuilt["indexes"][name] == data["indexes"][name], name
+    assert _sorted_lists(rebuilt["indexes"]["locations"]) == _sorted_lists(data["indexes"]["locations"])
+    assert rebuilt["rollups"] == data["rollups"]
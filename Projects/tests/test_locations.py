@@ -0,0 +1,33 @@
+import copy
+
+from skillswap.locations import canonical_location, rebuild_locations, users_near
+from skillswap.market import add_user, update_user
+from skillswap.models import make_user
+from skillswap.purge import delete_user
+
+def _index(data):
+    # Ids within a location are kept in insertion order, which a rebuild does not reproduce
+    return {loc: sorted(ids) for loc, ids in data["indexes"]["locations"].items()}
+
+def test_canonical_location():
+    assert canonical_location("Bombay") == canonical_location("mumbai, India") == "mumbai"
+    assert canonical_location("  New   York City!, USA") == "new york"
+    assert canonical_location("St. Louis") == "st louis"
+    assert canonical_location(", India") == canonical_location("") == ""
+
+def test_location_index_matches_a_rebuild(make_data):
+    data = make_data()
+    users = data["users"]
+    for i in range(6):
+        add_user(data, make_user(f"new {i}", f"new{i}@example.com", "", ["python"], ["go"], {},
+                                 location=["Bombay", "Calcutta, India", "", "online"][i % 4]))
+    for n, user in enumerate(users[:12]):
+        update_user(data, user["id"], {"location": ["Bengaluru", "NYC", "", "madras"][n % 4]})
+    for user_id in [u["id"] for u in users[2:30:5]]:
+        delete_user(data, user_id)
+    rebuilt = copy.deepcopy(data)
+    rebuild_locations(rebuilt)
+    assert _index(data) == _index(rebuilt)
+    assert all(ids for ids in data["indexes"]["locations"].values())
+    me = next(u for u in users if u["location"] == "Bengaluru")
+    assert me["id"] in users_near(data, me) and "bangalore" in data["indexes"]["locations"]
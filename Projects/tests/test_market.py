@@ -0,0 +1,37 @@
+import copy
+
+from skillswap.market import add_user, update_user, rebuild_market, skill_counts, location_key
+from skillswap.models import make_user
+from skillswap.purge import delete_user
+
+def _churn(data):
+    # Creates, edits and deletes profiles the way the app does
+    users = data["users"]
+    for i in range(6):
+        add_user(data, make_user(f"new {i}", f"new{i}@example.com", "", ["python", "go"][:i % 2 + 1],
+                                 ["cooking"], {}, location=["Bombay", "pune, India", ""][i % 3]))
+    for n, user in enumerate(users[:12]):
+        update_user(data, user["id"], {"skills_offered": user["skills_wanted"][:1] + ["python"],
+                                       "skills_wanted": user["skills_offered"],
+                                       "location": ["Mumbai", "Bengaluru", "nowhere, at all", ""][n % 4]})
+    for user_id in [u["id"] for u in users[3:30:4]]:
+        delete_user(data, user_id)
+
+def test_market_counts_match_a_rebuild(make_data):
+    data = make_data()
+    _churn(data)
+    rebuilt = copy.deepcopy(data)
+    rebuild_market(rebuilt)
+    assert data["indexes"]["skills"] == rebuilt["indexes"]["skills"]
+
+def test_skill_counts_follow_an_edit(make_data):
+    data = make_data()
+    user = data["users"][0]
+    before = skill_counts(data, "rare-skill"), skill_counts(data, "rare-skill", "mumbai")
+    update_user(data, user["id"], {"skills_offered": ["rare-skill"], "location": "Bombay"})
+    assert location_key(user) == "mumbai"
+    assert skill_counts(data, "rare-skill") == {"offered": before[0]["offered"] + 1, "wanted": before[0]["wanted"]}
+    assert skill_counts(data, "rare-skill", "mumbai")["offered"] == before[1]["offered"] + 1
+    update_user(data, user["id"], {"skills_offered": []})
+    assert (skill_counts(data, "rare-skill"), skill_counts(data, "rare-skill", "mumbai")) == before
+    assert update_user(data, "missing", {"skills_offered": ["x"]}) is None
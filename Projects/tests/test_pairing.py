@@ -0,0 +1,12 @@
+from skillswap.pairing import top_k_graph, pair_score
+from skillswap.synthetic import generate_users
+
+def test_edge_weight_does_not_depend_on_scoring_order():
+    users = generate_users(200, seed=3)
+    by_id = {u["id"]: u for u in users}
+    forward = top_k_graph(users, min_score=0)
+    backward = top_k_graph(users[::-1], min_score=0)
+    shared = set(forward) & set(backward)
+    assert shared
+    for a, b in shared:
+        assert forward[(a, b)] == backward[(a, b)] == pair_score(by_id[a], by_id[b]) == pair_score(by_id[b], by_id[a])
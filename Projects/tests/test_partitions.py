@@ -0,0 +1,99 @@
+from pathlib import Path
+
+from skillswap.store import VersionedStore, update_data
+from skillswap.partitions import PartitionedStore, init_partitions, rebalance, partition_of
+
+PARTITIONS = 4
+
+def _partitioned(data):
+    VersionedStore().commit(data)
+    init_partitions(PARTITIONS)
+
+def _users_in(data, partition, n=1):
+    return [u["id"] for u in data["users"] if partition_of(u["id"], PARTITIONS) == partition][:n]
+
+def _user(data, user_id):
+    return next(u for u in data["users"] if u["id"] == user_id)
+
+def _ids(data, coll):
+    return sorted(r["id"] for r in data[coll])
+
+def _nonzero(counts):
+    # Merged counters leave out keys no partition counts
+    if isinstance(counts, dict):
+        kept = {k: _nonzero(v) for k, v in counts.items()}
+        return {k: v for k, v in kept.items() if v not in (0, {})}
+    return counts
+
+def test_split_and_merge_round_trip(make_data):
+    data = make_data()
+    _partitioned(data)
+    merged = PartitionedStore().load()
+    for coll in ("users", "requests"):
+        assert _ids(merged, coll) == _ids(data, coll)
+    assert merged["rollups"] == data["rollups"]
+    assert _nonzero(merged["indexes"]["skills"]) == _nonzero(data["indexes"]["skills"])
+    assert {k: sorted(v) for k, v in merged["indexes"]["locations"].items()} == \
+        {k: sorted(v) for k, v in data["indexes"]["locations"].items()}
+
+def test_commit_writes_only_changed_partitions(make_data):
+    _partitioned(make_data())
+    store = PartitionedStore()
+    data = store.load()
+    assert store.prepare(data)[0] == []
+    _user(data, _users_in(data, 1)[0])["name"] = "changed"
+    assert [i for i, _, _ in store.prepare(data)[0]] == [1]
+
+def test_writers_on_different_partitions_both_commit(make_data):
+    _partitioned(make_data())
+    a, b = PartitionedStore(), PartitionedStore()
+    data_a, data_b = a.load(), b.load()
+    first, second = _users_in(data_a, 0)[0], _users_in(data_a, 1)[0]
+    _user(data_a, first)["name"] = "A"
+    _user(data_b, second)["name"] = "B"
+    assert a.commit(data_a)
+    assert b.commit(data_b)
+    final = PartitionedStore().load()
+    assert (_user(final, first)["name"], _user(final, second)["name"]) == ("A", "B")
+
+def test_conflict_on_same_partition_is_replayed(make_data):
+    _partitioned(make_data())
+    a, b = PartitionedStore(), PartitionedStore()
+    data_a, data_b = a.load(), b.load()
+    first, second = _users_in(data_a, 2, 2)
+    _user(data_a, first)["name"] = "A"
+    assert a.commit(data_a)
+    _user(data_b, second)["name"] = "B"
+    assert not b.commit(data_b)
+    update_data(lambda d: _user(d, second).update(name="B"), b)
+    final = PartitionedStore().load()
+    assert (_user(final, first)["name"], _user(final, second)["name"]) == ("A", "B")
+
+def test_multi_partition_commit_lands_whole_or_not_at_all(make_data):
+    _partitioned(make_data())
+    a, b = PartitionedStore(), PartitionedStore()
+    data_a, data_b = a.load(), b.load()
+    first, second = _users_in(data_a, 0)[0], _users_in(data_a, 3)[0]
+    _user(data_b, second)["name"] = "B"
+    assert b.commit(data_b)
+    _user(data_a, first)["name"] = "A1"
+    _user(data_a, second)["name"] = "A2"
+    assert not a.commit(data_a)
+    final = PartitionedStore().load()
+    assert _user(final, first)["name"] != "A1"
+    assert _user(final, second)["name"] == "B"
+
+def test_rebalance_keeps_data_and_moves_writers(make_data):
+    data = make_data()
+    _partitioned(data)
+    writer = PartitionedStore()
+    stale = writer.load()
+    rebalance(PARTITIONS * 2)
+    assert not writer.commit(stale)
+    user_id = data["users"][0]["id"]
+    update_data(lambda d: _user(d, user_id).update(name="moved"), writer)
+    final = PartitionedStore().load()
+    assert writer.partitions == PARTITIONS * 2
+    assert _ids(final, "requests") == _ids(data, "requests")
+    assert _user(final, user_id)["name"] == "moved"
+    assert not any(Path("data").glob("*/*.tmp"))
@@ -0,0 +1,70 @@
+import copy
+
+from skillswap.endorsements import add_endorsement, rebuild_endorsements
+from skillswap.locations import rebuild_locations
+from skillswap.market import rebuild_market
+from skillswap.purge import purge_users, rebuild_owned, resolve_users
+from skillswap.store import find_record, rebuild_positions
+from skillswap.swaps import rebuild_request_indexes
+
+def _canonical(value):
+    # Indexes compared regardless of list order, and without empty or zero entries
+    if isinstance(value, dict):
+        kept = {k: _canonical(v) for k, v in value.items()}
+        return {k: v for k, v in kept.items() if v not in (0, {}, [])}
+    if isinstance(value, list):
+        return sorted((_canonical(v) for v in value), key=repr)
+    return value
+
+def _endorsed(make_data):
+    data = make_data()
+    users = data["users"]
+    for endorser, endorsee in [(0, 1), (1, 0), (2, 1), (2, 3)]:
+        add_endorsement(data, users[endorser], users[endorsee], users[endorsee]["skills_offered"][0])
+    return data
+
+def _rebuilt(data):
+    expected = copy.deepcopy(data)
+    rebuild_request_indexes(expected)
+    rebuild_owned(expected)
+    rebuild_endorsements(expected)
+    rebuild_market(expected)
+    rebuild_locations(expected)
+    rebuild_positions(expected)
+    return expected
+
+def test_purge_removes_everything_referring_to_the_user(make_data):
+    data = _endorsed(make_data)
+    doomed = data["users"][1]["id"]
+    sent = sum(1 for r in data["requests"] if doomed in (r["sender_id"], r["receiver_id"]))
+    removed = purge_users(data, [doomed])
+    assert removed["users"] == 1 and removed["requests"] == sent and removed["endorsements"] == 3
+    assert find_record(data, "users", doomed) is None
+    assert not any(doomed in (r["sender_id"], r["receiver_id"]) for r in data["requests"])
+    assert not any(doomed in (e["endorser_id"], e["endorsee_id"]) for e in data["endorsements"])
+
+def test_purge_leaves_indexes_as_a_rebuild_would(make_data):
+    data = _endorsed(make_data)
+    purge_users(data, [data["users"][1]["id"], data["users"][5]["id"]])
+    expected = _rebuilt(data)
+    for name in ("mailboxes", "open_requests", "owned", "endorsements", "skills", "locations", "positions"):
+        assert _canonical(data["indexes"][name]) == _canonical(expected["indexes"][name]), name
+    for user, rebuilt in zip(data["users"], expected["users"]):
+        assert user.get("endorsements_received", 0) == rebuilt["endorsements_received"]
+    statuses = {}
+    for req in data["requests"]:
+        statuses[req["status"]] = statuses.get(req["status"], 0) + 1
+    assert _canonical(data["rollups"]["statuses"]) == statuses
+
+def test_purge_tombstones_swap_circles(make_data):
+    data = make_data()
+    doomed = data["users"][0]["id"]
+    data["swap_cycles"] = {"cycles": [], "by_user": {doomed: [0]}}
+    purge_users(data, [doomed])
+    assert doomed not in data["swap_cycles"]["by_user"]
+    assert data["swap_cycles"]["removed_users"] == [doomed]
+
+def test_resolve_users_by_id_or_email(make_data):
+    data = make_data()
+    first, second = data["users"][:2]
+    assert resolve_users(data, [first["id"], second["email"].upper(), "nobody@example.com"]) == [first["id"], second["id"]]
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from skillswap.matching import DEFAULT_WEIGHTS, compatibility_score
+from skillswap.replay import History, auc, average_precision, mean_average_precision, lift, replay, random_configs
+
+def _pairwise_auc(scores, labels):
+    # Every (accepted, rejected) pair, ties counting half
+    pos = [s for s, l in zip(scores, labels) if l]
+    neg = [s for s, l in zip(scores, labels) if not l]
+    wins = sum(1.0 if p > n else 0.5 if p == n else 0.0 for p in pos for n in neg)
+    return wins / (len(pos) * len(neg))
+
+def test_auc_matches_pairwise_count():
+    rng = random.Random(3)
+    for _ in range(20):
+        scores = [rng.choice([0, 1, 2, 2.5, 3, 7]) for _ in range(40)]
+        labels = [rng.randint(0, 1) for _ in range(40)]
+        assert auc(scores, labels) == pytest.approx(_pairwise_auc(scores, labels))
+
+def test_auc_extremes():
+    assert auc([3, 2, 1], [1, 1, 0]) == 1.0
+    assert auc([1, 2, 3], [1, 1, 0]) == 0.0
+    assert auc([5, 5, 5, 5], [1, 0, 1, 0]) == 0.5
+    assert auc([1, 2], [1, 1]) is None
+    assert auc([], []) is None
+
+def test_average_precision():
+    assert average_precision([0.9, 0.8, 0.7, 0.6], [1, 0, 1, 0]) == pytest.approx((1 + 2 / 3) / 2)
+    assert average_precision([0.1, 0.9], [0, 1]) == 1.0
+    assert average_precision([0.3, 0.2], [0, 0]) == 0.0
+
+def test_mean_average_precision_uses_mixed_inboxes_only():
+    scores = [0.9, 0.1, 0.2, 0.8, 0.5, 0.4]
+    labels = [1, 0, 1, 0, 1, 1]
+    receivers = [0, 0, 1, 1, 2, 2]
+    assert mean_average_precision(scores, labels, receivers) == pytest.approx((1.0 + 0.5) / 2)
+    assert mean_average_precision([1, 2], [1, 1], [0, 0]) is None
+
+def test_lift():
+    scores = list(range(10))
+    labels = [0] * 9 + [1]
+    assert lift(scores, labels, share=0.1) == pytest.approx(10.0)
+    assert lift(scores, [0] * 10) is None
+
+def test_history_scores_match_compatibility_score(make_data):
+    data = make_data(users=30, requests=200)
+    history = History(data)
+    users = {u["id"]: u for u in data["users"]}
+    decided = [r for r in data["requests"] if r["status"] != "Pending"]
+    assert len(history) == len(decided)
+    weights = random_configs(1, seed=5)[0]
+    expected = sorted(round(compatibility_score(users[r["sender_id"]], users[r["receiver_id"]], weights)[0], 6)
+                      for r in decided)
+    assert sorted(round(s, 6) for s in history.scores(weights)) == expected
+
+def test_replay_puts_the_baseline_first(make_data):
+    history = History(make_data(users=30, requests=200))
+    results = replay(history, random_configs(3) + [DEFAULT_WEIGHTS])
+    assert len(results) == 4
+    assert results[0]["baseline"] and results[0]["weights"] == DEFAULT_WEIGHTS._asdict()
+    assert all(r["auc"] is None or 0 <= r["auc"] <= 1 for r in results)
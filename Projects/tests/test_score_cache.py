@@ -0,0 +1,64 @@
+import importlib
+
+import pytest
+
+from skillswap import score_cache
+from skillswap.synthetic import generate_users
+
+@pytest.fixture
+def users():
+    users = generate_users(12, seed=5)
+    for user in users:
+        user["version"] = 1
+    return users
+
+@pytest.fixture
+def sized_module(monkeypatch):
+    # The cap is read from the environment when the module is imported
+    monkeypatch.setenv("SKILLSWAP_SCORE_CACHE", "3")
+    yield importlib.reload(score_cache)
+    monkeypatch.delenv("SKILLSWAP_SCORE_CACHE")
+    importlib.reload(score_cache)
+
+def test_profile_edit_misses_the_cache(users):
+    cache = score_cache.ScoreCache()
+    a, b = users[0], users[1]
+    first = cache.score(a, b)
+    assert cache.score(a, b) is first
+    edited = dict(b, skills_offered=list(a["skills_wanted"]), version=2)
+    assert cache.score(a, edited) == score_cache.compatibility_score(a, edited)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_unsettled_scores_are_not_stored(users):
+    cache = score_cache.ScoreCache()
+    cache.score(users[0], users[1], settled=False)
+    cache.score(users[0], users[1], settled=False)
+    assert cache.stats()["entries"] == 0 and cache.misses == 2
+
+def test_invalidate_on_clears_only_for_a_new_epoch(users):
+    cache = score_cache.ScoreCache()
+    cache.invalidate_on(0)
+    cache.score(users[0], users[1])
+    cache.invalidate_on(0)
+    assert cache.stats()["entries"] == 1
+    cache.invalidate_on(1)
+    assert cache.stats()["entries"] == 0
+    cache.score(users[0], users[1])
+    assert cache.misses == 2
+
+def test_lru_eviction_at_the_configured_size(sized_module, users):
+    assert sized_module.MAX_ENTRIES == 3
+    cache = sized_module.ScoreCache()
+    me = users[0]
+    for other in users[1:4]:
+        cache.score(me, other)
+    cache.score(me, users[1])           # now the most recently used
+    cache.score(me, users[4])           # evicts users[2], the least recently used
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (3, 1)
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 4, 0.2)
+    cache.score(me, users[1])
+    cache.score(me, users[2])
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 5, 2)
+    cache.resize(1)
+    assert cache.stats()["entries"] == 1 and cache.evictions == 4
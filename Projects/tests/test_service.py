@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from skillswap.synthetic import generate_users
+from skillswap.service import Snapshot, MatchEngine, Batcher
+from skillswap.store import VersionedStore
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_match_batch_equals_top_matches(approximate):
+    snapshot = Snapshot(generate_users(300, seed=11), 1, approximate)
+    wanted = {user_id: 1 + n % 12 for n, user_id in enumerate(snapshot.ids[::7])}
+    wanted["missing"] = 5
+    results = snapshot.match_batch(wanted)
+    assert set(results) == set(wanted) - {"missing"}
+    for user_id, matches in results.items():
+        assert matches == snapshot.top_matches(user_id, wanted[user_id])
+
+def test_batcher_answers_each_query_at_its_own_k(make_data):
+    store = VersionedStore()
+    store.commit(make_data(users=200))
+    engine = MatchEngine(approximate=False, store=store)
+    engine.load()
+
+    async def run(batcher, queries):
+        return await asyncio.gather(*(batcher.submit(user_id, k) for user_id, k in queries))
+
+    ids = engine.snapshot.ids
+    queries = [(ids[0], 3), (ids[1], 10), (ids[0], 8), (ids[2], 1), ("missing", 4)]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = Batcher(engine, executor)
+        answers = asyncio.run(run(batcher, queries))
+    assert batcher.batches == 1 and batcher.queries == len(queries)
+    for (user_id, k), answer in zip(queries, answers):
+        expected = engine.snapshot.top_matches(user_id, k) if user_id in engine.snapshot.by_id else []
+        assert answer == expected
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from skillswap.compact import is_binary
+from skillswap.snapshots import create_snapshot, read_snapshot, restore_snapshot, prune_snapshots, list_snapshots
+from skillswap.store import VersionedStore, ConflictError
+
+def _without_generation(data):
+    return {k: v for k, v in data.items() if k != "generation"}
+
+def test_snapshot_reads_back_the_document(make_data):
+    data = make_data()
+    manifest = create_snapshot(data)
+    assert read_snapshot(manifest["id"]) == _without_generation(data)
+
+def test_second_snapshot_writes_only_changed_chunks(make_data):
+    data = make_data(users=600, requests=1500)
+    first = create_snapshot(data)
+    data["users"][10]["name"] = "edited"
+    data["indexes"]["owned"]["someone"] = {"requests": []}
+    second = create_snapshot(data)
+    assert first["id"] != second["id"]
+    assert second["chunks_new"] <= 3
+    assert second["chunks_reused"] > first["chunks_new"] // 2
+    assert read_snapshot(second["id"])["users"][10]["name"] == "edited"
+
+def test_restore_commits_a_new_generation(make_data):
+    data = make_data()
+    store = VersionedStore()
+    store.commit(data)
+    snapshot = create_snapshot(store.load())
+    data["users"] = data["users"][:5]
+    store.commit(data)
+    assert restore_snapshot(snapshot["id"]) == 3
+    restored = VersionedStore().load()
+    assert len(restored["users"]) == len(make_data()["users"])
+    assert _without_generation(restored) == read_snapshot(snapshot["id"])
+
+def test_restore_into_binary_file(make_data):
+    # Snapshotted from the store, so records already carry the versions commits give them
+    store = VersionedStore()
+    store.commit(make_data())
+    snapshot = create_snapshot(store.load())
+    target = Path("data.ssb")
+    restore_snapshot(snapshot["id"], target)
+    assert is_binary(target.read_bytes())
+    assert _without_generation(VersionedStore(target).load()) == read_snapshot(snapshot["id"])
+
+def test_restore_fails_on_a_concurrent_commit(make_data, monkeypatch):
+    VersionedStore().commit(make_data())
+    snapshot = create_snapshot(make_data())
+    monkeypatch.setattr(VersionedStore, "commit", lambda self, data: False)
+    with pytest.raises(ConflictError):
+        restore_snapshot(snapshot["id"])
+
+def test_prune_keeps_survivors_readable(make_data):
+    data = make_data()
+    ids = []
+    for i in range(3):
+        data["users"][0]["name"] = f"version {i}"
+        ids.append(create_snapshot(data)["id"])
+    assert prune_snapshots(1)["snapshots"] == 2
+    assert [m["id"] for m in list_snapshots()] == ids[-1:]
+    assert read_snapshot(ids[-1])["users"][0]["name"] == "version 2"
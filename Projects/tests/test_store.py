@@ -0,0 +1,167 @@
+import copy
+from pathlib import Path
+
+import pytest
+
+from skillswap.store import (VersionedStore, ConflictError, update_data, find_record,
+                             add_record, remove_records, rebuild_positions)
+
+def test_commit_round_trip(make_data):
+    data = make_data()
+    store = VersionedStore()
+    assert store.commit(data)
+    loaded = VersionedStore().load()
+    assert [u["id"] for u in loaded["users"]] == [u["id"] for u in data["users"]]
+    assert store.generation == 1
+
+def test_commit_fails_when_another_writer_won(make_data):
+    VersionedStore().commit(make_data())
+    a, b = VersionedStore(), VersionedStore()
+    data_a, data_b = a.load(), b.load()
+    data_a["users"][0]["name"] = "A"
+    data_b["users"][1]["name"] = "B"
+    assert a.commit(data_a)
+    assert not b.commit(data_b)
+
+def test_rebase_merges_disjoint_records(make_data):
+    VersionedStore().commit(make_data())
+    a, b = VersionedStore(), VersionedStore()
+    data_a, data_b = a.load(), b.load()
+    data_a["users"][0]["name"] = "A"
+    data_b["users"][1]["name"] = "B"
+    a.commit(data_a)
+    merged, clean = b.rebase(data_b)
+    assert clean
+    assert b.commit(merged)
+    final = VersionedStore().load()
+    assert [final["users"][0]["name"], final["users"][1]["name"]] == ["A", "B"]
+
+def test_rebase_reports_conflict_on_same_record(make_data):
+    VersionedStore().commit(make_data())
+    a, b = VersionedStore(), VersionedStore()
+    data_a, data_b = a.load(), b.load()
+    data_a["users"][0]["name"] = "A"
+    data_b["users"][0]["name"] = "B"
+    a.commit(data_a)
+    latest, clean = b.rebase(data_b)
+    assert not clean
+    assert latest["users"][0]["name"] == "A"
+    forced, clean = b.rebase(data_b, force=True)
+    assert clean and forced["users"][0]["name"] == "B"
+
+def test_update_data_replays_after_conflict(make_data):
+    VersionedStore().commit(make_data())
+    calls = []
+
+    def mutation(data):
+        # The first attempt loses the race to another writer touching the same record
+        if not calls:
+            rival = VersionedStore()
+            theirs = rival.load()
+            theirs["users"][0]["rating"] = 1.0
+            rival.commit(theirs)
+        calls.append(data["users"][0].get("rating"))
+        data["users"][0]["name"] = "mine"
+        return len(calls)
+
+    assert update_data(mutation, VersionedStore()) == 2
+    final = VersionedStore().load()
+    assert final["users"][0]["name"] == "mine" and final["users"][0]["rating"] == 1.0
+
+def test_update_data_gives_up(make_data, monkeypatch):
+    VersionedStore().commit(make_data())
+    monkeypatch.setattr(VersionedStore, "commit", lambda self, data: False)
+    monkeypatch.setattr("skillswap.store.backoff", lambda attempt: None)
+    with pytest.raises(ConflictError):
+        update_data(lambda d: None, VersionedStore())
+
+def test_positions_follow_adds_and_removals(make_data):
+    data = make_data()
+    ids = [r["id"] for r in data["requests"]]
+    add_record(data, "requests", dict(data["requests"][0], id="extra"))
+    removed = remove_records(data, "requests", [ids[0], ids[5], "missing"])
+    assert [r["id"] for r in removed] == [ids[0], ids[5]]
+    for rec_id in ids[1:5] + ids[6:] + ["extra"]:
+        assert find_record(data, "requests", rec_id)["id"] == rec_id
+    assert find_record(data, "requests", ids[0]) is None
+    expected = {r["id"]: i for i, r in enumerate(data["requests"])}
+    rebuild_positions(data)
+    assert data["indexes"]["positions"]["requests"] == expected
+
+def test_prepare_leaves_its_input_unchanged(make_data):
+    store = VersionedStore()
+    store.commit(make_data())
+    data = store.load()
+    data["users"][0] = dict(data["users"][0], name="edited")
+    before = copy.deepcopy(data)
+    prepared = store.prepare(data)
+    assert data == before
+    assert store.publish(prepared)
+    assert data == before
+    stamped = store.stamped(data)
+    assert stamped["users"][0]["version"] == before["users"][0]["version"] + 1
+    assert stamped["users"][1] is data["users"][1]
+    assert VersionedStore().load()["users"][0] == stamped["users"][0]
+
+def test_failed_publish_assigns_no_versions(make_data):
+    VersionedStore().commit(make_data())
+    a, b = VersionedStore(), VersionedStore()
+    data_a, data_b = a.load(), b.load()
+    data_a["users"][0]["name"] = "A"
+    data_b["users"][1]["name"] = "B"
+    version = data_b["users"][1]["version"]
+    assert a.commit(data_a)
+    assert not b.commit(data_b)
+    assert data_b["users"][1]["version"] == version and b.published == {}
+    merged, clean = b.rebase(data_b)
+    assert clean and b.commit(merged)
+    assert VersionedStore().load()["users"][1]["version"] == version + 1
+
+def _index_edits(path="data.json"):
+    a, b = VersionedStore(Path(path)), VersionedStore(Path(path))
+    return a, b, a.load(), b.load()
+
+@pytest.mark.parametrize("path", ["data.json", "data.ssb"])
+def test_rebase_merges_disjoint_index_keys(make_data, path):
+    VersionedStore(Path(path)).commit(make_data())
+    a, b, data_a, data_b = _index_edits(path)
+    data_a["indexes"]["skills"]["skill-a"] = {"offered": 1, "wanted": 0}
+    data_b["indexes"]["skills"]["skill-b"] = {"offered": 0, "wanted": 1}
+    assert a.commit(data_a)
+    merged, clean = b.rebase(data_b)
+    assert clean and b.commit(merged)
+    skills = VersionedStore(Path(path)).load()["indexes"]["skills"]
+    assert {"skill-a", "skill-b"} <= set(skills)
+    assert skills == dict(data_a["indexes"]["skills"], **{"skill-b": data_b["indexes"]["skills"]["skill-b"]})
+
+def test_rebase_reports_conflict_on_same_index_key(make_data):
+    VersionedStore().commit(make_data())
+    a, b, data_a, data_b = _index_edits()
+    data_a["indexes"]["skills"]["python"] = {"offered": 100, "wanted": 0}
+    data_b["indexes"]["skills"]["python"] = {"offered": 0, "wanted": 100}
+    assert a.commit(data_a)
+    latest, clean = b.rebase(data_b)
+    assert not clean and latest["indexes"]["skills"]["python"]["offered"] == 100
+
+def test_rebase_rebuilds_positions(make_data):
+    VersionedStore().commit(make_data())
+    a, b, data_a, data_b = _index_edits()
+    ids = [r["id"] for r in data_a["requests"]]
+    remove_records(data_a, "requests", ids[:3])
+    add_record(data_b, "requests", dict(data_b["requests"][0], id="extra"))
+    assert a.commit(data_a)
+    merged, clean = b.rebase(data_b)
+    assert clean and b.commit(merged)
+    final = VersionedStore().load()
+    assert sorted(r["id"] for r in final["requests"]) == sorted(ids[3:] + ["extra"])
+    assert final["indexes"]["positions"]["requests"] == {r["id"]: i for i, r in enumerate(final["requests"])}
+
+def test_reload_reuses_unchanged_index_entries(make_data):
+    VersionedStore().commit(make_data())
+    a, b, data_a, data_b = _index_edits()
+    data_a["indexes"]["skills"]["python"] = {"offered": 100, "wanted": 0}
+    assert a.commit(data_a)
+    reloaded = b.reload()
+    assert reloaded["indexes"]["skills"]["python"] == {"offered": 100, "wanted": 0}
+    assert reloaded["indexes"]["locations"] is not data_b["indexes"]["locations"]
+    assert all(reloaded["indexes"]["mailboxes"][k] is v for k, v in data_b["indexes"]["mailboxes"].items())
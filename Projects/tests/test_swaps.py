@@ -0,0 +1,83 @@
+import copy
+
+from skillswap.models import make_request
+from skillswap.swaps import (OPEN_STATUSES, STATUSES, add_request, mailbox_count, mailbox_page, open_request_id,
+                             rebuild_request_indexes, requested, set_status)
+
+def _pair(data):
+    sender, receiver = data["users"][0], data["users"][1]
+    return sender, receiver, sender["skills_offered"][0], receiver["skills_offered"][0]
+
+def test_duplicate_request_is_a_no_op(make_data):
+    data = make_data()
+    sender, receiver, offered, wanted = _pair(data)
+    first = make_request(sender["id"], receiver["id"], offered, wanted)
+    assert add_request(data, first) is first
+    before = copy.deepcopy(data)
+    # A double click builds a second request with a new id for the same swap
+    assert add_request(data, make_request(sender["id"], receiver["id"], offered, wanted)) is None
+    assert data == before
+    assert open_request_id(data, sender["id"], receiver["id"], offered, wanted) == first["id"]
+    assert requested(data, sender["id"], [receiver["id"], sender["id"]]) == {receiver["id"]}
+    rebuild_request_indexes(before)
+    assert before["indexes"]["open_requests"] == data["indexes"]["open_requests"]
+
+def _scan(data, user_id, box, statuses=STATUSES):
+    # Newest first, as the mailbox pages are ordered
+    side = "receiver_id" if box == "in" else "sender_id"
+    found = [r for r in data["requests"] if r[side] == user_id and r["status"] in statuses]
+    return [r["id"] for r in sorted(found, key=lambda r: [r.get("updated_at") or r["created_at"], r["id"]], reverse=True)]
+
+def _busiest(data, box="in"):
+    side = "receiver_id" if box == "in" else "sender_id"
+    counts = {}
+    for r in data["requests"]:
+        counts[r[side]] = counts.get(r[side], 0) + 1
+    return max(counts, key=counts.get)
+
+def _all_pages(data, user_id, lanes, cursor=None, limit=2):
+    ids = []
+    while True:
+        page, cursor = mailbox_page(data, user_id, lanes, cursor, limit)
+        ids += page
+        if cursor is None:
+            return ids
+
+def test_mailbox_pages_follow_a_full_scan(make_data):
+    data = make_data(requests=300)
+    user_id = _busiest(data)
+    for box in ("in", "out"):
+        lanes = [(box, status) for status in STATUSES]
+        assert _all_pages(data, user_id, lanes) == _scan(data, user_id, box)
+        assert _all_pages(data, user_id, [(box, "Pending")]) == _scan(data, user_id, box, ["Pending"])
+
+def test_status_change_moves_a_request_between_lanes(make_data):
+    data = make_data(requests=300)
+    user_id = _busiest(data)
+    lanes = [("in", status) for status in STATUSES]
+    first, cursor = mailbox_page(data, user_id, lanes, None, 3)
+    older = [i for i in _scan(data, user_id, "in") if i not in first]
+    moved = next(r for r in data["requests"] if r["id"] in older and r["status"] == "Pending")
+    set_status(data, moved, "Accepted")
+    # Now the newest, so it is behind the cursor and the rest of the pages skip it
+    rest = _all_pages(data, user_id, lanes, cursor, 3)
+    assert rest == [i for i in older if i != moved["id"]]
+    assert mailbox_page(data, user_id, lanes, None, 1)[0] == [moved["id"]]
+    assert moved["id"] not in _all_pages(data, user_id, [("in", "Pending")])
+    assert moved["id"] in _all_pages(data, user_id, [("in", "Accepted")])
+
+def test_counts_match_a_full_scan_after_changes(make_data):
+    data = make_data(requests=300)
+    for i, req in enumerate(data["requests"][:60]):
+        if req["status"] in OPEN_STATUSES:
+            set_status(data, req, ["Accepted", "Completed", "Rejected"][i % 3])
+    users = {r["sender_id"] for r in data["requests"]} | {r["receiver_id"] for r in data["requests"]}
+    for user_id in users:
+        for box in ("in", "out"):
+            assert mailbox_count(data, user_id, box) == len(_scan(data, user_id, box))
+            for status in STATUSES:
+                assert mailbox_count(data, user_id, box, [status]) == len(_scan(data, user_id, box, [status]))
+    rebuilt = copy.deepcopy(data)
+    rebuild_request_indexes(rebuilt)
+    assert rebuilt["indexes"]["mailboxes"] == data["indexes"]["mailboxes"]
+    assert rebuilt["indexes"]["open_requests"] == data["indexes"]["open_requests"]
@@ -0,0 +1,88 @@
+import pytest
+
+from skillswap.store import VersionedStore
+from skillswap.writer import WriteBehind
+
+@pytest.fixture
+def writer(make_data):
+    VersionedStore().commit(make_data())
+    writer = WriteBehind(window=0.01)
+    yield writer
+    writer.close()
+
+def _rename(user_index, name):
+    def mutation(data):
+        data["users"][user_index]["name"] = name
+        return name
+    return mutation
+
+def test_submit_is_visible_at_once_and_durable_when_resolved(writer):
+    future = writer.submit(_rename(0, "now"))
+    assert writer.read()["users"][0]["name"] == "now"
+    assert future.result(timeout=5) == "now"
+    assert VersionedStore().load()["users"][0]["name"] == "now"
+
+def test_burst_is_flushed_together(writer):
+    futures = [writer.submit(_rename(i, f"user {i}")) for i in range(20)]
+    for future in futures:
+        future.result(timeout=5)
+    assert writer.flushes < writer.mutations
+    on_disk = VersionedStore().load()
+    assert [u["name"] for u in on_disk["users"][:20]] == [f"user {i}" for i in range(20)]
+
+def test_close_flushes_pending_mutations(writer):
+    writer.submit(_rename(1, "last"))
+    writer.close()
+    assert VersionedStore().load()["users"][1]["name"] == "last"
+    with pytest.raises(RuntimeError):
+        writer.submit(_rename(1, "late"))
+
+def test_merges_onto_another_writers_commit(writer):
+    rival = VersionedStore()
+    theirs = rival.load()
+    theirs["users"][2]["name"] = "theirs"
+    rival.commit(theirs)
+    writer.submit(_rename(3, "ours")).result(timeout=5)
+    on_disk = VersionedStore().load()
+    assert (on_disk["users"][2]["name"], on_disk["users"][3]["name"]) == ("theirs", "ours")
+    assert writer.conflicts == 1
+
+def test_replays_on_a_conflicting_record(writer):
+    rival = VersionedStore()
+    theirs = rival.load()
+    theirs["users"][4]["rating"] = 1.5
+    rival.commit(theirs)
+
+    def complete(data):
+        user = data["users"][4]
+        user["swaps_completed"] = user.get("swaps_completed", 0) + 1
+        return user["swaps_completed"]
+
+    before = writer.read()["users"][4].get("swaps_completed", 0)
+    assert writer.submit(complete).result(timeout=5) == before + 1
+    user = VersionedStore().load()["users"][4]
+    assert (user["rating"], user["swaps_completed"]) == (1.5, before + 1)
+
+def test_failed_mutation_changes_nothing(writer):
+    def broken(data):
+        data["users"][0]["name"] = "half"
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError):
+        writer.submit(broken).result(timeout=5)
+    assert writer.read()["users"][0]["name"] != "half"
+
+def test_job_commits_the_mutation_it_returns(writer):
+    def job(view):
+        count = len(view["users"])
+        return lambda data: data.setdefault("job_runs", []).append(count) or count
+
+    assert writer.submit_job(job).result(timeout=5) == len(writer.read()["users"])
+    assert VersionedStore().load()["job_runs"] == [len(writer.read()["users"])]
+
+def test_published_versions_are_adopted(writer):
+    version = writer.read()["users"][2]["version"]
+    writer.submit(_rename(2, "versioned")).result(timeout=5)
+    data, settled = writer.read_settled()
+    assert settled
+    assert data["users"][2]["version"] == version + 1 == VersionedStore().load()["users"][2]["version"]